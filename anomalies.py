@@ -0,0 +1,220 @@
+"""
+Catalog-wide scan for suspicious values in the WDI store.
+
+Every country value of every indicator is scored at once, with grouped
+medians over the whole value cube (no per-slice loops):
+
+    jump           the change from the country's previous observation, against
+                   the typical change of that series
+    series         the value against the rest of the country's series
+    cross_country  the value against the other countries in the same year
+
+Scores are robust z-scores, |x - median| / (1.4826 * MAD), so a few bad values
+cannot hide themselves by inflating the spread. Indicators spanning more than
+three orders of magnitude are scored on log10 values, where a unit change or a
+misplaced decimal is a jump of 1 or more.
+
+Values scoring above ANOMALY_Z_THRESHOLD on any check are stored in a report
+sorted by indicator, year and country; the Dash app reads the rows of the
+shown indicator and flags them in the hover text.
+
+Usage:
+    python anomalies.py --build [--force]
+    python anomalies.py --indicator NY.GDP.PCAP.CD [--year 2020]
+    python anomalies.py --summary
+"""
+
+from __future__ import annotations
+
+import argparse
+import time
+from functools import lru_cache
+from typing import Optional
+
+import config
+from startup import lazy_import
+
+pd = lazy_import('pandas')
+np = lazy_import('numpy')
+
+ANOMALY_CHECKS = ('jump', 'series', 'cross_country')
+
+ANOMALY_COLUMNS = ['IndicatorCode', 'Year', 'CountryCode', 'ISO3', 'IndicatorValue',
+                   'PreviousYear', 'PreviousValue', 'JumpZ', 'SeriesZ', 'CrossZ', 'Checks']
+
+# Scale factors making the MAD (and, when over half the values are equal, the
+# mean absolute deviation) consistent with the standard deviation
+MAD_SCALE = 1.4826
+MEAN_AD_SCALE = 1.2533
+
+def robust_z(values: pd.Series, groups: np.ndarray, min_count: int = config.ANOMALY_MIN_OBSERVATIONS) -> np.ndarray:
+    """Absolute robust z-score of each value within its group (NaN for small groups)."""
+    grouped = values.groupby(groups)
+    deviation = (values - grouped.transform('median')).abs()
+    by_deviation = deviation.groupby(groups)
+    mad = by_deviation.transform('median') * MAD_SCALE
+    scale = mad.where(mad > 0, by_deviation.transform('mean') * MEAN_AD_SCALE)
+
+    z = deviation / scale.where(scale > 0)
+    return z.where(grouped.transform('count') >= min_count).to_numpy()
+
+def scan_values(long_df: pd.DataFrame) -> pd.DataFrame:
+    """Score every row of a long-format frame; returns the flagged rows."""
+    from classification import LOG_SCALE_RATIO
+
+    df = long_df.sort_values(['IndicatorCode', 'CountryCode', 'Year']).reset_index(drop=True)
+    indicator = df.groupby('IndicatorCode', sort=False).ngroup().to_numpy()
+    series = df.groupby(['IndicatorCode', 'CountryCode'], sort=False).ngroup().to_numpy()
+    cross_section = df.groupby(['IndicatorCode', 'Year'], sort=False).ngroup().to_numpy()
+
+    # Log10 for positive indicators spanning orders of magnitude
+    values = df['IndicatorValue']
+    by_indicator = values.groupby(indicator)
+    low, high = by_indicator.transform('min'), by_indicator.transform('max')
+    use_log = (low > 0) & (high > low * LOG_SCALE_RATIO)
+    scaled = values.where(~use_log, np.log10(values.where(use_log)))
+
+    # Rows are sorted by series and year, so the previous row of the same
+    # series is the previous observation
+    same_series = np.r_[False, series[1:] == series[:-1]]
+    change = scaled.diff().where(same_series)
+    observed_change = change.notna().to_numpy()
+    jump_z = np.full(len(df), np.nan)
+    jump_z[observed_change] = robust_z(change[observed_change], series[observed_change])
+
+    scores = pd.DataFrame({
+        'JumpZ': jump_z,
+        'SeriesZ': robust_z(scaled, series),
+        'CrossZ': robust_z(scaled, cross_section)
+    })
+    flags = scores.to_numpy() > config.ANOMALY_Z_THRESHOLD
+    flagged = flags.any(axis=1)
+
+    report = df.loc[flagged, ['IndicatorCode', 'Year', 'CountryCode', 'ISO3', 'IndicatorValue']]
+    report['PreviousYear'] = df['Year'].shift().where(same_series)[flagged].astype('Int16')
+    report['PreviousValue'] = values.shift().where(same_series)[flagged]
+    for column in scores.columns:
+        report[column] = scores.loc[flagged, column].round(2)
+
+    checks = np.array(ANOMALY_CHECKS)
+    report['Checks'] = [','.join(checks[row]) for row in flags[flagged]]
+    return report.sort_values(['IndicatorCode', 'Year', 'CountryCode']).reset_index(drop=True)[ANOMALY_COLUMNS]
+
+def build_anomaly_report(force: bool = False) -> bool:
+    """Scan the whole store and save the flagged values if out of date."""
+    from wdi_store import ensure_ingested, is_derived_table_current, read_store, write_derived_table
+
+    if not force and is_derived_table_current(config.ANOMALY_REPORT_FILE):
+        return True
+    if not ensure_ingested():
+        return False
+
+    print("Scanning every indicator and country series in the WDI store...")
+    start = time.perf_counter()
+    long_df = read_store(columns=['IndicatorCode', 'CountryCode', 'ISO3', 'Year', 'IndicatorValue'])
+    report = scan_values(long_df)
+    path = write_derived_table(report, config.ANOMALY_REPORT_FILE)
+    _load_indicator_anomalies.cache_clear()
+    print(f"Flagged {len(report):,} of {len(long_df):,} values in {time.perf_counter() - start:.1f}s; saved to {path}")
+    return True
+
+@lru_cache(maxsize=32)
+def _load_indicator_anomalies(indicator_code: str, fingerprint: str) -> pd.DataFrame:
+    """Flagged values of one indicator indexed by (country, year)."""
+    from wdi_store import read_derived_table
+
+    report = read_derived_table(config.ANOMALY_REPORT_FILE, filters=[('IndicatorCode', '==', indicator_code)])
+    return report.astype({'Year': int}).set_index(['CountryCode', 'Year']).sort_index()
+
+def get_indicator_anomalies(indicator_code: str, year: Optional[str] = None) -> pd.DataFrame:
+    """Flagged values of an indicator (optionally one year), empty if the report is not built."""
+    from process_wb_data import get_data_fingerprint
+    from wdi_store import is_derived_table_current
+
+    # The scan is a batch job; rendering never waits for it
+    if not is_derived_table_current(config.ANOMALY_REPORT_FILE):
+        return pd.DataFrame(columns=ANOMALY_COLUMNS).set_index(['CountryCode', 'Year'])
+    anomalies = _load_indicator_anomalies(indicator_code, get_data_fingerprint())
+    if year is not None:
+        anomalies = anomalies[anomalies.index.get_level_values('Year') == int(year)]
+    return anomalies
+
+def describe_anomalies(anomalies: pd.DataFrame) -> pd.Series:
+    """Short explanation of each flagged value, e.g. 'jump from 1,234.00 in 2009'."""
+    jump = ('jump from ' + anomalies['PreviousValue'].map('{:,.2f}'.format) +
+            ' in ' + anomalies['PreviousYear'].astype(str))
+    parts = pd.DataFrame({
+        'jump': jump.where(anomalies['Checks'].str.contains('jump'), ''),
+        'series': np.where(anomalies['Checks'].str.contains('series'), "unusual for this country", ''),
+        'cross_country': np.where(anomalies['Checks'].str.contains('cross_country'),
+                                  "outlier among countries this year", '')
+    }, index=anomalies.index)
+    return parts.apply(lambda row: '; '.join(part for part in row if part), axis=1)
+
+def attach_anomalies(df: pd.DataFrame, indicator_code: str) -> pd.DataFrame:
+    """Add an ``Anomaly`` column describing flagged values of a slice (NaN otherwise).
+
+    Gap-filled slices are matched on ``SourceYear``, like footnotes, and
+    derived metrics on the ``EndYear`` of their change.
+    """
+    anomalies = get_indicator_anomalies(indicator_code)
+    if df.empty or anomalies.empty:
+        return df
+
+    year_column = next(column for column in ('SourceYear', 'EndYear', 'Year') if column in df.columns)
+    keys = pd.MultiIndex.from_arrays([df['CountryCode'], df[year_column].astype(int)])
+    df = df.copy()
+    df['Anomaly'] = describe_anomalies(anomalies).reindex(keys).to_numpy()
+    return df
+
+def format_hover_anomalies(anomalies: pd.Series) -> pd.Series:
+    """Hover lines for an ``Anomaly`` column, empty when the value was not flagged."""
+    text = anomalies.fillna('').astype(str)
+    return ('<br>⚠️ Check value: ' + text).where(text != '', '')
+
+def main():
+    """Main function for command line usage."""
+    parser = argparse.ArgumentParser(description="Scan the WDI store for year-over-year jumps and outliers")
+    parser.add_argument("--build", action="store_true",
+                       help="Scan the whole store (or rescan with --force)")
+    parser.add_argument("--force", action="store_true",
+                       help="Rescan even if the report is up to date")
+    parser.add_argument("--indicator", type=str,
+                       help="World Bank indicator code: print its flagged values")
+    parser.add_argument("--year", type=str, default=None,
+                       help="Only print flagged values of this year")
+    parser.add_argument("--summary", action="store_true",
+                       help="Print the indicators with the most flagged values")
+    parser.add_argument("--top", type=int, default=20,
+                       help="Rows to print (default: 20)")
+
+    args = parser.parse_args()
+
+    if args.build or args.summary:
+        build_anomaly_report(args.force)
+
+    if args.summary:
+        from wdi_store import read_derived_table
+        report = read_derived_table(config.ANOMALY_REPORT_FILE, columns=['IndicatorCode', 'Checks'])
+        counts = report.groupby('IndicatorCode').size().sort_values(ascending=False)
+        print(f"\nIndicators with the most flagged values ({len(report):,} in total):")
+        for code, count in counts.head(args.top).items():
+            print(f"  {code:<25} {count:6,d}")
+
+    if args.indicator:
+        anomalies = get_indicator_anomalies(args.indicator, args.year)
+        if anomalies.empty:
+            print(f"No flagged values for {args.indicator} (build the report with --build)")
+        else:
+            print(f"\nFlagged values of {args.indicator}:")
+            ranked = anomalies.assign(Score=anomalies[['JumpZ', 'SeriesZ', 'CrossZ']].max(axis=1))
+            ranked = ranked.sort_values('Score', ascending=False).head(args.top)
+            for (country, year), row in ranked.iterrows():
+                print(f"  {row['ISO3'] or country} {year}: {row['IndicatorValue']:,.2f} "
+                      f"[{row['Checks']}] z={row['Score']:.1f}")
+
+    if not (args.build or args.summary or args.indicator):
+        parser.print_help()
+
+if __name__ == "__main__":
+    main()
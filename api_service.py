@@ -0,0 +1,308 @@
+"""
+Asyncio HTTP service for programmatic access to slices, coverage and statistics.
+
+Runs next to the Dash app (default port 8060) and answers JSON requests with
+the same pipeline (``process_indicator_for_year``, the WDI store summaries,
+indicator metadata). The event loop only parses requests and writes
+responses: every load and serialization runs in a bounded thread pool (or
+process pool with ``--processes``), identical requests in flight share one
+job, and a batch endpoint answers many (indicator, year) pairs in one call.
+
+Backpressure: at most ``--max-pending`` jobs may be running or waiting for a
+worker. Requests beyond that get 503 with a Retry-After header instead of
+queueing without bound, and jobs running longer than ``--timeout`` seconds
+get 504.
+
+Endpoints:
+    GET  /health
+    GET  /indicator/{indicator_code}
+    GET  /slice/{indicator_code}/{year}?gap_fill=latest&vintage=2024-03
+    GET  /stats/{indicator_code}/{year}
+    GET  /coverage/{indicator_code}
+    POST /batch   {"indicators": [...], "years": [...], "kind": "slice"}
+                  or {"requests": [{"indicator": ..., "year": ..., "kind": "stats"}, ...]}
+
+Usage:
+    python api_service.py [--port 8060] [--workers 8] [--max-pending 64]
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Dict, List, Optional, Tuple
+
+import config
+
+BATCH_KINDS = ('slice', 'stats', 'coverage')
+
+# Jobs run in the worker pool, so they are module-level functions returning
+# serialized JSON (or None when there is no data)
+
+def slice_job(indicator_code: str, year: str, gap_fill: Optional[str] = None,
+              vintage: Optional[str] = None) -> Optional[str]:
+    from process_wb_data import get_data_fingerprint, process_indicator_for_year
+
+    df = process_indicator_for_year(indicator_code, year, gap_fill=gap_fill, vintage=vintage)
+    if df is None or df.empty:
+        return None
+    return json.dumps({
+        'indicator': indicator_code,
+        'year': year,
+        'fingerprint': get_data_fingerprint(),
+        'count': len(df),
+        'data': df.to_dict('records')
+    })
+
+def stats_job(indicator_code: str, year: str) -> Optional[str]:
+    from process_wb_data import get_indicator_summary_stats, process_indicator_for_year
+
+    stats = get_indicator_summary_stats(None, indicator_code, year)
+    if not stats:
+        stats = get_indicator_summary_stats(process_indicator_for_year(indicator_code, year), indicator_code)
+    if not stats:
+        return None
+    return json.dumps({'indicator': indicator_code, 'year': year, **stats})
+
+def coverage_job(indicator_code: str) -> Optional[str]:
+    """Countries with data per year, from the store summaries when available."""
+    from process_wb_data import get_available_years_for_indicator
+    from wdi_store import is_ingested, load_summary_tables
+
+    if is_ingested():
+        try:
+            counts = load_summary_tables()['summary'].loc[indicator_code, 'Count']
+        except KeyError:
+            return None
+        coverage = {str(year): int(count) for year, count in counts.items()}
+    else:
+        coverage = {year: None for year in get_available_years_for_indicator(indicator_code)}
+    if not coverage:
+        return None
+    return json.dumps({'indicator': indicator_code, 'years': len(coverage), 'countries_per_year': coverage})
+
+def indicator_job(indicator_code: str) -> Optional[str]:
+    from process_wb_data import get_indicator_info
+
+    return json.dumps({'indicator': indicator_code, **get_indicator_info(indicator_code)})
+
+JOBS = {
+    'slice': slice_job,
+    'stats': stats_job,
+    'coverage': coverage_job,
+    'indicator': indicator_job
+}
+
+class Overloaded(Exception):
+    """Raised when accepting a job would exceed the pending limit."""
+
+class JobRunner:
+    """Runs jobs in a bounded pool with a pending limit and shared in-flight jobs."""
+
+    def __init__(self, executor: Executor, workers: int, max_pending: int, timeout: float):
+        self.executor = executor
+        self.max_pending = max_pending
+        self.timeout = timeout
+        self.pending = 0
+        self.completed = 0
+        self.rejected = 0
+        self._slots = asyncio.Semaphore(workers)
+        self._in_flight: Dict[Tuple, asyncio.Future] = {}
+
+    def reserve(self, count: int = 1) -> None:
+        """Admit ``count`` jobs or raise Overloaded."""
+        if self.pending + count > self.max_pending:
+            self.rejected += 1
+            raise Overloaded()
+        self.pending += count
+
+    async def _execute(self, kind: str, args: Tuple) -> Optional[str]:
+        try:
+            # Only as many jobs as workers are handed to the pool; the rest
+            # wait here, counted against the pending limit
+            async with self._slots:
+                loop = asyncio.get_running_loop()
+                return await loop.run_in_executor(self.executor, JOBS[kind], *args)
+        finally:
+            self.pending -= 1
+            self.completed += 1
+
+    async def run(self, kind: str, *args) -> Optional[str]:
+        """Run a reserved job, joining an identical job already in flight."""
+        key = (kind,) + args
+        future = self._in_flight.get(key)
+        if future is None:
+            future = asyncio.ensure_future(self._execute(kind, args))
+            self._in_flight[key] = future
+            future.add_done_callback(lambda _: self._in_flight.pop(key, None))
+        else:
+            # The shared job holds the reservation
+            self.pending -= 1
+        return await asyncio.wait_for(asyncio.shield(future), self.timeout)
+
+def create_app(workers: int = config.API_WORKERS, max_pending: int = config.API_MAX_PENDING,
+               timeout: float = config.API_REQUEST_TIMEOUT, processes: bool = False):
+    """Build the aiohttp application."""
+    from aiohttp import web
+
+    pool_class = ProcessPoolExecutor if processes else ThreadPoolExecutor
+    executor = pool_class(max_workers=workers)
+    runner = JobRunner(executor, workers, max_pending, timeout)
+    started = time.time()
+
+    def error(status: int, message: str, **headers) -> 'web.Response':
+        return web.json_response({'error': message}, status=status, headers=headers)
+
+    async def respond(kind: str, *args) -> 'web.Response':
+        try:
+            runner.reserve()
+        except Overloaded:
+            return error(503, 'Too many pending requests', **{'Retry-After': '1'})
+        try:
+            body = await runner.run(kind, *args)
+        except asyncio.TimeoutError:
+            return error(504, 'Request timed out')
+        except Exception as e:
+            return error(500, str(e))
+        if body is None:
+            return error(404, 'No data available')
+        return web.Response(text=body, content_type='application/json')
+
+    async def health(request):
+        return web.json_response({
+            'status': 'ok',
+            'uptime': round(time.time() - started, 1),
+            'pending': runner.pending,
+            'max_pending': runner.max_pending,
+            'completed': runner.completed,
+            'rejected': runner.rejected
+        })
+
+    async def indicator(request):
+        return await respond('indicator', request.match_info['indicator_code'])
+
+    async def slice_(request):
+        gap_fill = request.query.get('gap_fill') or None
+        if gap_fill and gap_fill not in config.GAP_FILL_MODES:
+            return error(400, f"gap_fill must be one of {', '.join(config.GAP_FILL_MODES)}")
+        return await respond('slice', request.match_info['indicator_code'], request.match_info['year'],
+                             gap_fill, request.query.get('vintage') or None)
+
+    async def stats(request):
+        return await respond('stats', request.match_info['indicator_code'], request.match_info['year'])
+
+    async def coverage(request):
+        return await respond('coverage', request.match_info['indicator_code'])
+
+    async def batch(request):
+        try:
+            items = parse_batch(await request.json())
+        except (ValueError, TypeError, KeyError) as e:
+            return error(400, f"Invalid batch: {e}")
+        limit = min(config.API_MAX_BATCH, runner.max_pending)
+        if len(items) > limit:
+            return error(413, f"Batches are limited to {limit} items")
+
+        # A batch is admitted whole or not at all
+        try:
+            runner.reserve(len(items))
+        except Overloaded:
+            return error(503, 'Too many pending requests', **{'Retry-After': '1'})
+
+        async def run_item(item: Dict) -> str:
+            args = (item['indicator'], item['year']) if item['kind'] != 'coverage' else (item['indicator'],)
+            try:
+                body = await runner.run(item['kind'], *args)
+            except asyncio.TimeoutError:
+                return json.dumps({**item, 'error': 'Request timed out'})
+            except Exception as e:
+                return json.dumps({**item, 'error': str(e)})
+            return body if body is not None else json.dumps({**item, 'error': 'No data available'})
+
+        parts = await asyncio.gather(*(run_item(item) for item in items))
+        return web.Response(text='{"results": [' + ', '.join(parts) + ']}', content_type='application/json')
+
+    async def shutdown(app):
+        executor.shutdown(wait=False, cancel_futures=True)
+
+    app = web.Application(client_max_size=1024 ** 2)
+    app.add_routes([
+        web.get('/health', health),
+        web.get('/indicator/{indicator_code}', indicator),
+        web.get('/slice/{indicator_code}/{year}', slice_),
+        web.get('/stats/{indicator_code}/{year}', stats),
+        web.get('/coverage/{indicator_code}', coverage),
+        web.post('/batch', batch)
+    ])
+    app.on_shutdown.append(shutdown)
+    return app
+
+def _is_year(value) -> bool:
+    """Whether a JSON value is a year: an integer or a string of digits."""
+    if isinstance(value, str):
+        return value.isascii() and value.isdigit()
+    return isinstance(value, int) and not isinstance(value, bool)
+
+def parse_batch(payload: Dict) -> List[Dict]:
+    """Batch items from either the cross-product or the explicit request form.
+
+    Raises ValueError when the payload does not have one of the two shapes,
+    or an item has an unknown kind or a year that is not a number.
+    """
+    if not isinstance(payload, dict):
+        raise ValueError("the body must be a JSON object")
+    if 'requests' in payload:
+        if not isinstance(payload['requests'], list):
+            raise ValueError("requests must be a list")
+        if not all(isinstance(item, dict) and isinstance(item.get('indicator'), str)
+                   for item in payload['requests']):
+            raise ValueError("each request must be an object with an indicator code")
+        items = [{'indicator': item['indicator'], 'year': item.get('year', config.DEFAULT_YEAR),
+                  'kind': item.get('kind', 'slice')} for item in payload['requests']]
+    else:
+        indicators = payload.get('indicators')
+        years = payload.get('years', [config.DEFAULT_YEAR])
+        if not isinstance(indicators, list) or not all(isinstance(code, str) for code in indicators):
+            raise ValueError("indicators must be a list of indicator codes")
+        if not isinstance(years, list):
+            raise ValueError("years must be a list of years")
+        kind = payload.get('kind', 'slice')
+        items = [{'indicator': code, 'year': year, 'kind': kind} for code in indicators for year in years]
+    for item in items:
+        if item['kind'] not in BATCH_KINDS:
+            raise ValueError(f"kind must be one of {', '.join(BATCH_KINDS)}")
+        if not _is_year(item['year']):
+            raise ValueError(f"invalid year: {json.dumps(item['year'])}")
+        item['year'] = str(item['year'])
+    return items
+
+def main():
+    """Main function for command line usage."""
+    parser = argparse.ArgumentParser(description="Asyncio JSON API for World Bank indicator slices and statistics")
+    parser.add_argument("--host", type=str, default='127.0.0.1',
+                       help="Interface to listen on (default: 127.0.0.1)")
+    parser.add_argument("--port", type=int, default=config.API_SERVICE_PORT,
+                       help=f"Port to listen on (default: {config.API_SERVICE_PORT})")
+    parser.add_argument("--workers", type=int, default=config.API_WORKERS,
+                       help=f"Worker threads or processes (default: {config.API_WORKERS})")
+    parser.add_argument("--max-pending", type=int, default=config.API_MAX_PENDING,
+                       help=f"Running plus waiting jobs before requests are rejected (default: {config.API_MAX_PENDING})")
+    parser.add_argument("--timeout", type=float, default=config.API_REQUEST_TIMEOUT,
+                       help=f"Seconds before a request times out (default: {config.API_REQUEST_TIMEOUT})")
+    parser.add_argument("--processes", action="store_true",
+                       help="Use a process pool instead of threads (no shared in-memory caches)")
+
+    args = parser.parse_args()
+
+    from aiohttp import web
+
+    print(f"🚀 Indicator API on http://{args.host}:{args.port}/ "
+          f"({args.workers} {'processes' if args.processes else 'threads'}, max {args.max_pending} pending)")
+    web.run_app(create_app(args.workers, args.max_pending, args.timeout, args.processes),
+                host=args.host, port=args.port, print=None)
+
+if __name__ == "__main__":
+    main()
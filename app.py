@@ -1,59 +1,37 @@
 import dash
 from dash import dcc, html, callback_context
 from dash.dependencies import Input, Output, State
-import pandas as pd
-import os
+from dash.exceptions import PreventUpdate
 from typing import List, Dict, Optional
 
 # Import our custom modules
 import config
-from wb_globe import create_enhanced_3d_globe, add_indicator_statistics
+from wb_globe import (
+    create_enhanced_3d_globe,
+    add_indicator_statistics,
+    encode_compact_figure,
+    get_figure_payload_size
+)
 from process_wb_data import (
     process_indicator_for_year, 
     get_indicator_info, 
-    get_available_years_for_indicator
+    get_available_years_for_indicator,
+    get_country_iso3_mapping
 )
-
-# Ensure data directory exists
-if not os.path.exists(config.DATA_DIR):
-    os.makedirs(config.DATA_DIR)
+from startup import import_task, start_warm_up
+from http_cache import install_http_caching
+from indicator_search import get_popular_options, get_search_index, to_dropdown_option
 
 # Initialize Dash app
 app = dash.Dash(__name__)
 server = app.server  # For deployment
 
-# Load available indicators
-def get_available_indicators() -> List[Dict[str, str]]:
-    """Get list of available indicators from the WDI series file."""
-    try:
-        series_df = pd.read_csv(config.WDI_SERIES_FILE)
-        indicators = []
-        
-        # Add popular indicators first
-        for name, code in config.POPULAR_INDICATORS.items():
-            indicators.append({'label': f"⭐ {name}", 'value': code})
-        
-        # Add separator
-        indicators.append({'label': '--- All Indicators ---', 'value': '', 'disabled': True})
-        
-        # Add all other indicators
-        for _, row in series_df.iterrows():
-            code = row['Series Code']
-            name = row['Indicator Name']
-            if code not in config.POPULAR_INDICATORS.values():
-                # Truncate long names
-                if len(name) > 80:
-                    name = name[:77] + "..."
-                indicators.append({'label': f"{name} ({code})", 'value': code})
-        
-        return indicators
-    except Exception as e:
-        print(f"Error loading indicators: {e}")
-        # Fallback to popular indicators only
-        return [{'label': name, 'value': code} for name, code in config.POPULAR_INDICATORS.items()]
+# Compression, ETags and the cached /api/slice and /api/figure endpoints
+install_http_caching(server)
 
-# Get indicator options
-INDICATOR_OPTIONS = get_available_indicators()
+# Only the popular indicators are sent with the initial page; the full catalog
+# is searched server-side as the user types (see update_indicator_options)
+INITIAL_INDICATOR_OPTIONS = get_popular_options()
 
 # Define year range
 YEARS = [str(year) for year in config.DEFAULT_YEARS_RANGE]
@@ -74,9 +52,9 @@ app.layout = html.Div([
             html.Label("Select Indicator:", style={'fontWeight': 'bold', 'marginBottom': '5px'}),
             dcc.Dropdown(
                 id='indicator-dropdown',
-                options=INDICATOR_OPTIONS,
-                value=config.POPULAR_INDICATORS["GDP per capita"],  # Default
-                placeholder="Choose an indicator...",
+                options=INITIAL_INDICATOR_OPTIONS,
+                value=config.POPULAR_INDICATORS["GDP per capita (current US$)"],  # Default
+                placeholder="Type to search 1,400+ indicators...",
                 style={'marginBottom': '10px'}
             ),
         ], style={'width': '45%', 'display': 'inline-block', 'marginRight': '5%', 'verticalAlign': 'top'}),
@@ -156,6 +134,33 @@ app.layout = html.Div([
 
 ], style={'maxWidth': '1400px', 'margin': '0 auto', 'padding': '20px'})
 
+# Callback for server-side indicator search
+@app.callback(
+    Output('indicator-dropdown', 'options'),
+    [Input('indicator-dropdown', 'search_value')],
+    [State('indicator-dropdown', 'value')]
+)
+def update_indicator_options(search_value, selected_indicator):
+    """Return only the top catalog matches for the current search text."""
+    if not search_value:
+        raise PreventUpdate
+    
+    try:
+        index = get_search_index()
+    except Exception as e:
+        print(f"Error loading indicators: {e}")
+        return INITIAL_INDICATOR_OPTIONS
+    
+    options = [to_dropdown_option(record) for record in index.search(search_value)]
+    
+    # Keep the current selection resolvable so its label does not disappear
+    if selected_indicator and all(option['value'] != selected_indicator for option in options):
+        record = index.get(selected_indicator)
+        if record is not None:
+            options.append(to_dropdown_option(record))
+    
+    return options
+
 # Callback for the main globe generation
 @app.callback(
     [Output('wb-globe-graph', 'figure'),
@@ -192,7 +197,8 @@ def update_globe(n_clicks, selected_indicator, selected_year, viz_options):
             return {}, html.Ul([html.Li(msg) for msg in status_messages]), ""
         
         # Create the globe
-        fig = create_enhanced_3d_globe(df, selected_indicator, selected_year)
+        fig = create_enhanced_3d_globe(df, selected_indicator, selected_year,
+                                       compact=config.COMPACT_FIGURES)
         
         if fig:
             status_messages.append(f"✅ Successfully generated globe with data for {len(df)} countries")
@@ -232,6 +238,10 @@ def update_globe(n_clicks, selected_indicator, selected_year, viz_options):
             # Add definition if available
             if indicator_info['definition']:
                 info_content.append(html.P(f"ℹ️ Definition: {indicator_info['definition'][:200]}..."))
+            
+            if config.COMPACT_FIGURES:
+                fig = encode_compact_figure(fig)
+                print(f"Figure payload: {get_figure_payload_size(fig):,} bytes (compact)")
         else:
             status_messages.append("❌ Failed to generate visualization")
             return {}, html.Ul([html.Li(msg) for msg in status_messages]), ""
@@ -300,6 +310,15 @@ def show_indicator_info(n_clicks, selected_indicator):
     except Exception as e:
         return f"❌ Error retrieving indicator info: {str(e)}"
 
+# Load heavy modules and shared data in the background so the server can
+# start accepting requests immediately
+start_warm_up([
+    import_task('pandas'),
+    import_task('plotly.graph_objects'),
+    ('country ISO3 mapping', get_country_iso3_mapping),
+    ('indicator search index', get_search_index),
+])
+
 # Run the app
 if __name__ == '__main__':
     print("🌍 Starting World Bank Indicators 3D Visualization...")
@@ -0,0 +1,150 @@
+"""
+Bulk export of WDI store rows as an Apache Arrow IPC stream.
+
+Rows are scanned straight from the Parquet store with the indicator, year
+range and country filters pushed into the scan, and written batch by batch
+to an IPC stream. Data stays in Arrow buffers from the Parquet reader to the
+output, so dtypes are kept exactly (Year int16, IndicatorValue float64) and
+memory use does not grow with the size of the export.
+
+The same stream is served by the Dash server at
+
+    GET /api/export.arrow?indicators=NY.GDP.PCAP.CD,SP.POP.TOTL&start=2000&end=2020&countries=USA,DEU
+
+and read with ``pyarrow.ipc.open_stream``.
+
+Usage:
+    python arrow_export.py --indicators NY.GDP.PCAP.CD SP.POP.TOTL --years 2000 2020 --output wdi.arrows
+    python arrow_export.py --popular --countries USA DEU FRA --output g3.arrows
+    python arrow_export.py --output everything.arrows
+"""
+
+from __future__ import annotations
+
+import argparse
+import time
+from typing import Iterator, List, Optional
+
+import config
+from startup import lazy_import
+
+pa = lazy_import('pyarrow')
+ds = lazy_import('pyarrow.dataset')
+
+EXPORT_COLUMNS = ['IndicatorCode', 'CountryCode', 'ISO3', 'CountryName', 'Year', 'IndicatorValue']
+
+ARROW_STREAM_MIMETYPE = 'application/vnd.apache.arrow.stream'
+
+def build_export_filter(indicators: Optional[List[str]] = None, start_year: Optional[int] = None,
+                        end_year: Optional[int] = None, countries: Optional[List[str]] = None,
+                        include_aggregates: bool = False):
+    """Dataset filter expression for an export, or None to export every row."""
+    conditions = []
+    if indicators:
+        conditions.append(ds.field('IndicatorCode').isin(list(indicators)))
+    if start_year is not None:
+        conditions.append(ds.field('Year') >= int(start_year))
+    if end_year is not None:
+        conditions.append(ds.field('Year') <= int(end_year))
+    if countries:
+        conditions.append(ds.field('CountryCode').isin(list(countries)))
+    if not include_aggregates:
+        conditions.append(ds.field('ISO3').is_valid())
+
+    expression = None
+    for condition in conditions:
+        expression = condition if expression is None else expression & condition
+    return expression
+
+def iter_export_batches(indicators: Optional[List[str]] = None, start_year: Optional[int] = None,
+                        end_year: Optional[int] = None, countries: Optional[List[str]] = None,
+                        include_aggregates: bool = False,
+                        batch_size: int = config.ARROW_EXPORT_BATCH_SIZE) -> Iterator['pa.RecordBatch']:
+    """Record batches of the store rows matching the filters, read lazily."""
+    from wdi_store import ensure_ingested, get_store_path
+
+    if not ensure_ingested():
+        raise FileNotFoundError("The WDI store could not be built")
+
+    dataset = ds.dataset(get_store_path(config.WDI_STORE_FILE), format='parquet')
+    expression = build_export_filter(indicators, start_year, end_year, countries, include_aggregates)
+    for batch in dataset.to_batches(columns=EXPORT_COLUMNS, filter=expression, batch_size=batch_size):
+        if batch.num_rows:
+            yield batch
+
+def get_export_schema() -> 'pa.Schema':
+    """Schema of the exported stream (the store's own column types)."""
+    from wdi_store import get_store_path
+
+    schema = ds.dataset(get_store_path(config.WDI_STORE_FILE), format='parquet').schema
+    return pa.schema([schema.field(name) for name in EXPORT_COLUMNS])
+
+class _ChunkSink:
+    """File-like object collecting what the IPC writer writes, for streaming responses."""
+
+    def __init__(self):
+        self.chunks: List[bytes] = []
+        self.closed = False
+
+    def write(self, data) -> int:
+        self.chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self) -> None:
+        pass
+
+    def close(self) -> None:
+        self.closed = True
+
+    def take(self) -> bytes:
+        data = b''.join(self.chunks)
+        self.chunks = []
+        return data
+
+def iter_ipc_stream(**filters) -> Iterator[bytes]:
+    """The IPC stream of an export as a sequence of byte chunks, one per batch."""
+    sink = _ChunkSink()
+    with pa.ipc.new_stream(sink, get_export_schema()) as writer:
+        for batch in iter_export_batches(**filters):
+            writer.write_batch(batch)
+            yield sink.take()
+    yield sink.take()
+
+def write_ipc_file(path: str, **filters) -> int:
+    """Write an export to an IPC stream file; returns the number of rows."""
+    rows = 0
+    with pa.OSFile(path, 'wb') as sink, pa.ipc.new_stream(sink, get_export_schema()) as writer:
+        for batch in iter_export_batches(**filters):
+            writer.write_batch(batch)
+            rows += batch.num_rows
+    return rows
+
+def main():
+    """Main function for command line usage."""
+    parser = argparse.ArgumentParser(description="Export WDI store rows as an Arrow IPC stream")
+    parser.add_argument("--indicators", type=str, nargs='+',
+                       help="Indicator codes to export (default: all)")
+    parser.add_argument("--popular", action="store_true",
+                       help="Export the popular indicators from config")
+    parser.add_argument("--years", type=int, nargs=2, metavar=("FIRST", "LAST"),
+                       help="Year range to export (default: all years)")
+    parser.add_argument("--countries", type=str, nargs='+',
+                       help="World Bank country codes to export (default: all)")
+    parser.add_argument("--aggregates", action="store_true",
+                       help="Include regional and income group aggregates")
+    parser.add_argument("--output", type=str, required=True,
+                       help="Output file (Arrow IPC stream, e.g. wdi.arrows)")
+
+    args = parser.parse_args()
+
+    indicators = list(config.POPULAR_INDICATORS.values()) if args.popular else args.indicators
+    start_year, end_year = args.years or (None, None)
+
+    start = time.perf_counter()
+    rows = write_ipc_file(args.output, indicators=indicators, start_year=start_year, end_year=end_year,
+                          countries=[code.upper() for code in args.countries] if args.countries else None,
+                          include_aggregates=args.aggregates)
+    print(f"Exported {rows:,} rows to {args.output} in {time.perf_counter() - start:.1f}s")
+
+if __name__ == "__main__":
+    main()
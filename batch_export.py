@@ -0,0 +1,271 @@
+"""
+Headless batch export of globe snapshots for an indicator x year grid.
+
+Each (indicator, year) slice is loaded and rendered once per worker process,
+then written in every requested format: PNG and SVG through the kaleido
+static image engine, or HTML. A bundle directory holds a single copy of
+plotly.js and of the world geometry under ``assets/``, which every HTML file
+references and the image engine renders from.
+
+A manifest records the key (data fingerprint, format, size options) of every
+output, so an interrupted run can be restarted and only missing or outdated
+files are rendered again.
+
+Usage:
+    python batch_export.py --indicators NY.GDP.PCAP.CD SP.POP.TOTL --years 2010 2020 --formats png html
+    python batch_export.py --popular --years 2022 --formats html --workers 4 --out snapshots
+"""
+
+from __future__ import annotations
+
+import argparse
+import hashlib
+import json
+import os
+import shutil
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import config
+
+# Bump when the rendering changes so existing exports are redone
+EXPORT_VERSION = 1
+
+TOPOJSON_FILENAME = os.path.basename(config.TOPOJSON_URL)
+
+def get_output_filename(indicator_code: str, year: str, fmt: str) -> str:
+    return f"{indicator_code.replace('.', '_')}_{year}.{fmt}"
+
+def get_export_key(indicator_code: str, year: str, fmt: str, options: Dict) -> str:
+    """Identify an output by everything that changes its content."""
+    from process_wb_data import get_data_fingerprint
+
+    parts = [EXPORT_VERSION, indicator_code, year, fmt, get_data_fingerprint(),
+             json.dumps(options, sort_keys=True)]
+    return hashlib.sha1("|".join(str(part) for part in parts).encode('utf-8')).hexdigest()[:16]
+
+def load_manifest(out_dir: str) -> Dict[str, Dict]:
+    try:
+        with open(os.path.join(out_dir, config.EXPORT_MANIFEST_FILE)) as f:
+            return json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return {}
+
+def save_manifest(out_dir: str, manifest: Dict[str, Dict]) -> None:
+    """Write the manifest atomically, so an interrupted run never corrupts it."""
+    path = os.path.join(out_dir, config.EXPORT_MANIFEST_FILE)
+    tmp_path = path + ".tmp"
+    with open(tmp_path, 'w') as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+    os.replace(tmp_path, path)
+
+def prepare_bundle_assets(out_dir: str, topojson_source: Optional[str] = None) -> Optional[str]:
+    """Write the shared plotly.js and world geometry once per bundle.
+
+    The geometry is copied from ``topojson_source`` (a local file) or
+    downloaded from ``config.TOPOJSON_URL``. Returns the assets directory of
+    the geometry, or None if it is unavailable and the CDN must be used.
+    """
+    import plotly.offline
+
+    assets_dir = os.path.join(out_dir, config.EXPORT_ASSETS_DIR)
+    os.makedirs(assets_dir, exist_ok=True)
+
+    plotlyjs_path = os.path.join(assets_dir, "plotly.min.js")
+    if not os.path.exists(plotlyjs_path):
+        with open(plotlyjs_path, 'w', encoding='utf-8') as f:
+            f.write(plotly.offline.get_plotlyjs())
+
+    topojson_path = os.path.join(assets_dir, TOPOJSON_FILENAME)
+    if not os.path.exists(topojson_path):
+        try:
+            if topojson_source:
+                shutil.copyfile(topojson_source, topojson_path)
+            else:
+                import requests
+                response = requests.get(config.TOPOJSON_URL, timeout=30)
+                response.raise_for_status()
+                with open(topojson_path, 'wb') as f:
+                    f.write(response.content)
+        except Exception as e:
+            print(f"Warning: Could not bundle world geometry ({e}); outputs will load it from the CDN")
+            return None
+    return assets_dir
+
+def _init_worker(topojson_dir: Optional[str]) -> None:
+    """Point the image engine of a worker at the bundled geometry."""
+    if topojson_dir:
+        import plotly.io as pio
+        pio.kaleido.scope.topojson = Path(topojson_dir).resolve().as_uri() + "/"
+
+def _export_slice(indicator_code: str, year: str, outputs: List[Tuple[str, str]],
+                  options: Dict, has_local_topojson: bool) -> List[Dict]:
+    """Render one slice and write it in each requested (format, path)."""
+    from process_wb_data import process_indicator_for_year
+    from wb_globe import create_enhanced_3d_globe
+
+    start = time.perf_counter()
+    df = process_indicator_for_year(indicator_code, year, gap_fill=options.get('gap_fill'))
+    if df is None or df.empty:
+        return [{'format': fmt, 'path': path, 'status': 'no-data'} for fmt, path in outputs]
+
+    fig = create_enhanced_3d_globe(df, indicator_code, year)
+    fig.update_layout(width=options['width'], height=options['height'])
+
+    results = []
+    for fmt, path in outputs:
+        tmp_path = f"{path}.tmp"
+        try:
+            if fmt == 'html':
+                plot_config = {'topojsonURL': f"{config.EXPORT_ASSETS_DIR}/"} if has_local_topojson else {}
+                fig.write_html(tmp_path, include_plotlyjs=f"{config.EXPORT_ASSETS_DIR}/plotly.min.js",
+                               full_html=True, config=plot_config)
+            else:
+                fig.write_image(tmp_path, format=fmt, scale=options['scale'], engine='kaleido')
+            os.replace(tmp_path, path)
+            results.append({'format': fmt, 'path': path, 'status': 'ok',
+                            'bytes': os.path.getsize(path),
+                            'seconds': round(time.perf_counter() - start, 2)})
+        except Exception as e:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            results.append({'format': fmt, 'path': path, 'status': 'error', 'error': str(e)})
+    return results
+
+def run_batch_export(indicators: List[str], years: List[str], formats: List[str],
+                     out_dir: str = config.EXPORT_DIR, workers: Optional[int] = None,
+                     width: int = config.CHART_WIDTH, height: int = config.CHART_HEIGHT,
+                     scale: float = 1.0, gap_fill: Optional[str] = None,
+                     force: bool = False, topojson_source: Optional[str] = None) -> Dict[str, int]:
+    """Export every (indicator, year, format), skipping outputs already up to date.
+
+    Returns counts of exported, skipped, empty and failed outputs.
+    """
+    from classification import CLASSIFICATION_METHODS, build_class_breaks
+
+    unsupported = set(formats) - set(config.EXPORT_FORMATS)
+    if unsupported:
+        raise ValueError(f"Unsupported export formats: {', '.join(sorted(unsupported))}")
+
+    os.makedirs(out_dir, exist_ok=True)
+    options = {'width': width, 'height': height, 'scale': scale, 'gap_fill': gap_fill,
+               'classification': config.GLOBE_CLASSIFICATION, 'classes': config.CLASSIFICATION_CLASSES}
+    manifest = load_manifest(out_dir)
+
+    # Group pending outputs by slice so each slice is loaded and rendered once
+    pending: Dict[Tuple[str, str], List[Tuple[str, str]]] = {}
+    keys: Dict[str, str] = {}
+    counts = {'exported': 0, 'skipped': 0, 'no-data': 0, 'failed': 0}
+    for indicator_code in indicators:
+        for year in years:
+            for fmt in formats:
+                filename = get_output_filename(indicator_code, year, fmt)
+                key = get_export_key(indicator_code, year, fmt, options)
+                entry = manifest.get(filename, {})
+                up_to_date = entry.get('key') == key and (
+                    entry.get('status') == 'no-data' or os.path.exists(os.path.join(out_dir, filename)))
+                if up_to_date and not force:
+                    counts['skipped'] += 1
+                    continue
+                keys[filename] = key
+                pending.setdefault((indicator_code, year), []).append(
+                    (fmt, os.path.join(out_dir, filename)))
+
+    total = sum(len(outputs) for outputs in pending.values())
+    print(f"Exporting {total} files ({counts['skipped']} already up to date) to {out_dir}/")
+    if not pending:
+        return counts
+
+    topojson_dir = prepare_bundle_assets(out_dir, topojson_source)
+    if config.GLOBE_CLASSIFICATION in CLASSIFICATION_METHODS:
+        # Built once on disk here, so workers read the breaks instead of each
+        # pooling every year of their indicators again
+        build_class_breaks()
+    start = time.perf_counter()
+
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                             initargs=(topojson_dir,)) as executor:
+        futures = {
+            executor.submit(_export_slice, indicator_code, year, outputs, options, topojson_dir is not None):
+                (indicator_code, year)
+            for (indicator_code, year), outputs in pending.items()
+        }
+        for future in as_completed(futures):
+            indicator_code, year = futures[future]
+            try:
+                results = future.result()
+            except Exception as e:
+                results = [{'format': fmt, 'path': path, 'status': 'error', 'error': str(e)}
+                           for fmt, path in pending[(indicator_code, year)]]
+
+            for result in results:
+                filename = os.path.basename(result['path'])
+                if result['status'] == 'error':
+                    counts['failed'] += 1
+                    manifest.pop(filename, None)
+                    print(f"  ❌ {filename}: {result['error']}")
+                    continue
+                counts['exported' if result['status'] == 'ok' else 'no-data'] += 1
+                manifest[filename] = {
+                    'key': keys[filename],
+                    'indicator': indicator_code,
+                    'year': year,
+                    'format': result['format'],
+                    'status': result['status'],
+                    'bytes': result.get('bytes', 0),
+                    'exported_at': time.strftime('%Y-%m-%dT%H:%M:%S')
+                }
+                label = f"{result['bytes']:,} bytes" if result['status'] == 'ok' else "no data"
+                print(f"  ✅ {filename} ({label})")
+
+            # Saved after every slice so an interrupted run can resume
+            save_manifest(out_dir, manifest)
+
+    print(f"Done in {time.perf_counter() - start:.1f}s: {counts['exported']} exported, "
+          f"{counts['skipped']} skipped, {counts['no-data']} without data, {counts['failed']} failed")
+    return counts
+
+def main():
+    """Main function for command line usage."""
+    parser = argparse.ArgumentParser(description="Batch export globe snapshots for many indicators and years")
+    parser.add_argument("--indicators", type=str, nargs='+',
+                       help="Indicator codes to export (e.g., NY.GDP.PCAP.CD SP.POP.TOTL)")
+    parser.add_argument("--popular", action="store_true",
+                       help="Export every popular indicator from config")
+    parser.add_argument("--years", type=str, nargs='+', default=[config.DEFAULT_YEAR],
+                       help="Years to export (default: 2023)")
+    parser.add_argument("--formats", choices=config.EXPORT_FORMATS, nargs='+', default=['png'],
+                       help="Output formats (default: png)")
+    parser.add_argument("--out", type=str, default=config.EXPORT_DIR,
+                       help=f"Bundle directory (default: {config.EXPORT_DIR})")
+    parser.add_argument("--workers", type=int, default=None,
+                       help="Worker processes (default: one per CPU)")
+    parser.add_argument("--width", type=int, default=config.CHART_WIDTH,
+                       help=f"Image width in pixels (default: {config.CHART_WIDTH})")
+    parser.add_argument("--height", type=int, default=config.CHART_HEIGHT,
+                       help=f"Image height in pixels (default: {config.CHART_HEIGHT})")
+    parser.add_argument("--scale", type=float, default=1.0,
+                       help="Scale factor for PNG output (default: 1.0)")
+    parser.add_argument("--gap-fill", choices=config.GAP_FILL_MODES, default=None,
+                       help="Fill countries without data from nearby years")
+    parser.add_argument("--topojson", type=str, default=None,
+                       help=f"Local copy of {TOPOJSON_FILENAME} to bundle instead of downloading it")
+    parser.add_argument("--force", action="store_true",
+                       help="Re-export even if outputs are up to date")
+
+    args = parser.parse_args()
+
+    indicators = list(config.POPULAR_INDICATORS.values()) if args.popular else args.indicators
+    if not indicators:
+        parser.error("either --indicators or --popular is required")
+
+    counts = run_batch_export(indicators, args.years, args.formats, args.out, args.workers,
+                              args.width, args.height, args.scale, args.gap_fill,
+                              args.force, args.topojson)
+    if counts['failed']:
+        raise SystemExit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,276 @@
+"""
+Choropleth classification with one scale per indicator across all years.
+
+Class breaks are computed from every country value of an indicator pooled
+over all years, so the colors of a country mean the same thing whichever year
+is shown. Methods:
+
+    quantile        equal numbers of values per class
+    equal_interval  classes of equal width
+    fisher_jenks    optimal natural breaks (least squared deviation within classes)
+
+Fisher-Jenks is the exact dynamic program, solved with divide and conquer on
+the monotone split points: O(k·n log n) instead of O(k·n²), with every level
+of the recursion evaluated as one vectorized NumPy step. Indicators spanning
+more than LOG_SCALE_RATIO are classified on log10 values.
+
+``build_class_breaks`` stores breaks for every indicator and method; the app
+builds them during warm-up, so rendering a globe only looks them up. An
+indicator missing from the table is classified from all its years on first
+use (one store read), and the result is cached for the data fingerprint.
+
+Usage:
+    python classification.py --build
+    python classification.py --indicator NY.GDP.PCAP.CD --method quantile --classes 5
+"""
+
+from __future__ import annotations
+
+import argparse
+import time
+from functools import lru_cache
+from typing import Dict, Optional, Tuple
+
+import config
+from startup import lazy_import
+
+pd = lazy_import('pandas')
+np = lazy_import('numpy')
+
+CLASSIFICATION_METHODS = ('fisher_jenks', 'quantile', 'equal_interval')
+
+CLASSIFICATION_LABELS = {
+    'fisher_jenks': 'Natural Breaks',
+    'quantile': 'Quantiles',
+    'equal_interval': 'Equal Intervals',
+    'continuous': 'Continuous'
+}
+
+# Positive indicators whose largest value exceeds the smallest this many times
+# are colored on a log scale
+LOG_SCALE_RATIO = 1000
+
+def quantile_breaks(values: np.ndarray, k: int) -> np.ndarray:
+    """Upper bounds of k classes holding equal numbers of values."""
+    return np.quantile(values, np.arange(1, k + 1) / k)
+
+def equal_interval_breaks(values: np.ndarray, k: int) -> np.ndarray:
+    """Upper bounds of k classes of equal width."""
+    low, high = values.min(), values.max()
+    return low + (high - low) * np.arange(1, k + 1) / k
+
+def fisher_jenks_breaks(values: np.ndarray, k: int) -> np.ndarray:
+    """Upper bounds of the k classes minimizing the squared deviation within classes."""
+    x = np.sort(values)
+    n = len(x)
+    if k >= n:
+        return np.unique(x)
+
+    # Standardized prefix sums give the squared deviation of any run x[i..j]
+    # in constant time without losing precision on large values
+    z = (x - x.mean()) / (x.std() or 1.0)
+    s1 = np.concatenate([[0.0], np.cumsum(z)])
+    s2 = np.concatenate([[0.0], np.cumsum(z * z)])
+
+    def deviation(i: np.ndarray, j: np.ndarray) -> np.ndarray:
+        total = s1[j + 1] - s1[i]
+        return s2[j + 1] - s2[i] - total * total / (j - i + 1)
+
+    cost = deviation(np.zeros(n, dtype=np.int64), np.arange(n))
+    class_starts = []
+    for c in range(1, k):
+        # cost[j] for c+1 classes over x[0..j] is min over the last class start
+        # i of previous[i-1] + deviation(i, j). The best i never decreases with
+        # j, so solving the middle j of a range bounds the search on both sides.
+        previous, cost = cost, np.full(n, np.inf)
+        starts = np.zeros(n, dtype=np.int64)
+        j_low, j_high = np.array([c]), np.array([n - 1])
+        i_low, i_high = np.array([c]), np.array([n - 1])
+        while len(j_low):
+            mid = (j_low + j_high) // 2
+            counts = np.minimum(i_high, mid) - i_low + 1
+            offsets = np.cumsum(counts) - counts
+            task = np.repeat(np.arange(len(mid)), counts)
+            i = np.repeat(i_low, counts) + np.arange(counts.sum()) - np.repeat(offsets, counts)
+            j = mid[task]
+            candidate = previous[i - 1] + deviation(i, j)
+
+            # First minimum of each task (lexsort is stable)
+            best = np.lexsort((candidate, task))[offsets]
+            best_i = i[best]
+            cost[mid] = candidate[best]
+            starts[mid] = best_i
+
+            left, right = j_low <= mid - 1, mid + 1 <= j_high
+            j_low, j_high, i_low, i_high = (
+                np.concatenate([j_low[left], mid[right] + 1]),
+                np.concatenate([mid[left] - 1, j_high[right]]),
+                np.concatenate([i_low[left], best_i[right]]),
+                np.concatenate([best_i[left], i_high[right]])
+            )
+        class_starts.append(starts)
+
+    upper = [x[n - 1]]
+    end = n - 1
+    for starts in reversed(class_starts):
+        end = starts[end] - 1
+        upper.append(x[end])
+    return np.array(upper[::-1])
+
+BREAK_FUNCTIONS = {
+    'fisher_jenks': fisher_jenks_breaks,
+    'quantile': quantile_breaks,
+    'equal_interval': equal_interval_breaks
+}
+
+def classify_values(values, method: str = 'fisher_jenks',
+                    k: int = config.CLASSIFICATION_CLASSES) -> Dict:
+    """Class breaks of a set of values.
+
+    Returns ``min`` and ``breaks`` (ascending class upper bounds, the last
+    being the maximum) in the units of the values, and ``log_scale``. Classes
+    may be fewer than k when values repeat.
+    """
+    values = np.asarray(values, dtype=np.float64)
+    values = values[np.isfinite(values)]
+    if values.size == 0:
+        return {'min': np.nan, 'breaks': np.array([]), 'log_scale': False}
+
+    low, high = values.min(), values.max()
+    log_scale = bool(low > 0 and high / low > LOG_SCALE_RATIO)
+    scaled = np.log10(values) if log_scale else values
+
+    # A regular sample of the sorted values bounds the cost of natural breaks
+    if method == 'fisher_jenks' and scaled.size > config.CLASSIFICATION_SAMPLE_SIZE:
+        scaled = np.sort(scaled)[np.linspace(0, scaled.size - 1, config.CLASSIFICATION_SAMPLE_SIZE).astype(int)]
+
+    breaks = BREAK_FUNCTIONS[method](scaled, k)
+    if log_scale:
+        breaks = 10.0 ** breaks
+    breaks = np.unique(np.minimum(breaks, high))
+    breaks[-1] = high
+    return {'min': low, 'breaks': breaks, 'log_scale': log_scale}
+
+def assign_classes(values, breaks: np.ndarray) -> np.ndarray:
+    """Class index of each value; classes include their upper bound."""
+    return np.searchsorted(breaks[:-1], np.asarray(values, dtype=np.float64), side='left')
+
+def format_break(value: float) -> str:
+    """Short label for a class bound (1.2K, 3.4M, 5.6B)."""
+    for divisor, suffix in ((1e12, 'T'), (1e9, 'B'), (1e6, 'M'), (1e3, 'K')):
+        if abs(value) >= divisor:
+            return f"{value / divisor:.3g}{suffix}"
+    return f"{value:.3g}"
+
+def class_labels(low: float, breaks: np.ndarray) -> list:
+    """Colorbar labels of the classes, e.g. '1.2K – 3.4K'."""
+    bounds = [low] + list(breaks)
+    return [f"{format_break(bounds[i])} – {format_break(bounds[i + 1])}" for i in range(len(breaks))]
+
+def build_class_breaks(force: bool = False, k: int = config.CLASSIFICATION_CLASSES) -> bool:
+    """Classify every indicator with every method, pooling all years, if out of date.
+
+    Breaks are stored for k classes and for the default number of classes.
+    """
+    from process_wb_data import get_data_fingerprint
+    from wdi_store import ensure_ingested, read_store, write_derived_table
+
+    class_counts = sorted({k, config.CLASSIFICATION_CLASSES})
+    stored_counts = {classes for _, _, classes in _load_class_breaks(get_data_fingerprint())}
+    if not force and stored_counts.issuperset(class_counts):
+        return True
+    if not ensure_ingested():
+        return False
+
+    print("Computing class breaks for every indicator in the WDI store...")
+    start = time.perf_counter()
+    values = read_store(columns=['IndicatorCode', 'IndicatorValue'])
+    rows = []
+    for code, group in values.groupby('IndicatorCode', sort=True)['IndicatorValue']:
+        for method in CLASSIFICATION_METHODS:
+            for classes in class_counts:
+                result = classify_values(group.to_numpy(), method, classes)
+                if result['breaks'].size:
+                    rows.append({'IndicatorCode': code, 'Method': method, 'Classes': classes,
+                                 'LogScale': result['log_scale'], 'Min': result['min'],
+                                 'Breaks': result['breaks'].tolist()})
+
+    path = write_derived_table(pd.DataFrame(rows), config.CLASSIFICATION_BREAKS_FILE)
+    _load_class_breaks.cache_clear()
+    print(f"Saved {len(rows):,} classifications to {path} in {time.perf_counter() - start:.1f}s")
+    return True
+
+@lru_cache(maxsize=1)
+def _load_class_breaks(fingerprint: str) -> Dict[Tuple[str, str, int], Dict]:
+    """The stored breaks keyed by (indicator, method, classes)."""
+    from wdi_store import is_derived_table_current, read_derived_table
+
+    if not is_derived_table_current(config.CLASSIFICATION_BREAKS_FILE, fingerprint):
+        return {}
+    table = read_derived_table(config.CLASSIFICATION_BREAKS_FILE)
+    return {
+        (row.IndicatorCode, row.Method, int(row.Classes)): {
+            'min': row.Min, 'breaks': np.asarray(row.Breaks, dtype=np.float64), 'log_scale': bool(row.LogScale)
+        }
+        for row in table.itertuples()
+    }
+
+@lru_cache(maxsize=256)
+def _classify_indicator(indicator_code: str, method: str, k: int, fingerprint: str) -> Optional[Dict]:
+    """Breaks of one indicator pooled over all years, from the store when it is current."""
+    from process_wb_data import load_indicator_time_series
+    from wdi_store import is_ingested, read_store
+
+    if is_ingested():
+        values = read_store(indicators=[indicator_code], columns=['IndicatorValue'])['IndicatorValue']
+    else:
+        ts_df = load_indicator_time_series(indicator_code)
+        values = ts_df['IndicatorValue'] if ts_df is not None else pd.Series(dtype=float)
+    if values.empty:
+        return None
+    return classify_values(values.to_numpy(), method, k)
+
+def get_class_breaks(indicator_code: str, method: str = 'fisher_jenks',
+                     k: int = config.CLASSIFICATION_CLASSES) -> Optional[Dict]:
+    """Breaks of an indicator over all years, from the stored table or computed once."""
+    from process_wb_data import get_data_fingerprint
+
+    fingerprint = get_data_fingerprint()
+    stored = _load_class_breaks(fingerprint).get((indicator_code, method, k))
+    return stored if stored is not None else _classify_indicator(indicator_code, method, k, fingerprint)
+
+def main():
+    """Main function for command line usage."""
+    parser = argparse.ArgumentParser(description="Choropleth class breaks for World Bank indicators across all years")
+    parser.add_argument("--build", action="store_true",
+                       help="Build (or rebuild with --force) the class breaks of every indicator")
+    parser.add_argument("--force", action="store_true",
+                       help="Rebuild even if the class breaks are up to date")
+    parser.add_argument("--indicator", type=str,
+                       help="World Bank indicator code: print its class breaks")
+    parser.add_argument("--method", choices=CLASSIFICATION_METHODS, default='fisher_jenks',
+                       help="Classification method (default: fisher_jenks)")
+    parser.add_argument("--classes", type=int, default=config.CLASSIFICATION_CLASSES,
+                       help=f"Number of classes (default: {config.CLASSIFICATION_CLASSES})")
+
+    args = parser.parse_args()
+
+    if args.build:
+        build_class_breaks(args.force, args.classes)
+
+    if args.indicator:
+        start = time.perf_counter()
+        result = get_class_breaks(args.indicator, args.method, args.classes)
+        if result is None:
+            print(f"No data for {args.indicator}")
+        else:
+            scale = "log scale" if result['log_scale'] else "linear scale"
+            print(f"{args.indicator} ({args.method}, {scale}, {time.perf_counter() - start:.3f}s):")
+            for i, label in enumerate(class_labels(result['min'], result['breaks']), 1):
+                print(f"  {i}. {label}")
+
+    if not (args.build or args.indicator):
+        parser.print_help()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,276 @@
+"""
+Two-indicator comparison globes built from a single data load.
+
+``load_indicator_pair`` reads both indicators for a year in one store query
+and joins them on ISO3. The joined frame feeds either two linked globes side
+by side (same geometry and styling, rotation kept in sync in the browser by
+``SYNC_ROTATION_JS``) or one bivariate globe colored by the terciles of both
+indicators.
+
+Usage:
+    python comparison.py --indicators NY.GDP.PCAP.CD SP.DYN.LE00.IN --year 2020 [--mode bivariate]
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+from typing import Optional
+
+import config
+from process_wb_data import get_indicator_info
+from startup import lazy_import
+
+pd = lazy_import('pandas')
+go = lazy_import('plotly.graph_objects')
+
+MODES = ('side-by-side', 'bivariate')
+
+PAIR_ID_COLUMNS = ['CountryCode', 'ISO3', 'CountryName']
+
+TERCILE_LABELS = ('low', 'mid', 'high')
+
+# Copies a globe's rotation to its linked globe whenever either is dragged.
+# Registered as a clientside callback on the graph's relayoutData.
+SYNC_ROTATION_JS = """
+function(relayoutData, figure) {
+    var noUpdate = window.dash_clientside.no_update;
+    if (!relayoutData || !figure || !figure.layout || !figure.layout.geo2) {
+        return noUpdate;
+    }
+    var source = null;
+    Object.keys(relayoutData).forEach(function(key) {
+        if (key.indexOf('geo.projection') === 0) { source = 'geo'; }
+        if (key.indexOf('geo2.projection') === 0) { source = 'geo2'; }
+    });
+    if (source === null) {
+        return noUpdate;
+    }
+    var target = source === 'geo' ? 'geo2' : 'geo';
+    var projection = JSON.parse(JSON.stringify(figure.layout[target].projection || {}));
+    projection.rotation = projection.rotation || {};
+    Object.keys(relayoutData).forEach(function(key) {
+        var prefix = source + '.projection.';
+        if (key.indexOf(prefix) !== 0) { return; }
+        var path = key.slice(prefix.length).split('.');
+        if (path[0] === 'rotation' && path.length === 2) {
+            projection.rotation[path[1]] = relayoutData[key];
+        } else if (path[0] === 'rotation') {
+            projection.rotation = Object.assign(projection.rotation, relayoutData[key]);
+        } else if (path[0] === 'scale') {
+            projection.scale = relayoutData[key];
+        }
+    });
+    var layout = Object.assign({}, figure.layout);
+    layout[target] = Object.assign({}, figure.layout[target], {projection: projection});
+    layout[source] = Object.assign({}, figure.layout[source], {projection: projection});
+    return Object.assign({}, figure, {layout: layout});
+}
+"""
+
+def _query_indicator_pair(indicator_x: str, indicator_y: str, year: str) -> pd.DataFrame:
+    """Both indicators for a year, one row per country (outer join on ISO3)."""
+    from process_wb_data import PROCESSED_COLUMNS, process_indicator_for_year
+    from wdi_store import is_ingested, read_store
+
+    if is_ingested():
+        long_df = read_store(indicators=[indicator_x, indicator_y], years=[int(year)],
+                             columns=['IndicatorCode'] + PROCESSED_COLUMNS)
+        pair = long_df.pivot_table(index=PAIR_ID_COLUMNS, columns='IndicatorCode',
+                                   values='IndicatorValue', aggfunc='first')
+        pair = pair.reindex(columns=[indicator_x, indicator_y]).reset_index()
+        pair.columns.name = None
+        return pair
+
+    # Without the store, fall back to the two cached slices
+    slices = []
+    for code in (indicator_x, indicator_y):
+        df = process_indicator_for_year(code, year)
+        if df is None:
+            df = pd.DataFrame(columns=PROCESSED_COLUMNS)
+        slices.append(df[PAIR_ID_COLUMNS + ['IndicatorValue']].rename(columns={'IndicatorValue': code}))
+    return slices[0].merge(slices[1], on=PAIR_ID_COLUMNS, how='outer')
+
+def load_indicator_pair(indicator_x: str, indicator_y: str, year: str,
+                        force_refresh: bool = False) -> Optional[pd.DataFrame]:
+    """Load two indicators for a year joined on ISO3, cached under one key.
+
+    Columns are CountryCode, ISO3, CountryName and one value column named
+    after each indicator code; a country missing one of them has NaN there.
+    """
+    from process_wb_data import ensure_data_dir, get_data_fingerprint
+
+    filename = config.PROCESSED_PAIR_FILE_TEMPLATE.format(
+        indicator_x=indicator_x.replace('.', '_'),
+        indicator_y=indicator_y.replace('.', '_'),
+        year=year,
+        fingerprint=get_data_fingerprint()
+    )
+    filepath = os.path.join(config.DATA_DIR, filename)
+
+    if not force_refresh and os.path.exists(filepath):
+        print(f"Loading cached indicator pair from {filepath}")
+        return pd.read_csv(filepath)
+
+    pair = _query_indicator_pair(indicator_x, indicator_y, year)
+    if pair.empty:
+        return None
+
+    ensure_data_dir()
+    pair.to_csv(filepath, index=False)
+    print(f"Saved {len(pair)} countries for {indicator_x} vs {indicator_y} ({year}) to {filepath}")
+    return pair
+
+def _pair_slice(pair: pd.DataFrame, indicator_code: str) -> pd.DataFrame:
+    """One indicator of a pair in the processed slice layout."""
+    df = pair[PAIR_ID_COLUMNS + [indicator_code]].dropna(subset=[indicator_code])
+    return df.rename(columns={indicator_code: 'IndicatorValue'}).reset_index(drop=True)
+
+def create_side_by_side_globes(pair: pd.DataFrame, indicator_x: str, indicator_y: str,
+                               year: str) -> go.Figure:
+    """Two linked globes, one per indicator, with identical geometry and styling."""
+    from plotly.subplots import make_subplots
+    from wb_globe import GLOBE_GEO_STYLE, create_enhanced_3d_globe
+
+    names = [get_indicator_info(code)['name'] for code in (indicator_x, indicator_y)]
+    fig = make_subplots(rows=1, cols=2, specs=[[{'type': 'geo'}, {'type': 'geo'}]],
+                        subplot_titles=names, horizontal_spacing=0.08)
+
+    for col, (code, colorbar_x) in enumerate([(indicator_x, 0.44), (indicator_y, 1.0)], 1):
+        df = _pair_slice(pair, code)
+        if df.empty:
+            continue
+        trace = create_enhanced_3d_globe(df, code, year).data[0]
+        trace.colorbar.update(x=colorbar_x, len=0.6, title=None)
+        fig.add_trace(trace, row=1, col=col)
+
+    fig.update_geos(**GLOBE_GEO_STYLE)
+    fig.update_annotations(font=dict(size=14, color='#ffffff'))
+    fig.update_layout(
+        title={
+            'text': f"🌍 {names[0]} vs {names[1]} ({year})",
+            'x': 0.5,
+            'xanchor': 'center',
+            'font': {'size': 18, 'color': '#ffffff', 'family': 'Arial Black'}
+        },
+        paper_bgcolor='rgba(10, 10, 20, 1)',
+        font=dict(color='white', family='Arial'),
+        margin=dict(l=0, r=40, t=100, b=0),
+        width=config.CHART_WIDTH,
+        height=config.CHART_HEIGHT * 3 // 4
+    )
+    return fig
+
+def classify_bivariate(pair: pd.DataFrame, indicator_x: str, indicator_y: str) -> pd.DataFrame:
+    """Countries with both values, with the tercile of each and a class 0-8.
+
+    ``BivariateClass`` is ``3 * y tercile + x tercile``, matching the layout
+    of ``config.BIVARIATE_COLORS``.
+    """
+    both = pair.dropna(subset=[indicator_x, indicator_y]).reset_index(drop=True)
+    if len(both) < 3:
+        return both.assign(XTercile=pd.Series(dtype=int), YTercile=pd.Series(dtype=int),
+                           BivariateClass=pd.Series(dtype=int))
+
+    # Ranking first keeps the terciles equal-sized when values tie
+    x_tercile = pd.qcut(both[indicator_x].rank(method='first'), 3, labels=False)
+    y_tercile = pd.qcut(both[indicator_y].rank(method='first'), 3, labels=False)
+    return both.assign(XTercile=x_tercile.astype(int), YTercile=y_tercile.astype(int),
+                       BivariateClass=(3 * y_tercile + x_tercile).astype(int))
+
+def create_bivariate_globe(pair: pd.DataFrame, indicator_x: str, indicator_y: str,
+                           year: str) -> go.Figure:
+    """One globe colored by the joint terciles of two indicators."""
+    from wb_globe import GLOBE_GEO_STYLE
+
+    classified = classify_bivariate(pair, indicator_x, indicator_y)
+    info_x, info_y = get_indicator_info(indicator_x), get_indicator_info(indicator_y)
+    if classified.empty:
+        print("Warning: No countries with data for both indicators")
+        return go.Figure()
+
+    colors = [color for row in config.BIVARIATE_COLORS for color in row]
+    colorscale = []
+    for i, color in enumerate(colors):
+        colorscale += [[i / len(colors), color], [(i + 1) / len(colors), color]]
+
+    tick_text = [f"X {TERCILE_LABELS[i % 3]} · Y {TERCILE_LABELS[i // 3]}" for i in range(len(colors))]
+
+    fig = go.Figure(go.Choropleth(
+        locations=classified['ISO3'],
+        z=classified['BivariateClass'],
+        zmin=-0.5,
+        zmax=len(colors) - 0.5,
+        text=classified['CountryName'],
+        customdata=classified[[indicator_x, indicator_y]],
+        hovertemplate=(
+            '<b>%{text}</b><br>' +
+            f"X: {info_x['name']}: %{{customdata[0]:,.2f}} {info_x['unit']}<br>" +
+            f"Y: {info_y['name']}: %{{customdata[1]:,.2f}} {info_y['unit']}<br>" +
+            'ISO Code: %{location}<br>' +
+            f'Year: {year}<br>' +
+            '<extra></extra>'
+        ),
+        colorscale=colorscale,
+        colorbar=dict(
+            title="Terciles",
+            tickvals=list(range(len(colors))),
+            ticktext=tick_text,
+            thickness=15,
+            len=0.7,
+            x=1.02
+        ),
+        marker_line_color='rgba(255,255,255,0.3)',
+        marker_line_width=0.5
+    ))
+
+    fig.update_layout(
+        title={
+            'text': f"🌍 {info_x['name']} (X) vs {info_y['name']} (Y), {year}<br>"
+                    f"<sub>{len(classified)} countries with both indicators</sub>",
+            'x': 0.5,
+            'xanchor': 'center',
+            'font': {'size': 18, 'color': '#ffffff', 'family': 'Arial Black'}
+        },
+        geo=GLOBE_GEO_STYLE,
+        paper_bgcolor='rgba(10, 10, 20, 1)',
+        font=dict(color='white', family='Arial'),
+        margin=dict(l=0, r=100, t=80, b=0),
+        width=config.CHART_WIDTH,
+        height=config.CHART_HEIGHT
+    )
+    return fig
+
+def create_comparison_figure(indicator_x: str, indicator_y: str, year: str,
+                             mode: str = 'side-by-side') -> Optional[go.Figure]:
+    """Load the pair once and build the requested comparison figure."""
+    if mode not in MODES:
+        raise ValueError(f"Unsupported comparison mode: {mode}")
+
+    pair = load_indicator_pair(indicator_x, indicator_y, year)
+    if pair is None:
+        return None
+    if mode == 'bivariate':
+        return create_bivariate_globe(pair, indicator_x, indicator_y, year)
+    return create_side_by_side_globes(pair, indicator_x, indicator_y, year)
+
+def main():
+    """Main function for command line usage."""
+    parser = argparse.ArgumentParser(description="Compare two World Bank indicators on linked or bivariate globes")
+    parser.add_argument("--indicators", type=str, nargs=2, required=True, metavar=("X", "Y"),
+                       help="Two indicator codes (e.g., NY.GDP.PCAP.CD SP.DYN.LE00.IN)")
+    parser.add_argument("--year", type=str, default=config.DEFAULT_YEAR,
+                       help="Year to compare (default: 2023)")
+    parser.add_argument("--mode", choices=MODES, default='side-by-side',
+                       help="Linked globes or one bivariate globe (default: side-by-side)")
+
+    args = parser.parse_args()
+
+    fig = create_comparison_figure(args.indicators[0], args.indicators[1], args.year, args.mode)
+    if fig is None:
+        print(f"No data available for {args.indicators[0]} or {args.indicators[1]} in {args.year}")
+        return
+    fig.show()
+
+if __name__ == "__main__":
+    main()
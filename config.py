@@ -1,4 +1,5 @@
 # Configuration for World Bank Indicators 3D Visualization
+import os
 
 # Data files configuration
 WDI_MAIN_DATA_FILE = "WDICSV.csv"
@@ -12,8 +13,112 @@ WDI_FOOTNOTE_FILE = "WDIfootnote.csv"
 DATA_DIR = "processed_data"
 
 # File templates for processed data
-PROCESSED_INDICATOR_FILE_TEMPLATE = "processed_{indicator_code}_{year}.csv"
-PROCESSED_SUMMARY_FILE_TEMPLATE = "summary_{indicator_code}.csv"
+PROCESSED_INDICATOR_FILE_TEMPLATE = "processed_{indicator_code}_{year}_{fingerprint}.csv"
+PROCESSED_TIMESERIES_FILE_TEMPLATE = "timeseries_{indicator_code}_{fingerprint}.csv"
+PROCESSED_GAP_FILLED_FILE_TEMPLATE = "processed_{indicator_code}_{year}_{mode}{window}_{fingerprint}.csv"
+
+# Gap filling for sparse indicators: use each country's most recent value
+# within GAP_FILL_WINDOW years, or interpolate linearly between observations
+GAP_FILL_MODES = ('latest', 'interpolate')
+GAP_FILL_WINDOW = 5
+
+# Columnar long-format store built by `python wdi_store.py --ingest`, with
+# summary statistics for every (indicator, year)
+WDI_STORE_FILE = "wdi_long.parquet"
+WDI_STORE_META_FILE = "wdi_store.json"
+SUMMARY_STATS_FILE = "summary_stats.parquet"
+SUMMARY_EXTREMES_FILE = "summary_extremes.parquet"
+STORE_ROW_GROUP_SIZE = 50000
+
+# Cross-indicator correlations (cached per data fingerprint)
+PROCESSED_CORRELATION_FILE_TEMPLATE = "correlations_{indicator_code}_{year}_{method}_n{min_overlap}_{fingerprint}.csv"
+MIN_CORRELATION_OVERLAP = 20  # countries with data for both indicators
+CORRELATION_RESULTS_LIMIT = 10
+
+# Dense ranks and percentiles for every (indicator, year), built from the store
+RANKINGS_FILE = "rankings.parquet"
+
+# Globe color classes (classification.py), shared by all years of an
+# indicator: 'fisher_jenks', 'quantile', 'equal_interval', or 'continuous'
+# for an unclassified scale over the indicator's full range
+GLOBE_CLASSIFICATION = os.environ.get("WDI_GLOBE_CLASSIFICATION", "fisher_jenks")
+CLASSIFICATION_CLASSES = 7
+CLASSIFICATION_SAMPLE_SIZE = 5000  # sorted values sampled for natural breaks
+CLASSIFICATION_BREAKS_FILE = "class_breaks.parquet"
+
+# Catalog-wide anomaly scan (anomalies.py): values whose robust z-score
+# exceeds the threshold on any check are flagged; series and cross-sections
+# need ANOMALY_MIN_OBSERVATIONS values to be scored
+ANOMALY_REPORT_FILE = "anomalies.parquet"
+ANOMALY_Z_THRESHOLD = 6.0
+ANOMALY_MIN_OBSERVATIONS = 8
+
+# Growth rates and changes (derived_metrics.py), materialized for the popular
+# indicators over these periods and gap tolerances (years an end point may
+# fall back to an earlier observation); other metrics are derived on the fly
+DERIVED_METRICS_FILE = "derived_metrics.parquet"
+DERIVED_METRIC_PERIODS = (5, 10)
+DERIVED_METRIC_TOLERANCES = (0, GAP_FILL_WINDOW)
+
+# Nowcasts (nowcast.py): trends fitted to each country's last
+# NOWCAST_OBSERVATIONS values (at least NOWCAST_MIN_OBSERVATIONS) and
+# projected at most NOWCAST_MAX_HORIZON years past its latest observation
+NOWCAST_FITS_FILE = "nowcast_fits.parquet"
+NOWCAST_METHOD = "theil_sen"  # or 'linear'
+NOWCAST_OBSERVATIONS = 5
+NOWCAST_MIN_OBSERVATIONS = 3
+NOWCAST_MAX_HORIZON = 3
+
+# Versioned store of WDI releases (wdi_vintages.py) inside DATA_DIR: one
+# content-addressed block per indicator and span of VINTAGE_BLOCK_YEARS years,
+# shared by every release that did not revise it, and a manifest per release
+VINTAGE_DIR = "vintages"
+VINTAGE_BLOCK_YEARS = 10
+
+# Footnotes (country, series, year) and country-series notes (country, series),
+# built on first use from WDIfootnote.csv and WDIcountry-series.csv
+FOOTNOTES_FILE = "footnotes.parquet"
+COUNTRY_SERIES_NOTES_FILE = "country_series_notes.parquet"
+HOVER_NOTE_LENGTH = 120  # characters of a footnote shown on hover
+
+# Full WDISeries.csv records and WDIseries-time.csv notes, indexed by series code
+SERIES_METADATA_FILE = "series_metadata.parquet"
+SERIES_TIME_FILE = "series_time_notes.parquet"
+
+# Asyncio JSON API next to the Dash app (api_service.py): worker pool size,
+# running plus waiting jobs before requests get 503, items per batch request
+API_SERVICE_PORT = 8060
+API_WORKERS = 4
+API_MAX_PENDING = 64
+API_MAX_BATCH = 100
+API_REQUEST_TIMEOUT = 60  # seconds
+
+# Rows per record batch of the Arrow IPC bulk export (arrow_export.py)
+ARROW_EXPORT_BATCH_SIZE = 65536
+
+# WDICountry.csv records for SQL queries (wdi_sql.py), built on first use
+COUNTRY_METADATA_FILE = "country_metadata.parquet"
+
+# Two indicators joined on ISO3 for comparison globes (cached per data fingerprint)
+PROCESSED_PAIR_FILE_TEMPLATE = "pair_{indicator_x}_{indicator_y}_{year}_{fingerprint}.csv"
+
+# Batch export of globe snapshots (batch_export.py). Bundles share one copy
+# of plotly.js and of the world geometry under EXPORT_ASSETS_DIR.
+EXPORT_DIR = "exports"
+EXPORT_ASSETS_DIR = "assets"
+EXPORT_FORMATS = ('png', 'svg', 'html')
+EXPORT_MANIFEST_FILE = "manifest.json"
+TOPOJSON_URL = "https://cdn.plot.ly/world_110m.json"
+
+# 3x3 bivariate palette: rows are the y tercile (low to high), columns the x tercile
+BIVARIATE_COLORS = [
+    ['#e8e8e8', '#e4acac', '#c85a5a'],
+    ['#b0d5df', '#ad9ea5', '#985356'],
+    ['#64acbe', '#627f8c', '#574249']
+]
+
+# Rows per chunk when streaming the main data file
+CSV_CHUNK_SIZE = 100000
 
 # GeoJSON URL for country boundaries
 GEOJSON_URL = "https://raw.githubusercontent.com/johan/world.geo.json/master/countries.geo.json"
@@ -68,15 +173,90 @@ INDICATOR_CATEGORIES = {
 
 # Regional aggregates to exclude from country-specific visualizations
 REGIONAL_AGGREGATES = [
-    'AFE', 'AFG', 'AFW', 'ARB', 'CEB', 'CSS', 'EAP', 'EAR', 'EAS', 'ECA', 'ECS', 'EUU',
+    'AFE', 'AFW', 'ARB', 'CEB', 'CSS', 'EAP', 'EAR', 'EAS', 'ECA', 'ECS', 'EUU',
     'FCS', 'HIC', 'HPC', 'IBD', 'IBT', 'IDA', 'IDB', 'IDX', 'LCN', 'LDC', 'LIC', 'LMC',
     'LMY', 'LTE', 'MEA', 'MIC', 'MNA', 'NAC', 'OED', 'OSS', 'PRE', 'PSS', 'PST', 'SAS',
     'SSA', 'SSF', 'SST', 'TEA', 'TEC', 'TLA', 'TMN', 'TSA', 'TSS', 'UMC', 'WLD'
 ]
 
+# World Bank aggregate codes of the WDICountry.csv region and income group names
+REGION_AGGREGATE_CODES = {
+    'East Asia & Pacific': 'EAS',
+    'Europe & Central Asia': 'ECS',
+    'Latin America & Caribbean': 'LCN',
+    'Middle East & North Africa': 'MEA',
+    'Middle East, North Africa, Afghanistan & Pakistan': 'MEA',
+    'North America': 'NAC',
+    'South Asia': 'SAS',
+    'Sub-Saharan Africa': 'SSF'
+}
+INCOME_GROUP_AGGREGATE_CODES = {
+    'High income': 'HIC',
+    'Upper middle income': 'UMC',
+    'Lower middle income': 'LMC',
+    'Low income': 'LIC'
+}
+WORLD_AGGREGATE_CODE = 'WLD'
+
+# Indicators that can weight computed regional aggregates
+AGGREGATE_WEIGHTS = {
+    'population': 'SP.POP.TOTL',
+    'gdp': 'NY.GDP.MKTP.CD'
+}
+DEFAULT_AGGREGATE_WEIGHT = 'population'
+PROCESSED_AGGREGATES_FILE_TEMPLATE = "aggregates_{indicator_code}_{weight}_{how}_{fingerprint}.csv"
+
+# Bump when country or aggregate handling changes, so every cache keyed on
+# the data fingerprint is rebuilt
+DATA_PROCESSING_VERSION = 2
+
+# Maximum number of indicator search results returned per keystroke
+SEARCH_RESULT_LIMIT = 50
+
+# Startup behaviour: warm caches in a background thread and optionally print
+# a report of import/load timings once warm-up finishes
+WARM_UP_ON_START = os.environ.get("WDI_WARM_UP", "1") != "0"
+STARTUP_REPORT = os.environ.get("WDI_STARTUP_REPORT", "0") == "1"
+
 # Minimum data points required for visualization
 MIN_DATA_POINTS = 5
 
+# Compact figure encoding: round values to what the hover text shows and send
+# arrays as binary typed arrays (enable in the apps with WDI_COMPACT_FIGURES=1)
+COMPACT_FIGURES = os.environ.get("WDI_COMPACT_FIGURES", "0") == "1"
+HOVER_DECIMALS = 2
+COMPACT_SIGNIFICANT_DIGITS = 4  # digits of the value range kept for colors
+LOG_SCALE_DECIMALS = 4
+
+# HTTP caching and compression for the Dash server
+HTTP_CACHE_MAX_AGE = 300  # seconds a client may reuse a response before revalidating
+COMPRESSION_MIN_SIZE = 1024  # bytes; smaller responses are sent uncompressed
+COMPRESSION_LEVEL = 6
+COMPRESSIBLE_MIMETYPES = [
+    "application/json", "application/javascript", "text/html",
+    "text/css", "text/plain", "text/javascript"
+]
+
+# On-demand profiling (profiling.py), off by default: profile every request or
+# CLI run with WDI_PROFILE=1, a random share of requests with WDI_PROFILE_RATE,
+# or requests sending PROFILE_HEADER when WDI_PROFILE_HEADER=1
+PROFILE_ENABLED = os.environ.get("WDI_PROFILE", "0") == "1"
+PROFILE_RATE = float(os.environ.get("WDI_PROFILE_RATE", "0"))
+PROFILE_HEADER_ENABLED = os.environ.get("WDI_PROFILE_HEADER", "0") == "1"
+PROFILE_HEADER = "X-WDI-Profile"
+PROFILE_MODE = os.environ.get("WDI_PROFILE_MODE", "sample")  # 'sample' or 'trace'
+PROFILE_FORMAT = os.environ.get("WDI_PROFILE_FORMAT", "speedscope")  # or 'collapsed'
+PROFILE_INTERVAL = 0.001  # seconds between stack samples
+PROFILE_DIR = "profiles"
+
+# Default baseline file of load_test.py (--save-baseline / --compare)
+LOAD_TEST_BASELINE_FILE = "load_test_baseline.json"
+
+# Most values synthetic_data.py generates at once: blocks hold at most 10
+# countries and fewer when they would exceed this, and a single country above
+# it is generated a chunk of indicators at a time
+SYNTHETIC_BLOCK_VALUES = 10_000_000
+
 # Chart dimensions
 CHART_WIDTH = 1200
 CHART_HEIGHT = 800
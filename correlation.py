@@ -0,0 +1,211 @@
+"""
+Cross-indicator correlation engine over the WDI store.
+
+For a given year the store is pivoted once into a country x indicator matrix,
+and the correlation of one indicator against every other column is computed
+as a single masked matrix operation. Each pair uses only the countries with
+data for both indicators (pairwise-complete), and pairs with fewer than
+``min_overlap`` such countries are dropped.
+
+Usage:
+    python correlation.py --indicator NY.GDP.PCAP.CD --year 2020 [--method spearman]
+    python correlation.py --indicators NY.GDP.PCAP.CD SP.DYN.LE00.IN IT.NET.USER.ZS --year 2020
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+from functools import lru_cache
+from typing import List, Optional
+
+import config
+from startup import lazy_import
+
+pd = lazy_import('pandas')
+np = lazy_import('numpy')
+
+METHODS = ('pearson', 'spearman')
+
+RESULT_COLUMNS = ['IndicatorCode', 'Correlation', 'Overlap']
+
+@lru_cache(maxsize=4)
+def _load_year_matrix(year: int, fingerprint: str) -> pd.DataFrame:
+    """Country x indicator matrix for one year (cached per data fingerprint)."""
+    from wdi_store import read_store
+
+    long_df = read_store(years=[year], columns=['IndicatorCode', 'ISO3', 'IndicatorValue'])
+    return long_df.pivot_table(index='ISO3', columns='IndicatorCode',
+                               values='IndicatorValue', aggfunc='first')
+
+def get_year_matrix(year: str, indicators: Optional[List[str]] = None) -> pd.DataFrame:
+    """Return the country x indicator matrix for a year, optionally restricted.
+
+    The matrix is empty while the WDI store is not built.
+    """
+    from process_wb_data import get_data_fingerprint
+    from wdi_store import is_ingested
+
+    if not is_ingested():
+        return pd.DataFrame()
+    matrix = _load_year_matrix(int(year), get_data_fingerprint())
+    if indicators is not None:
+        matrix = matrix[[code for code in indicators if code in matrix.columns]]
+    return matrix
+
+def _masked_pearson(target: np.ndarray, others: np.ndarray, mask: np.ndarray) -> np.ndarray:
+    """Column-wise Pearson r between ``target`` and ``others`` over ``mask``.
+
+    ``target`` is either a single column (broadcast against every column of
+    ``others``) or a matrix of the same shape.
+    """
+    target = np.broadcast_to(target, others.shape)
+    counts = mask.sum(axis=0)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        target_mean = np.where(mask, target, 0.0).sum(axis=0) / counts
+        other_mean = np.where(mask, others, 0.0).sum(axis=0) / counts
+
+        # Centre before multiplying to avoid cancellation on large values
+        target_dev = np.where(mask, target - target_mean, 0.0)
+        other_dev = np.where(mask, others - other_mean, 0.0)
+        covariance = (target_dev * other_dev).sum(axis=0)
+        scale = np.sqrt((target_dev ** 2).sum(axis=0) * (other_dev ** 2).sum(axis=0))
+        return covariance / scale
+
+def compute_correlations(indicator_code: str, year: str, method: str = 'pearson',
+                         indicators: Optional[List[str]] = None,
+                         min_overlap: int = config.MIN_CORRELATION_OVERLAP) -> pd.DataFrame:
+    """Correlate one indicator against all others (or a chosen set) across countries.
+
+    Returns IndicatorCode, Correlation and Overlap (number of countries used),
+    sorted by absolute correlation. Spearman ranks each pair over its own
+    overlapping countries, so its values are exact pairwise-complete results.
+    """
+    if method not in METHODS:
+        raise ValueError(f"Unsupported correlation method: {method}")
+
+    matrix = get_year_matrix(year)
+    if indicator_code not in matrix.columns:
+        return pd.DataFrame(columns=RESULT_COLUMNS)
+
+    candidates = matrix.drop(columns=indicator_code)
+    if indicators is not None:
+        candidates = candidates[[code for code in indicators if code in candidates.columns]]
+    if candidates.empty:
+        return pd.DataFrame(columns=RESULT_COLUMNS)
+
+    target = matrix[indicator_code].to_numpy(dtype=float)[:, None]
+    others = candidates.to_numpy(dtype=float)
+    mask = ~np.isnan(others) & ~np.isnan(target)
+
+    if method == 'spearman':
+        # Rank both sides within each pair's overlap, then correlate the ranks
+        target = pd.DataFrame(np.where(mask, target, np.nan)).rank(axis=0).to_numpy()
+        others = pd.DataFrame(np.where(mask, others, np.nan)).rank(axis=0).to_numpy()
+
+    result = pd.DataFrame({
+        'IndicatorCode': candidates.columns,
+        'Correlation': _masked_pearson(target, others, mask),
+        'Overlap': mask.sum(axis=0)
+    })
+    result = result[(result['Overlap'] >= min_overlap) & result['Correlation'].notna()]
+    result = result.reindex(result['Correlation'].abs().sort_values(ascending=False).index)
+    return result.reset_index(drop=True)
+
+def correlate_with(indicator_code: str, year: str, method: str = 'pearson',
+                   indicators: Optional[List[str]] = None,
+                   min_overlap: int = config.MIN_CORRELATION_OVERLAP,
+                   force_refresh: bool = False) -> pd.DataFrame:
+    """Correlations of one indicator against the catalog, with file caching.
+
+    Full-catalog results are cached per (indicator, year, method, overlap,
+    data fingerprint); a chosen ``indicators`` set is computed directly, as
+    it only touches a few columns.
+    """
+    if indicators is not None:
+        return compute_correlations(indicator_code, year, method, indicators, min_overlap)
+
+    from process_wb_data import ensure_data_dir, get_data_fingerprint
+
+    filename = config.PROCESSED_CORRELATION_FILE_TEMPLATE.format(
+        indicator_code=indicator_code.replace('.', '_'),
+        year=year,
+        method=method,
+        min_overlap=min_overlap,
+        fingerprint=get_data_fingerprint()
+    )
+    filepath = os.path.join(config.DATA_DIR, filename)
+
+    if not force_refresh and os.path.exists(filepath):
+        print(f"Loading cached correlations from {filepath}")
+        return pd.read_csv(filepath)
+
+    result = compute_correlations(indicator_code, year, method, None, min_overlap)
+    if result.empty:
+        return result
+    ensure_data_dir()
+    result.to_csv(filepath, index=False)
+    print(f"Saved {len(result)} correlations to {filepath}")
+    return result
+
+def correlation_matrix(indicators: List[str], year: str, method: str = 'pearson',
+                       min_overlap: int = config.MIN_CORRELATION_OVERLAP) -> pd.DataFrame:
+    """Pairwise-complete correlation matrix for a chosen set of indicators."""
+    if method not in METHODS:
+        raise ValueError(f"Unsupported correlation method: {method}")
+    return get_year_matrix(year, indicators).corr(method=method, min_periods=min_overlap)
+
+def add_indicator_names(result: pd.DataFrame) -> pd.DataFrame:
+    """Attach indicator names from the in-memory search index."""
+    from indicator_search import get_search_index
+
+    index = get_search_index()
+    result = result.copy()
+    result['IndicatorName'] = [
+        (index.get(code) or {}).get('name') or code for code in result['IndicatorCode']
+    ]
+    return result
+
+def main():
+    """Main function for command line usage."""
+    from wdi_store import ensure_ingested
+
+    parser = argparse.ArgumentParser(description="Correlate World Bank indicators across countries")
+    parser.add_argument("--indicator", type=str,
+                       help="Indicator to correlate against the catalog (e.g., NY.GDP.PCAP.CD)")
+    parser.add_argument("--indicators", type=str, nargs='+',
+                       help="Restrict to these indicators (with --indicator), or print their matrix")
+    parser.add_argument("--year", type=str, default=config.DEFAULT_YEAR,
+                       help="Year to correlate (default: 2023)")
+    parser.add_argument("--method", choices=METHODS, default='pearson',
+                       help="Correlation method (default: pearson)")
+    parser.add_argument("--min-overlap", type=int, default=config.MIN_CORRELATION_OVERLAP,
+                       help=f"Minimum countries with both values (default: {config.MIN_CORRELATION_OVERLAP})")
+    parser.add_argument("--top", type=int, default=20,
+                       help="Number of results to print (default: 20)")
+    parser.add_argument("--force", action="store_true",
+                       help="Recompute instead of using cached results")
+
+    args = parser.parse_args()
+    ensure_ingested()
+
+    if not args.indicator:
+        if not args.indicators:
+            parser.error("either --indicator or --indicators is required")
+        print(correlation_matrix(args.indicators, args.year, args.method, args.min_overlap).round(3))
+        return
+
+    result = correlate_with(args.indicator, args.year, args.method, args.indicators,
+                            args.min_overlap, args.force)
+    if result.empty:
+        print(f"No correlations found for {args.indicator} in {args.year}")
+        return
+
+    result = add_indicator_names(result.head(args.top))
+    print(f"\nTop {len(result)} {args.method} correlations with {args.indicator} ({args.year}):")
+    print("-" * 80)
+    for i, row in enumerate(result.itertuples(), 1):
+        print(f"{i:2d}. {row.Correlation:+.3f}  (n={row.Overlap:<3d}) {row.IndicatorName[:55]} ({row.IndicatorCode})")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,268 @@
+"""
+Growth rates and changes between years for all countries at once.
+
+Metrics (``IndicatorValue`` of the result is the metric):
+
+    yoy         percent change from the previous year
+    change      absolute change over N years
+    pct_change  percent change over N years
+    cagr        compound annual growth rate over N years, in percent
+
+A metric is named by a spec: ``'yoy'``, ``'cagr:5'`` (5-year CAGR ending in
+each year) or ``'pct_change:since2000'`` (from a fixed base year). ``'value'``
+is the indicator itself.
+
+Gaps are explicit: each end point is the country's value in that year or,
+with ``tolerance`` > 0, its latest observation at most that many years
+earlier. ``StartYear`` and ``EndYear`` record the years actually used and CAGR
+is annualized over them; countries without both end points are left out.
+Percent changes are relative to the absolute start value, and CAGR needs
+positive values at both ends.
+
+Metrics are computed from the indicator x country value cube in a few array
+operations. The popular indicators are materialized for every year, period in
+DERIVED_METRIC_PERIODS and tolerance in DERIVED_METRIC_TOLERANCES (by --build
+or the app's warm-up); anything else, or anything requested before the table
+is current, is derived on the fly from the indicator's time series.
+
+Usage:
+    python derived_metrics.py --build
+    python derived_metrics.py --indicator NY.GDP.PCAP.CD --year 2020 --metric cagr:10
+    python derived_metrics.py --indicator SP.POP.TOTL --year 2023 --metric pct_change:since2000 --tolerance 3
+"""
+
+from __future__ import annotations
+
+import argparse
+import time
+from functools import lru_cache
+from typing import List, Optional, Tuple
+
+import config
+from startup import lazy_import
+
+pd = lazy_import('pandas')
+np = lazy_import('numpy')
+
+DERIVED_METRICS = ('yoy', 'change', 'pct_change', 'cagr')
+
+METRIC_LABELS = {
+    'yoy': "Change from previous year",
+    'change': "Change",
+    'pct_change': "Change",
+    'cagr': "Compound annual growth"
+}
+
+SLICE_COLUMNS = ['CountryCode', 'ISO3', 'CountryName', 'IndicatorValue', 'Year',
+                 'StartYear', 'StartValue', 'EndYear', 'EndValue']
+
+def parse_metric(spec: str) -> Tuple[str, Optional[int], Optional[int]]:
+    """Split a metric spec into (metric, period, base_year).
+
+    >>> parse_metric('cagr:5'), parse_metric('pct_change:since2000'), parse_metric('yoy')
+    (('cagr', 5, None), ('pct_change', None, 2000), ('yoy', 1, None))
+    """
+    metric, _, argument = spec.partition(':')
+    if metric == 'value':
+        return metric, None, None
+    if metric not in DERIVED_METRICS:
+        raise ValueError(f"Unsupported metric: {metric}")
+    if metric == 'yoy':
+        return metric, 1, None
+    if argument.startswith('since'):
+        return metric, None, int(argument[len('since'):])
+    if not argument.isdigit() or int(argument) < 1:
+        raise ValueError(f"Metric '{spec}' needs a period (e.g. {metric}:5) or a base year ({metric}:since2000)")
+    return metric, int(argument), None
+
+def describe_metric(spec: str) -> Tuple[str, bool]:
+    """Title prefix of a metric and whether it is a percentage."""
+    metric, period, base_year = parse_metric(spec)
+    if metric in ('value', 'yoy'):
+        return ('' if metric == 'value' else METRIC_LABELS[metric]), metric == 'yoy'
+    span = f"since {base_year}" if base_year is not None else f"over {period} years"
+    return f"{METRIC_LABELS[metric]} {span}", metric != 'change'
+
+def _value_cube(long_df: pd.DataFrame, tolerance: int):
+    """Values and their source years as (series x year) arrays, forward-filled up to ``tolerance`` years."""
+    keys = [column for column in ('IndicatorCode', 'CountryCode', 'ISO3', 'CountryName') if column in long_df.columns]
+    wide = long_df.pivot_table(index=keys, columns='Year', values='IndicatorValue', aggfunc='first')
+    years = np.arange(wide.columns.min(), wide.columns.max() + 1)
+    wide = wide.reindex(columns=years)
+
+    source = pd.DataFrame(np.where(wide.notna(), years, np.nan), index=wide.index, columns=years)
+    if tolerance:
+        wide = wide.ffill(axis=1, limit=tolerance)
+        source = source.ffill(axis=1, limit=tolerance)
+    return wide.index, years, wide.to_numpy(), source.to_numpy()
+
+def derive_metric(long_df: pd.DataFrame, metric: str, period: Optional[int] = None,
+                  base_year: Optional[int] = None, tolerance: int = 0,
+                  end_years: Optional[List[int]] = None) -> pd.DataFrame:
+    """Compute a metric for every series and end year of a long-format frame.
+
+    ``long_df`` has ``Year`` and ``IndicatorValue`` plus any of
+    ``IndicatorCode``, ``CountryCode``, ``ISO3``, ``CountryName``, which are
+    kept in the result. Pass ``period`` for changes over N years or
+    ``base_year`` for changes from a fixed year; ``end_years`` restricts the
+    years computed.
+    """
+    index, years, values, source = _value_cube(long_df, tolerance)
+
+    if base_year is not None:
+        if base_year not in years:
+            return pd.DataFrame(columns=list(index.names) + SLICE_COLUMNS[3:])
+        column = int(np.searchsorted(years, base_year))
+        start_value = np.repeat(values[:, [column]], len(years), axis=1)
+        start_year = np.repeat(source[:, [column]], len(years), axis=1)
+        start_value[:, :column + 1] = np.nan
+    else:
+        start_value = np.full(values.shape, np.nan)
+        start_year = np.full(values.shape, np.nan)
+        start_value[:, period:] = values[:, :-period]
+        start_year[:, period:] = source[:, :-period]
+
+    if end_years is not None:
+        columns = np.searchsorted(years, [year for year in end_years if years[0] <= year <= years[-1]])
+        years, values, source = years[columns], values[:, columns], source[:, columns]
+        start_value, start_year = start_value[:, columns], start_year[:, columns]
+
+    elapsed = source - start_year
+    with np.errstate(divide='ignore', invalid='ignore'):
+        if metric == 'change':
+            result = values - start_value
+        elif metric in ('yoy', 'pct_change'):
+            result = 100 * (values - start_value) / np.abs(start_value)
+        else:
+            valid = (values > 0) & (start_value > 0)
+            result = np.where(valid, 100 * (np.power(values / start_value, 1 / elapsed) - 1), np.nan)
+    # Both end points filled from the same observation say nothing about change
+    result[~(elapsed > 0) | ~np.isfinite(result)] = np.nan
+
+    rows, columns = np.nonzero(~np.isnan(result))
+    derived = index[rows].to_frame(index=False)
+    derived['IndicatorValue'] = result[rows, columns]
+    derived['Year'] = years[columns].astype(int)
+    derived['StartYear'] = start_year[rows, columns].astype(int)
+    derived['StartValue'] = start_value[rows, columns]
+    derived['EndYear'] = source[rows, columns].astype(int)
+    derived['EndValue'] = values[rows, columns]
+    return derived
+
+def get_materialized_specs() -> List[str]:
+    """Metric specs stored for the popular indicators."""
+    return ['yoy'] + [f"{metric}:{period}" for period in config.DERIVED_METRIC_PERIODS
+                      for metric in ('change', 'pct_change', 'cagr')]
+
+def build_derived_metrics(force: bool = False) -> bool:
+    """Materialize the derived metrics of the popular indicators if out of date."""
+    from wdi_store import ensure_ingested, is_derived_table_current, read_store, write_derived_table
+
+    if not force and is_derived_table_current(config.DERIVED_METRICS_FILE):
+        return True
+    if not ensure_ingested():
+        return False
+
+    print("Deriving growth rates and changes for the popular indicators...")
+    start = time.perf_counter()
+    long_df = read_store(indicators=list(config.POPULAR_INDICATORS.values()),
+                         columns=['IndicatorCode', 'CountryCode', 'ISO3', 'CountryName', 'Year', 'IndicatorValue'])
+    tables = []
+    for tolerance in config.DERIVED_METRIC_TOLERANCES:
+        for spec in get_materialized_specs():
+            metric, period, _ = parse_metric(spec)
+            derived = derive_metric(long_df, metric, period, tolerance=tolerance)
+            derived.insert(1, 'Metric', spec)
+            derived.insert(2, 'Tolerance', tolerance)
+            tables.append(derived)
+
+    derived = pd.concat(tables, ignore_index=True)
+    derived = derived.sort_values(['IndicatorCode', 'Metric', 'Tolerance', 'Year', 'CountryCode'])
+    path = write_derived_table(derived.reset_index(drop=True), config.DERIVED_METRICS_FILE)
+    _load_materialized_metric.cache_clear()
+    print(f"Saved {len(derived):,} derived values to {path} in {time.perf_counter() - start:.1f}s")
+    return True
+
+@lru_cache(maxsize=32)
+def _load_materialized_metric(indicator_code: str, spec: str, tolerance: int, fingerprint: str) -> pd.DataFrame:
+    """All years of one materialized metric of an indicator."""
+    from wdi_store import read_derived_table
+
+    return read_derived_table(config.DERIVED_METRICS_FILE, filters=[
+        ('IndicatorCode', '==', indicator_code), ('Metric', '==', spec), ('Tolerance', '==', tolerance)
+    ], columns=SLICE_COLUMNS)
+
+def get_metric_slice(indicator_code: str, year: str, spec: str,
+                     tolerance: int = 0) -> Optional[pd.DataFrame]:
+    """A metric for all countries in one end year, shaped like a processed slice."""
+    from process_wb_data import get_data_fingerprint, load_indicator_time_series, process_indicator_for_year
+    from wdi_store import is_derived_table_current
+
+    metric, period, base_year = parse_metric(spec)
+    if metric == 'value':
+        return process_indicator_for_year(indicator_code, year)
+
+    materialized = (indicator_code in config.POPULAR_INDICATORS.values() and spec in get_materialized_specs()
+                    and tolerance in config.DERIVED_METRIC_TOLERANCES)
+    if materialized and is_derived_table_current(config.DERIVED_METRICS_FILE):
+        derived = _load_materialized_metric(indicator_code, spec, tolerance, get_data_fingerprint())
+        derived = derived[derived['Year'] == int(year)]
+    else:
+        ts_df = load_indicator_time_series(indicator_code)
+        if ts_df is None or ts_df.empty:
+            return None
+        derived = derive_metric(ts_df, metric, period, base_year, tolerance, end_years=[int(year)])
+
+    if derived.empty:
+        return None
+    return derived[SLICE_COLUMNS].sort_values('IndicatorValue', ascending=False).reset_index(drop=True)
+
+def describe_metric_years(df: pd.DataFrame) -> pd.Series:
+    """Hover lines with the end points of each derived value."""
+    return ('From ' + df['StartValue'].map('{:,.2f}'.format) + ' (' + df['StartYear'].astype(str) + ') to ' +
+            df['EndValue'].map('{:,.2f}'.format) + ' (' + df['EndYear'].astype(str) + ')')
+
+def main():
+    """Main function for command line usage."""
+    parser = argparse.ArgumentParser(description="Growth rates, changes and CAGR for World Bank indicators")
+    parser.add_argument("--build", action="store_true",
+                       help="Materialize (or rebuild with --force) the metrics of the popular indicators")
+    parser.add_argument("--force", action="store_true",
+                       help="Rebuild even if the materialized metrics are up to date")
+    parser.add_argument("--indicator", type=str,
+                       help="World Bank indicator code (e.g., NY.GDP.PCAP.CD)")
+    parser.add_argument("--year", type=str, default=config.DEFAULT_YEAR,
+                       help=f"End year (default: {config.DEFAULT_YEAR})")
+    parser.add_argument("--metric", type=str, default='yoy',
+                       help="Metric spec: yoy, change:N, pct_change:N, cagr:N or <metric>:since<YEAR> (default: yoy)")
+    parser.add_argument("--tolerance", type=int, default=0,
+                       help="Years an end point may fall back to an earlier observation (default: 0)")
+    parser.add_argument("--top", type=int, default=15,
+                       help="Countries to print (default: 15)")
+
+    args = parser.parse_args()
+
+    if args.build:
+        build_derived_metrics(args.force)
+
+    if args.indicator:
+        start = time.perf_counter()
+        try:
+            df = get_metric_slice(args.indicator, args.year, args.metric, args.tolerance)
+        except ValueError as e:
+            parser.error(str(e))
+        if df is None:
+            print(f"No {args.metric} values for {args.indicator} in {args.year}")
+        else:
+            label, percent = describe_metric(args.metric)
+            print(f"\n{label} of {args.indicator} in {args.year}: {len(df)} countries "
+                  f"({time.perf_counter() - start:.3f}s)")
+            lines = describe_metric_years(df)
+            for row, line in zip(df.head(args.top).itertuples(), lines):
+                print(f"  {row.ISO3}: {row.IndicatorValue:+,.2f}{'%' if percent else ''}  {line}")
+
+    if not (args.build or args.indicator):
+        parser.print_help()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,192 @@
+"""
+HTTP-level caching and compression for the Dash server.
+
+``install_http_caching(server)`` adds gzip compression and ETag validators to
+every response of the underlying Flask server, and registers read-only JSON
+endpoints for processed slices, globe figures and indicator metadata:
+
+    GET /api/slice/<indicator_code>/<year>
+    GET /api/figure/<indicator_code>/<year>
+    GET /api/indicator/<indicator_code>
+    GET /api/export.arrow?indicators=...&start=...&end=...&countries=...
+
+Their ETags are keyed on (indicator, year, data fingerprint) or, for the
+indicator metadata record, the metadata fingerprint, so a client or
+reverse proxy that sends ``If-None-Match`` gets a 304 without the slice being
+loaded or the figure being rebuilt. Bodies are built from slice caches keyed
+on the same fingerprint, so a tag always names the data it was served with.
+The Arrow export streams its rows as they are read (see ``arrow_export``)
+and is never compressed or buffered.
+"""
+
+import gzip
+import hashlib
+import json
+from typing import Callable, Optional
+
+from flask import Flask, Response, request, stream_with_context
+
+import config
+from process_wb_data import get_data_fingerprint, process_indicator_for_year
+
+def make_etag(*parts) -> str:
+    """Build an ETag value from the parts that identify a representation."""
+    return hashlib.sha1("|".join(str(part) for part in parts).encode('utf-8')).hexdigest()
+
+def _set_cache_headers(response: Response, etag: str) -> Response:
+    response.set_etag(etag)
+    response.cache_control.public = True
+    response.cache_control.max_age = config.HTTP_CACHE_MAX_AGE
+    return response
+
+def conditional_json(etag: str, build: Callable[[], Optional[str]]) -> Response:
+    """Answer a GET with 304 if the client's ETag matches, else build the JSON body.
+
+    ``build`` is only called on a cache miss and returns the serialized JSON,
+    or None when there is nothing to serve.
+    """
+    if request.if_none_match.contains_weak(etag):
+        return _set_cache_headers(Response(status=304), etag)
+
+    body = build()
+    if body is None:
+        return Response(json.dumps({'error': 'No data available'}), status=404,
+                        mimetype='application/json')
+
+    return _set_cache_headers(Response(body, mimetype='application/json'), etag)
+
+def _compress_response(response: Response) -> Response:
+    """Add an ETag and gzip the body when the client accepts it."""
+    if (response.direct_passthrough or response.is_streamed
+            or response.status_code < 200 or response.status_code >= 300
+            or 'Content-Encoding' in response.headers):
+        return response
+
+    # Let GET requests for unchanged content (layout, assets) revalidate;
+    # weak comparison, since clients echo back the weak tag of a gzip body
+    if request.method in ('GET', 'HEAD'):
+        if not response.get_etag()[0]:
+            response.add_etag()
+        if request.if_none_match.contains_weak(response.get_etag()[0]):
+            response.status_code = 304
+            response.set_data(b'')
+            del response.headers['Content-Length']
+            return response
+
+    if (response.mimetype not in config.COMPRESSIBLE_MIMETYPES
+            or 'gzip' not in request.headers.get('Accept-Encoding', '').lower()):
+        return response
+
+    data = response.get_data()
+    if len(data) < config.COMPRESSION_MIN_SIZE:
+        return response
+
+    response.set_data(gzip.compress(data, compresslevel=config.COMPRESSION_LEVEL))
+    response.headers['Content-Encoding'] = 'gzip'
+    response.vary.add('Accept-Encoding')
+
+    # The compressed body is a different byte sequence, so the validator
+    # can only claim semantic equivalence
+    etag, weak = response.get_etag()
+    if etag and not weak:
+        response.set_etag(etag, weak=True)
+    return response
+
+def register_data_routes(server: Flask) -> None:
+    """Register the cached read-only slice and figure endpoints."""
+
+    @server.route('/api/slice/<indicator_code>/<year>')
+    def get_slice(indicator_code: str, year: str) -> Response:
+        fingerprint = get_data_fingerprint()
+        etag = make_etag('slice', indicator_code, year, fingerprint)
+
+        def build() -> Optional[str]:
+            df = process_indicator_for_year(indicator_code, year)
+            if df is None or df.empty:
+                return None
+            return json.dumps({
+                'indicator': indicator_code,
+                'year': year,
+                'fingerprint': fingerprint,
+                'count': len(df),
+                'data': df.to_dict('records')
+            })
+
+        return conditional_json(etag, build)
+
+    @server.route('/api/figure/<indicator_code>/<year>')
+    def get_figure(indicator_code: str, year: str) -> Response:
+        etag = make_etag('figure', indicator_code, year, get_data_fingerprint(),
+                         config.COMPACT_FIGURES, config.GLOBE_CLASSIFICATION)
+
+        def build() -> Optional[str]:
+            from wb_globe import create_enhanced_3d_globe, encode_compact_figure
+            import plotly.io as pio
+
+            df = process_indicator_for_year(indicator_code, year)
+            if df is None or df.empty:
+                return None
+            fig = create_enhanced_3d_globe(df, indicator_code, year, compact=config.COMPACT_FIGURES)
+            if config.COMPACT_FIGURES:
+                fig = encode_compact_figure(fig)
+            return pio.to_json(fig, validate=False)
+
+        return conditional_json(etag, build)
+
+    @server.route('/api/indicator/<indicator_code>')
+    def get_indicator_metadata(indicator_code: str) -> Response:
+        from wdi_metadata import get_metadata_fingerprint, get_series_metadata, get_series_time_notes
+
+        etag = make_etag('indicator', indicator_code, get_metadata_fingerprint())
+
+        def build() -> Optional[str]:
+            record = get_series_metadata(indicator_code)
+            if record is None:
+                return None
+            return json.dumps({
+                **record,
+                'series_time_notes': {str(year): note
+                                      for year, note in get_series_time_notes(indicator_code).items()}
+            })
+
+        return conditional_json(etag, build)
+
+def _list_arg(name: str) -> Optional[list]:
+    """Comma-separated query parameter as a list, or None when absent."""
+    values = [value.strip() for value in request.args.get(name, '').split(',') if value.strip()]
+    return values or None
+
+def register_export_route(server: Flask) -> None:
+    """Register the streaming Arrow IPC bulk export endpoint."""
+
+    @server.route('/api/export.arrow')
+    def export_arrow() -> Response:
+        from arrow_export import ARROW_STREAM_MIMETYPE, iter_ipc_stream
+        from wdi_store import is_ingested
+
+        filters = {
+            'indicators': _list_arg('indicators'),
+            'start_year': request.args.get('start', type=int),
+            'end_year': request.args.get('end', type=int),
+            'countries': _list_arg('countries'),
+            'include_aggregates': request.args.get('aggregates') == '1'
+        }
+        etag = make_etag('export', json.dumps(filters, sort_keys=True), get_data_fingerprint())
+        if request.if_none_match.contains_weak(etag):
+            return _set_cache_headers(Response(status=304), etag)
+
+        # The store is built by the warm-up; until then ask the client to retry
+        if not is_ingested():
+            return Response(json.dumps({'error': 'WDI store is warming up'}), status=503,
+                            headers={'Retry-After': '30'},
+                            mimetype='application/json')
+
+        response = Response(stream_with_context(iter_ipc_stream(**filters)), mimetype=ARROW_STREAM_MIMETYPE)
+        response.headers['Content-Disposition'] = 'attachment; filename=wdi_export.arrows'
+        return _set_cache_headers(response, etag)
+
+def install_http_caching(server: Flask) -> None:
+    """Enable compression, ETags and the cached data endpoints on a Flask server."""
+    server.after_request(_compress_response)
+    register_data_routes(server)
+    register_export_route(server)
@@ -0,0 +1,156 @@
+"""
+In-memory search index over the WDI indicator catalog.
+
+Series code, name, topic and definition are tokenized once, and queries are
+answered by prefix matching against a sorted token list, so each keystroke in
+the indicator dropdown only costs a few binary searches.
+"""
+
+import re
+from bisect import bisect_left
+from collections import defaultdict
+from typing import Dict, List, Optional
+
+import config
+from startup import lazy_import, timed
+
+pd = lazy_import('pandas')
+
+# Relative weight of a match in each field when ranking results
+FIELD_WEIGHTS = {
+    'code': 4.0,
+    'name': 3.0,
+    'topic': 1.5,
+    'definition': 0.5
+}
+
+# Extra weight when a query token matches a whole word rather than a prefix
+EXACT_MATCH_BONUS = 1.0
+
+# Popular indicators are nudged to the top of otherwise similar results
+POPULAR_BONUS = 2.0
+
+MAX_LABEL_LENGTH = 80
+
+_TOKEN_PATTERN = re.compile(r"[a-z0-9$%]+")
+
+def tokenize(text: str) -> List[str]:
+    """Split text into lowercase alphanumeric tokens."""
+    if not text:
+        return []
+    return _TOKEN_PATTERN.findall(str(text).lower())
+
+class IndicatorSearchIndex:
+    """Tokenized prefix index with weighted ranking over indicator records."""
+
+    def __init__(self, records: List[Dict[str, str]]):
+        self.records = records
+        self._by_code = {record['code']: i for i, record in enumerate(records)}
+        self._popular = set(config.POPULAR_INDICATORS.values())
+
+        # token -> {record id: best field weight for that token}
+        postings: Dict[str, Dict[int, float]] = defaultdict(dict)
+        for record_id, record in enumerate(records):
+            for field, weight in FIELD_WEIGHTS.items():
+                tokens = tokenize(record.get(field, ''))
+                if field == 'code':
+                    # Also index the full code so "ny.gdp.p" narrows quickly
+                    tokens.append(record['code'].lower())
+                for token in tokens:
+                    if postings[token].get(record_id, 0.0) < weight:
+                        postings[token][record_id] = weight
+
+        self._postings = dict(postings)
+        self._tokens = sorted(self._postings)
+
+    @classmethod
+    def from_series_file(cls, series_file: str = config.WDI_SERIES_FILE) -> 'IndicatorSearchIndex':
+        """Build the index from the WDI series metadata file."""
+        columns = {
+            'Series Code': 'code',
+            'Indicator Name': 'name',
+            'Topic': 'topic',
+            'Short definition': 'definition'
+        }
+        series_df = pd.read_csv(series_file, usecols=list(columns), dtype=str).fillna('')
+        series_df = series_df.rename(columns=columns)
+        return cls(series_df.to_dict('records'))
+
+    def __len__(self) -> int:
+        return len(self.records)
+
+    def get(self, code: str) -> Optional[Dict[str, str]]:
+        """Return the record for an indicator code, if indexed."""
+        record_id = self._by_code.get(code)
+        return None if record_id is None else self.records[record_id]
+
+    def _match_prefix(self, prefix: str) -> Dict[int, float]:
+        """Score every record with a token starting with ``prefix``."""
+        scores: Dict[int, float] = {}
+        position = bisect_left(self._tokens, prefix)
+        while position < len(self._tokens) and self._tokens[position].startswith(prefix):
+            token = self._tokens[position]
+            bonus = EXACT_MATCH_BONUS if token == prefix else 0.0
+            for record_id, weight in self._postings[token].items():
+                score = weight + bonus
+                if scores.get(record_id, 0.0) < score:
+                    scores[record_id] = score
+            position += 1
+        return scores
+
+    def search(self, query: str, limit: int = config.SEARCH_RESULT_LIMIT) -> List[Dict[str, str]]:
+        """Return the best matching records for a free-text query.
+
+        Every query token must prefix-match a token of the record; records are
+        ranked by the summed field weights of their matches.
+        """
+        query_tokens = tokenize(query)
+        if not query_tokens:
+            return []
+
+        # Whole-code queries such as "ny.gdp.pcap.cd" are matched as one token
+        stripped = query.strip().lower()
+        if '.' in stripped and ' ' not in stripped:
+            query_tokens = [stripped]
+
+        totals: Optional[Dict[int, float]] = None
+        for token in query_tokens:
+            matches = self._match_prefix(token)
+            if totals is None:
+                totals = matches
+            else:
+                totals = {record_id: score + matches[record_id]
+                          for record_id, score in totals.items() if record_id in matches}
+            if not totals:
+                return []
+
+        for record_id in totals:
+            if self.records[record_id]['code'] in self._popular:
+                totals[record_id] += POPULAR_BONUS
+
+        ranked = sorted(totals.items(),
+                        key=lambda item: (-item[1], len(self.records[item[0]]['name'])))
+        return [self.records[record_id] for record_id, _ in ranked[:limit]]
+
+def to_dropdown_option(record: Dict[str, str]) -> Dict[str, str]:
+    """Format an indicator record as a dropdown option."""
+    name = record['name'] or record['code']
+    if len(name) > MAX_LABEL_LENGTH:
+        name = name[:MAX_LABEL_LENGTH - 3] + "..."
+    prefix = "⭐ " if record['code'] in config.POPULAR_INDICATORS.values() else ""
+    return {'label': f"{prefix}{name} ({record['code']})", 'value': record['code']}
+
+def get_popular_options() -> List[Dict[str, str]]:
+    """Dropdown options for the popular indicators, shown before any search."""
+    return [{'label': f"⭐ {name}", 'value': code} for name, code in config.POPULAR_INDICATORS.items()]
+
+_SEARCH_INDEX: Optional[IndicatorSearchIndex] = None
+
+def get_search_index() -> IndicatorSearchIndex:
+    """Return the shared search index, building it on first use."""
+    global _SEARCH_INDEX
+    if _SEARCH_INDEX is None:
+        with timed('indicator search index'):
+            _SEARCH_INDEX = IndicatorSearchIndex.from_series_file()
+        print(f"Indexed {len(_SEARCH_INDEX)} indicators for search")
+    return _SEARCH_INDEX
@@ -0,0 +1,386 @@
+"""
+Load test of the Dash app by replaying button clicks over HTTP.
+
+Simulated users post to the Dash callback endpoint (``/_dash-update-component``)
+exactly as the browser does, with no browser involved: each one repeatedly
+picks a click (generate, years, info, ...) from a weighted mix, with a random
+indicator and year, and waits for the response before the next click. The
+test steps through increasing concurrency levels and reports latency
+percentiles, throughput and error rate per level, plus the resident memory of
+the server process over time.
+
+Results can be saved as a baseline and later runs compared against it; a
+regression beyond the tolerance makes the run exit with status 1.
+
+Usage:
+    python load_test.py --spawn --concurrency 1 4 16 --duration 20 --save-baseline
+    python load_test.py --spawn --data-dir synthetic_10x --compare load_test_baseline.json
+    python load_test.py --url http://127.0.0.1:8050 --pid 12345 --mix generate=80 info=20
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import random
+import subprocess
+import sys
+import threading
+import time
+from typing import Dict, List, Optional
+
+import config
+from startup import lazy_import
+
+np = lazy_import('numpy')
+requests = lazy_import('requests')
+
+# Clicks a simulated user can make, by the id of the button they press
+CLICKS = {
+    'generate': 'generate-button',
+    'years': 'years-button',
+    'info': 'info-button',
+    'correlate': 'correlation-button',
+    'compare': 'compare-button'
+}
+
+DEFAULT_MIX = {'generate': 70, 'years': 15, 'info': 15}
+
+UPDATE_ENDPOINT = '/_dash-update-component'
+
+# Callbacks catch their exceptions and report them in a status output with
+# HTTP 200, so responses are also checked for these markers
+ERROR_MARKERS = ('❌ Error', '❌ Failed')
+
+def read_rss_mb(pid: int) -> Optional[float]:
+    """Resident memory of a process in MB, or None if it cannot be read."""
+    try:
+        import psutil
+        return psutil.Process(pid).memory_info().rss / 1e6
+    except ImportError:
+        pass
+    except Exception:
+        return None
+    try:
+        with open(f"/proc/{pid}/status") as f:
+            for line in f:
+                if line.startswith('VmRSS:'):
+                    return int(line.split()[1]) / 1e3
+    except OSError:
+        pass
+    return None
+
+def _layout_values(node, values: Dict[str, object]) -> Dict[str, object]:
+    """Collect the initial ``value`` of every component in a Dash layout."""
+    if isinstance(node, list):
+        for child in node:
+            _layout_values(child, values)
+    elif isinstance(node, dict):
+        props = node.get('props', {})
+        if isinstance(props.get('id'), str) and 'value' in props:
+            values[props['id']] = props['value']
+        _layout_values(props.get('children'), values)
+    return values
+
+def _parse_outputs(output: str):
+    """The ``outputs`` field of a request for a dependency's output string."""
+    def parse(spec: str) -> Dict[str, str]:
+        component_id, prop = spec.rsplit('.', 1)
+        return {'id': component_id, 'property': prop}
+
+    if output.startswith('..'):
+        return [parse(spec) for spec in output[2:-2].split('...')]
+    return parse(output)
+
+class DashClient:
+    """Builds callback requests for button clicks from the app's own metadata."""
+
+    def __init__(self, base_url: str):
+        self.base_url = base_url.rstrip('/')
+        session = requests.Session()
+        dependencies = session.get(f"{self.base_url}/_dash-dependencies", timeout=30).json()
+        self.defaults = _layout_values(session.get(f"{self.base_url}/_dash-layout", timeout=30).json(), {})
+
+        self.callbacks = {}
+        for dependency in dependencies:
+            if dependency.get('clientside_function'):
+                continue
+            for click, button_id in CLICKS.items():
+                if {'id': button_id, 'property': 'n_clicks'} in dependency['inputs']:
+                    self.callbacks[click] = dependency
+
+    def build_payload(self, click: str, n_clicks: int, indicator: str, year: str,
+                      compare_indicator: str) -> Dict:
+        dependency = self.callbacks[click]
+        overrides = {'indicator-dropdown': indicator, 'year-dropdown': year,
+                     'compare-indicator-dropdown': compare_indicator}
+        state = [{**item, 'value': overrides.get(item['id'], self.defaults.get(item['id']))}
+                 for item in dependency['state']]
+        return {
+            'output': dependency['output'],
+            'outputs': _parse_outputs(dependency['output']),
+            'inputs': [{'id': CLICKS[click], 'property': 'n_clicks', 'value': n_clicks}],
+            'changedPropIds': [f"{CLICKS[click]}.n_clicks"],
+            'state': state
+        }
+
+def has_error_output(response) -> bool:
+    """True if any text output of a callback response reports an error."""
+    try:
+        outputs = response.json().get('response', {})
+    except ValueError:
+        return True
+    for properties in outputs.values():
+        children = properties.get('children') if isinstance(properties, dict) else None
+        if children is None:
+            continue
+        text = children if isinstance(children, str) else json.dumps(children, ensure_ascii=False)
+        if any(marker in text for marker in ERROR_MARKERS):
+            return True
+    return False
+
+def _run_user(client: DashClient, mix: Dict[str, int], indicators: List[str], years: List[str],
+              deadline: float, seed: int, results: List[Dict]) -> None:
+    """One simulated user clicking until the deadline (closed loop)."""
+    rng = random.Random(seed)
+    session = requests.Session()
+    clicks, weights = list(mix), list(mix.values())
+    n_clicks = 0
+    while time.perf_counter() < deadline:
+        click = rng.choices(clicks, weights)[0]
+        n_clicks += 1
+        payload = client.build_payload(click, n_clicks, rng.choice(indicators), rng.choice(years),
+                                       rng.choice(indicators))
+        start = time.perf_counter()
+        try:
+            response = session.post(f"{client.base_url}{UPDATE_ENDPOINT}", json=payload, timeout=120)
+            # 204 is a PreventUpdate from the callback, not a failure
+            ok = response.status_code == 204 or (response.status_code == 200 and not has_error_output(response))
+            size = len(response.content)
+        except requests.RequestException:
+            ok, size = False, 0
+        results.append({'click': click, 'seconds': time.perf_counter() - start,
+                        'ok': ok, 'bytes': size})
+
+def _sample_memory(pid: int, stop: threading.Event, samples: List[Dict], start: float,
+                   interval: float) -> None:
+    while not stop.is_set():
+        rss = read_rss_mb(pid)
+        if rss is not None:
+            samples.append({'t': round(time.perf_counter() - start, 2), 'rss_mb': round(rss, 1)})
+        stop.wait(interval)
+
+def summarize(results: List[Dict], seconds: float) -> Dict:
+    """Latency percentiles (ms), throughput and error rate of a set of requests."""
+    if not results:
+        return {'requests': 0, 'throughput': 0.0, 'error_rate': 0.0}
+    latencies = np.array([result['seconds'] for result in results]) * 1000
+    errors = sum(not result['ok'] for result in results)
+    p50, p95, p99 = np.percentile(latencies, [50, 95, 99])
+    return {
+        'requests': len(results),
+        'p50_ms': round(float(p50), 1),
+        'p95_ms': round(float(p95), 1),
+        'p99_ms': round(float(p99), 1),
+        'mean_ms': round(float(latencies.mean()), 1),
+        'throughput': round(len(results) / seconds, 2),
+        'error_rate': round(errors / len(results), 4),
+        'mean_kb': round(sum(result['bytes'] for result in results) / len(results) / 1e3, 1)
+    }
+
+def run_level(client: DashClient, concurrency: int, duration: float, mix: Dict[str, int],
+              indicators: List[str], years: List[str], seed: int, pid: Optional[int] = None,
+              memory_interval: float = 0.5) -> Dict:
+    """Run ``concurrency`` simulated users for ``duration`` seconds."""
+    results: List[Dict] = []
+    memory: List[Dict] = []
+    stop = threading.Event()
+    start = time.perf_counter()
+    deadline = start + duration
+
+    sampler = None
+    if pid:
+        sampler = threading.Thread(target=_sample_memory, args=(pid, stop, memory, start, memory_interval),
+                                   daemon=True)
+        sampler.start()
+
+    users = [threading.Thread(target=_run_user,
+                              args=(client, mix, indicators, years, deadline, seed * 1000 + i, results),
+                              daemon=True)
+             for i in range(concurrency)]
+    for user in users:
+        user.start()
+    for user in users:
+        user.join()
+    elapsed = time.perf_counter() - start
+    stop.set()
+    if sampler:
+        sampler.join()
+
+    level = {'concurrency': concurrency, **summarize(results, elapsed)}
+    level['by_click'] = {click: summarize([r for r in results if r['click'] == click], elapsed)
+                         for click in mix}
+    if memory:
+        level['memory'] = {
+            'start_mb': memory[0]['rss_mb'],
+            'end_mb': memory[-1]['rss_mb'],
+            'peak_mb': max(sample['rss_mb'] for sample in memory),
+            'samples': memory
+        }
+    return level
+
+def compare_with_baseline(run: Dict, baseline: Dict, tolerance: float) -> List[str]:
+    """Print the change against a baseline per level; return the regressions found."""
+    regressions = []
+    baseline_levels = {level['concurrency']: level for level in baseline.get('levels', [])}
+    print(f"\nComparison with baseline from {baseline.get('timestamp', 'unknown date')}:")
+    for level in run['levels']:
+        before = baseline_levels.get(level['concurrency'])
+        if not before or not before.get('requests') or not level.get('requests'):
+            print(f"  c={level['concurrency']}: no baseline")
+            continue
+        p95_change = level['p95_ms'] / before['p95_ms'] - 1 if before['p95_ms'] else 0.0
+        throughput_change = level['throughput'] / before['throughput'] - 1 if before['throughput'] else 0.0
+        print(f"  c={level['concurrency']}: p95 {before['p95_ms']:.0f} -> {level['p95_ms']:.0f} ms "
+              f"({p95_change:+.0%}), throughput {before['throughput']:.1f} -> {level['throughput']:.1f}/s "
+              f"({throughput_change:+.0%}), errors {before['error_rate']:.1%} -> {level['error_rate']:.1%}")
+        if p95_change > tolerance:
+            regressions.append(f"c={level['concurrency']}: p95 latency up {p95_change:.0%}")
+        if throughput_change < -tolerance:
+            regressions.append(f"c={level['concurrency']}: throughput down {-throughput_change:.0%}")
+        if level['error_rate'] > before['error_rate'] + 0.01:
+            regressions.append(f"c={level['concurrency']}: error rate {level['error_rate']:.1%}")
+    return regressions
+
+def spawn_server(port: int, data_dir: Optional[str]) -> subprocess.Popen:
+    """Start main_app without the debug reloader, serving from ``data_dir``."""
+    app_dir = os.path.dirname(os.path.abspath(__file__))
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join(filter(None, [app_dir, os.environ.get('PYTHONPATH')])))
+    code = f"import main_app; main_app.app.run(debug=False, host='127.0.0.1', port={port})"
+    return subprocess.Popen([sys.executable, '-c', code], cwd=data_dir or app_dir, env=env,
+                            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+
+def wait_for_server(base_url: str, timeout: float = 120) -> None:
+    deadline = time.perf_counter() + timeout
+    while time.perf_counter() < deadline:
+        try:
+            if requests.get(f"{base_url}/_dash-layout", timeout=5).ok:
+                return
+        except requests.RequestException:
+            pass
+        time.sleep(0.5)
+    raise RuntimeError(f"Server at {base_url} did not start within {timeout:.0f}s")
+
+def print_level(level: Dict) -> None:
+    if not level['requests']:
+        print(f"  c={level['concurrency']:<4} no requests completed")
+        return
+    memory = level.get('memory')
+    memory_text = (f"  rss {memory['start_mb']:.0f}->{memory['end_mb']:.0f} MB (peak {memory['peak_mb']:.0f})"
+                   if memory else "")
+    print(f"  c={level['concurrency']:<4} {level['requests']:>6} req  {level['throughput']:>7.1f}/s  "
+          f"p50 {level['p50_ms']:>7.0f}  p95 {level['p95_ms']:>7.0f}  p99 {level['p99_ms']:>7.0f} ms  "
+          f"errors {level['error_rate']:.1%}{memory_text}")
+    for click, stats in level['by_click'].items():
+        if stats['requests']:
+            print(f"         {click:<10} {stats['requests']:>6} req  p50 {stats['p50_ms']:>7.0f}  "
+                  f"p95 {stats['p95_ms']:>7.0f} ms  errors {stats['error_rate']:.1%}")
+
+def parse_mix(items: List[str]) -> Dict[str, int]:
+    mix = {}
+    for item in items:
+        click, _, weight = item.partition('=')
+        if click not in CLICKS:
+            raise ValueError(f"Unknown click '{click}' (choose from {', '.join(CLICKS)})")
+        mix[click] = int(weight or 1)
+    return mix
+
+def main():
+    """Main function for command line usage."""
+    parser = argparse.ArgumentParser(description="Load test the Dash app by replaying button clicks")
+    parser.add_argument("--url", type=str, default="http://127.0.0.1:8050",
+                       help="Base URL of a running app (default: http://127.0.0.1:8050)")
+    parser.add_argument("--spawn", action="store_true",
+                       help="Start main_app in a subprocess for the test")
+    parser.add_argument("--data-dir", type=str, default=None,
+                       help="Directory with the data files for --spawn (e.g. a synthetic_data.py output)")
+    parser.add_argument("--pid", type=int, default=None,
+                       help="Process id of a running server, to sample its memory")
+    parser.add_argument("--concurrency", type=int, nargs='+', default=[1, 4, 16],
+                       help="Simulated users per level (default: 1 4 16)")
+    parser.add_argument("--duration", type=float, default=20,
+                       help="Seconds per level (default: 20)")
+    parser.add_argument("--warm-up", type=float, default=5,
+                       help="Seconds of single-user traffic before measuring (default: 5)")
+    parser.add_argument("--mix", type=str, nargs='+', default=[f"{k}={v}" for k, v in DEFAULT_MIX.items()],
+                       help=f"Click weights as name=weight, from: {', '.join(CLICKS)} (default: generate=70 years=15 info=15)")
+    parser.add_argument("--indicators", type=str, nargs='+', default=list(config.POPULAR_INDICATORS.values()),
+                       help="Indicators to click through (default: popular indicators)")
+    parser.add_argument("--years", type=str, nargs='+', default=[str(year) for year in config.DEFAULT_YEARS_RANGE],
+                       help="Years to click through (default: 2000-2024)")
+    parser.add_argument("--seed", type=int, default=0,
+                       help="Random seed of the click sequences (default: 0)")
+    parser.add_argument("--output", type=str, default=None,
+                       help="Write the full results (including memory samples) to this JSON file")
+    parser.add_argument("--save-baseline", type=str, nargs='?', const=config.LOAD_TEST_BASELINE_FILE,
+                       help=f"Save the results as a baseline (default path: {config.LOAD_TEST_BASELINE_FILE})")
+    parser.add_argument("--compare", type=str, default=None,
+                       help="Baseline JSON file to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.2,
+                       help="Relative p95/throughput change counted as a regression (default: 0.2)")
+
+    args = parser.parse_args()
+
+    try:
+        mix = parse_mix(args.mix)
+    except ValueError as e:
+        parser.error(str(e))
+
+    server = None
+    pid = args.pid
+    if args.spawn:
+        port = int(args.url.rsplit(':', 1)[-1].strip('/'))
+        print(f"Starting main_app on port {port}...")
+        server = spawn_server(port, args.data_dir)
+        pid = server.pid
+
+    try:
+        wait_for_server(args.url)
+        client = DashClient(args.url)
+        missing = [click for click in mix if click not in client.callbacks]
+        if missing:
+            raise SystemExit(f"No callback found for: {', '.join(missing)}")
+
+        if args.warm_up:
+            print(f"Warming up for {args.warm_up:.0f}s...")
+            run_level(client, 1, args.warm_up, mix, args.indicators, args.years, args.seed + 1)
+
+        run = {'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'), 'url': args.url, 'mix': mix,
+               'duration': args.duration, 'levels': []}
+        print(f"\nLoad test: {args.duration:.0f}s per level, mix {mix}")
+        for concurrency in args.concurrency:
+            level = run_level(client, concurrency, args.duration, mix, args.indicators,
+                              args.years, args.seed, pid)
+            run['levels'].append(level)
+            print_level(level)
+    finally:
+        if server:
+            server.terminate()
+            server.wait()
+
+    for path in filter(None, [args.output, args.save_baseline]):
+        with open(path, 'w') as f:
+            json.dump(run, f, indent=2)
+        print(f"Saved results to {path}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            regressions = compare_with_baseline(run, json.load(f), args.tolerance)
+        if regressions:
+            print("\n⚠️  Regressions: " + "; ".join(regressions))
+            raise SystemExit(1)
+        print("\n✅ No regressions beyond the tolerance")
+
+if __name__ == "__main__":
+    main()
@@ -1,27 +1,53 @@
 import dash
 from dash import dcc, html, callback_context
 from dash.dependencies import Input, Output, State
-import pandas as pd
-import os
 from typing import List, Dict, Optional
 
 # Import our custom modules
 import config
-from wb_globe import create_enhanced_3d_globe, add_indicator_statistics
+from wb_globe import (
+    create_enhanced_3d_globe,
+    add_indicator_statistics,
+    encode_compact_figure
+)
 from process_wb_data import (
     process_indicator_for_year, 
     get_indicator_info, 
-    get_available_years_for_indicator
+    get_available_years_for_indicator,
+    get_country_iso3_mapping,
+    get_indicator_summary_stats
 )
-
-# Ensure data directory exists
-if not os.path.exists(config.DATA_DIR):
-    os.makedirs(config.DATA_DIR)
+from startup import import_task, start_warm_up
+from http_cache import install_http_caching
+from profiling import install_request_profiling
+from correlation import correlate_with, add_indicator_names
+from regional_aggregates import (
+    get_group_options,
+    get_group_members,
+    get_aggregates,
+    compare_with_official,
+    resolve_weight
+)
+from wdi_notes import attach_footnotes, ingest_notes
+from anomalies import attach_anomalies
+from classification import build_class_breaks
+from derived_metrics import build_derived_metrics, get_metric_slice
+from rankings import build_rankings
+from nowcast import get_nowcast_slice
+from wdi_metadata import get_series_time_notes, load_metadata_index
+from wdi_store import ensure_ingested, is_ingested
+from comparison import create_comparison_figure, SYNC_ROTATION_JS
 
 # Initialize Dash app
 app = dash.Dash(__name__)
 server = app.server  # For deployment
 
+# Compression, ETags and the cached /api/slice and /api/figure endpoints
+install_http_caching(server)
+
+# Per-request profiles when enabled through WDI_PROFILE* (no hooks otherwise)
+install_request_profiling(server)
+
 # Define recent years for quick access
 RECENT_YEARS = [str(year) for year in range(2018, 2025)]
 ALL_YEARS = [str(year) for year in range(2000, 2025)]
@@ -89,6 +115,48 @@ app.layout = html.Div([
                 clearable=False
             ),
             
+            dcc.Dropdown(
+                id='gap-fill-dropdown',
+                options=[
+                    {'label': "Exact year only", 'value': 'none'},
+                    {'label': f"Most recent value within {config.GAP_FILL_WINDOW} years", 'value': 'latest'},
+                    {'label': f"Interpolate within {config.GAP_FILL_WINDOW} years", 'value': 'interpolate'},
+                    {'label': f"Project up to {config.NOWCAST_MAX_HORIZON} years from recent trends", 'value': 'nowcast'}
+                ],
+                value='none',
+                style={'fontSize': '14px', 'marginTop': '8px'},
+                clearable=False
+            ),
+            
+            dcc.Dropdown(
+                id='classification-dropdown',
+                options=[
+                    {'label': "Colors: natural breaks", 'value': 'fisher_jenks'},
+                    {'label': "Colors: quantiles", 'value': 'quantile'},
+                    {'label': "Colors: equal intervals", 'value': 'equal_interval'},
+                    {'label': "Colors: continuous", 'value': 'continuous'}
+                ],
+                value=config.GLOBE_CLASSIFICATION,
+                style={'fontSize': '14px', 'marginTop': '8px'},
+                clearable=False
+            ),
+            
+            dcc.Dropdown(
+                id='metric-dropdown',
+                options=[
+                    {'label': "Show: values", 'value': 'value'},
+                    {'label': "Show: change from previous year (%)", 'value': 'yoy'},
+                    {'label': "Show: 5-year change (%)", 'value': 'pct_change:5'},
+                    {'label': "Show: 5-year CAGR (%)", 'value': 'cagr:5'},
+                    {'label': "Show: 10-year CAGR (%)", 'value': 'cagr:10'},
+                    {'label': "Show: 10-year change", 'value': 'change:10'},
+                    {'label': "Show: change since 2000 (%)", 'value': 'pct_change:since2000'}
+                ],
+                value='value',
+                style={'fontSize': '14px', 'marginTop': '8px'},
+                clearable=False
+            ),
+            
             html.Div([
                 html.Small("💡 Tip: Recent years typically have better data coverage", 
                           style={'color': '#666', 'fontStyle': 'italic'})
@@ -104,6 +172,79 @@ app.layout = html.Div([
         }),
     ], style={'marginBottom': '25px'}),
 
+    # Region / income group filter with computed aggregates
+    html.Div([
+        html.Div([
+            html.Label("🗺️ Region or Income Group:", 
+                      style={'fontWeight': 'bold', 'marginBottom': '10px', 'fontSize': '1.1em', 'color': '#333'}),
+            dcc.Dropdown(
+                id='region-dropdown',
+                options=get_group_options(),
+                value=config.WORLD_AGGREGATE_CODE,
+                style={'fontSize': '14px'},
+                clearable=False
+            ),
+        ], style={'width': '60%', 'display': 'inline-block', 'marginRight': '3%', 'verticalAlign': 'top'}),
+
+        html.Div([
+            html.Label("⚖️ Aggregate weighting:", 
+                      style={'fontWeight': 'bold', 'marginBottom': '10px', 'fontSize': '1.1em', 'color': '#333'}),
+            dcc.RadioItems(
+                id='weight-radio',
+                options=[
+                    {'label': ' Population', 'value': 'population'},
+                    {'label': ' GDP', 'value': 'gdp'},
+                    {'label': ' None', 'value': 'none'}
+                ],
+                value=config.DEFAULT_AGGREGATE_WEIGHT,
+                inline=True,
+                inputStyle={'marginLeft': '12px'}
+            ),
+        ], style={'width': '34%', 'display': 'inline-block', 'verticalAlign': 'top'}),
+    ], style={
+        'marginBottom': '25px',
+        'padding': '15px',
+        'backgroundColor': '#f8f9fa',
+        'borderRadius': '8px',
+        'boxShadow': '0 2px 4px rgba(0,0,0,0.1)'
+    }),
+
+    # Comparison with a second indicator
+    html.Div([
+        html.Div([
+            html.Label("🆚 Compare with:", 
+                      style={'fontWeight': 'bold', 'marginBottom': '10px', 'fontSize': '1.1em', 'color': '#333'}),
+            dcc.Dropdown(
+                id='compare-indicator-dropdown',
+                options=[{'label': f"🔹 {name}", 'value': code} for name, code in config.POPULAR_INDICATORS.items()],
+                value=config.POPULAR_INDICATORS.get("Life expectancy at birth, total (years)"),
+                placeholder="Choose a second indicator...",
+                style={'fontSize': '14px'}
+            ),
+        ], style={'width': '60%', 'display': 'inline-block', 'marginRight': '3%', 'verticalAlign': 'top'}),
+
+        html.Div([
+            html.Label("🧭 Comparison view:", 
+                      style={'fontWeight': 'bold', 'marginBottom': '10px', 'fontSize': '1.1em', 'color': '#333'}),
+            dcc.RadioItems(
+                id='compare-mode-radio',
+                options=[
+                    {'label': ' Side by side', 'value': 'side-by-side'},
+                    {'label': ' Bivariate', 'value': 'bivariate'}
+                ],
+                value='side-by-side',
+                inline=True,
+                inputStyle={'marginLeft': '12px'}
+            ),
+        ], style={'width': '34%', 'display': 'inline-block', 'verticalAlign': 'top'}),
+    ], style={
+        'marginBottom': '25px',
+        'padding': '15px',
+        'backgroundColor': '#f8f9fa',
+        'borderRadius': '8px',
+        'boxShadow': '0 2px 4px rgba(0,0,0,0.1)'
+    }),
+
     # Action buttons
     html.Div([
         html.Button(
@@ -151,6 +292,38 @@ app.layout = html.Div([
                 'padding': '15px 30px', 
                 'fontSize': '16px', 
                 'borderRadius': '8px',
+                'marginRight': '15px', 
+                'cursor': 'pointer',
+                'boxShadow': '0 2px 4px rgba(0,0,0,0.2)'
+            }
+        ),
+        html.Button(
+            '🔗 Correlated Indicators', 
+            id='correlation-button', 
+            n_clicks=0,
+            style={
+                'backgroundColor': '#fd7e14', 
+                'color': 'white', 
+                'border': 'none',
+                'padding': '15px 30px', 
+                'fontSize': '16px', 
+                'borderRadius': '8px',
+                'marginRight': '15px', 
+                'cursor': 'pointer',
+                'boxShadow': '0 2px 4px rgba(0,0,0,0.2)'
+            }
+        ),
+        html.Button(
+            '🆚 Compare Indicators', 
+            id='compare-button', 
+            n_clicks=0,
+            style={
+                'backgroundColor': '#20c997', 
+                'color': 'white', 
+                'border': 'none',
+                'padding': '15px 30px', 
+                'fontSize': '16px', 
+                'borderRadius': '8px',
                 'cursor': 'pointer',
                 'boxShadow': '0 2px 4px rgba(0,0,0,0.2)'
             }
@@ -200,6 +373,16 @@ app.layout = html.Div([
         'boxShadow': '0 2px 4px rgba(0,0,0,0.05)'
     }),
 
+    # Correlated indicators panel
+    html.Div(id='correlation-panel', style={
+        'marginTop': '15px', 
+        'padding': '20px', 
+        'backgroundColor': '#ffffff', 
+        'borderRadius': '8px', 
+        'border': '1px solid #dee2e6',
+        'boxShadow': '0 2px 4px rgba(0,0,0,0.05)'
+    }),
+
     # Footer
     html.Div([
         html.Hr(style={'margin': '40px 0 20px 0'}),
@@ -235,9 +418,15 @@ app.layout = html.Div([
      Output('stats-panel', 'children')],
     [Input('generate-button', 'n_clicks')],
     [State('indicator-dropdown', 'value'),
-     State('year-dropdown', 'value')]
+     State('year-dropdown', 'value'),
+     State('region-dropdown', 'value'),
+     State('weight-radio', 'value'),
+     State('gap-fill-dropdown', 'value'),
+     State('classification-dropdown', 'value'),
+     State('metric-dropdown', 'value')]
 )
-def update_globe(n_clicks, selected_indicator, selected_year):
+def update_globe(n_clicks, selected_indicator, selected_year, selected_group, selected_weight,
+                 gap_fill='none', classification=config.GLOBE_CLASSIFICATION, metric='value'):
     """Update the 3D globe visualization."""
     if n_clicks == 0:
         return (
@@ -280,8 +469,18 @@ def update_globe(n_clicks, selected_indicator, selected_year):
         # Get indicator info
         indicator_info = get_indicator_info(selected_indicator)
         
-        # Process data
-        df = process_indicator_for_year(selected_indicator, selected_year)
+        # Process data, filling sparse years from nearby observations if requested
+        # (derived metrics then take their end points from up to that many years earlier)
+        gap_fill = None if gap_fill in (None, 'none') else gap_fill
+        if gap_fill == 'nowcast':
+            metric = 'value'
+            df = get_nowcast_slice(selected_indicator, selected_year)
+        elif metric and metric != 'value':
+            df = get_metric_slice(selected_indicator, selected_year, metric,
+                                  tolerance=config.GAP_FILL_WINDOW if gap_fill else 0)
+        else:
+            metric = 'value'
+            df = process_indicator_for_year(selected_indicator, selected_year, gap_fill=gap_fill)
         
         if df is None or df.empty:
             status_messages.append(f"❌ No data available for {indicator_name} in {selected_year}")
@@ -292,14 +491,45 @@ def update_globe(n_clicks, selected_indicator, selected_year):
                 recent_years = [y for y in available_years if int(y) >= 2015][-5:]
                 suggestion = f"💡 Try these recent years with data: {', '.join(recent_years)}"
                 status_messages.append(suggestion)
+            if not gap_fill:
+                status_messages.append("💡 Or fill gaps with the most recent value from earlier years")
             
             return {}, html.Div([html.P(msg) for msg in status_messages]), "", ""
         
+        # Restrict the globe to the selected region or income group
+        filtered = bool(selected_group) and selected_group != config.WORLD_AGGREGATE_CODE
+        if filtered:
+            df = df[df['ISO3'].isin(get_group_members(selected_group))]
+            if df.empty:
+                status_messages.append(f"❌ No data for the selected group in {selected_year}")
+                return {}, html.Div([html.P(msg) for msg in status_messages]), "", ""
+        
+        # Footnotes and values flagged by the anomaly scan, shown on hover
+        df = attach_footnotes(df, selected_indicator)
+        df = attach_anomalies(df, selected_indicator)
+        
         # Create the globe
-        fig = create_enhanced_3d_globe(df, selected_indicator, selected_year)
+        fig = create_enhanced_3d_globe(df, selected_indicator, selected_year,
+                                       compact=config.COMPACT_FIGURES, classification=classification,
+                                       metric=metric)
         
         if fig:
             status_messages.append(f"✅ Successfully generated globe with data for {len(df)} countries!")
+            if gap_fill and 'GapFill' in df.columns:
+                filled = int((df['GapFill'] != 'observed').sum())
+                status_messages.append(f"🧩 {filled} countries filled from nearby years (see hover for the source year)")
+            if 'Estimated' in df.columns:
+                status_messages.append(f"🔮 {int(df['Estimated'].sum())} countries projected from recent trends "
+                                       f"(outlined; see hover)")
+            if 'Note' in df.columns and df['Note'].notna().any():
+                status_messages.append(f"📝 {int(df['Note'].notna().sum())} countries have footnotes (shown on hover)")
+            if 'Anomaly' in df.columns and df['Anomaly'].notna().any():
+                status_messages.append(f"⚠️ {int(df['Anomaly'].notna().sum())} values look suspicious (see hover)")
+            
+            # Precomputed per (indicator, year) when the WDI store is ingested
+            # (a filtered, gap-filled or derived slice is summarized directly)
+            stats = get_indicator_summary_stats(df, selected_indicator,
+                                                None if filtered or gap_fill or metric != 'value' else selected_year)
             
             # Prepare info panel content
             info_content = [
@@ -307,14 +537,14 @@ def update_globe(n_clicks, selected_indicator, selected_year):
                 html.Div([
                     html.Div([
                         html.P(f"📅 Year: {selected_year}", style={'margin': '5px 0'}),
-                        html.P(f"🌍 Countries with data: {len(df)}", style={'margin': '5px 0'}),
+                        html.P(f"🌍 Countries with data: {stats['count']}", style={'margin': '5px 0'}),
                         html.P(f"🔢 Indicator code: {selected_indicator}", style={'margin': '5px 0', 'fontSize': '12px', 'color': '#666'}),
                     ], style={'width': '48%', 'display': 'inline-block', 'verticalAlign': 'top'}),
                     
                     html.Div([
-                        html.P(f"🏆 Top performer: {df.iloc[0]['CountryName']}", style={'margin': '5px 0'}),
-                        html.P(f"📈 Average value: {df['IndicatorValue'].mean():,.2f}", style={'margin': '5px 0'}),
-                        html.P(f"📏 Range: {df['IndicatorValue'].min():,.0f} - {df['IndicatorValue'].max():,.0f}", style={'margin': '5px 0'}),
+                        html.P(f"🏆 Top performer: {stats['top_country']}", style={'margin': '5px 0'}),
+                        html.P(f"📈 Average value: {stats['mean']:,.2f}", style={'margin': '5px 0'}),
+                        html.P(f"📏 Range: {stats['min']:,.0f} - {stats['max']:,.0f}", style={'margin': '5px 0'}),
                     ], style={'width': '48%', 'display': 'inline-block', 'verticalAlign': 'top', 'marginLeft': '4%'}),
                 ]),
             ]
@@ -328,17 +558,33 @@ def update_globe(n_clicks, selected_indicator, selected_year):
                     definition = definition[:300] + "..."
                 info_content.append(html.P(f"ℹ️ {definition}", style={'margin': '10px 0', 'fontSize': '14px', 'lineHeight': '1.5'}))
             
+            if indicator_info.get('source'):
+                info_content.append(html.P(f"📚 Source: {indicator_info['source']}",
+                                           style={'margin': '5px 0', 'fontSize': '13px', 'color': '#666'}))
+            
+            year_note = get_series_time_notes(selected_indicator).get(int(selected_year))
+            if year_note:
+                info_content.append(html.P(f"🗓️ {selected_year} note: {year_note}",
+                                           style={'margin': '5px 0', 'fontSize': '13px', 'color': '#666'}))
+            
+            info_content.extend(build_aggregate_content(selected_indicator, selected_year,
+                                                        selected_group or config.WORLD_AGGREGATE_CODE,
+                                                        selected_weight))
+            
             # Prepare stats panel
-            top_5 = df.head(5)
+            top_5 = stats['top_10'][:5]
             stats_content = [
                 html.H5("🏆 Top 5 Countries", style={'color': '#28a745', 'marginBottom': '10px'}),
                 html.Div([
                     html.Div([
                         html.P(f"{i}. {row['CountryName']}", style={'margin': '2px 0', 'fontWeight': 'bold'}),
                         html.P(f"   {row['IndicatorValue']:,.2f}", style={'margin': '2px 0', 'fontSize': '14px', 'color': '#666'})
-                    ]) for i, (_, row) in enumerate(top_5.iterrows(), 1)
+                    ]) for i, row in enumerate(top_5, 1)
                 ], style={'columnCount': '2', 'columnGap': '20px'})
             ]
+            
+            if config.COMPACT_FIGURES:
+                fig = encode_compact_figure(fig)
         else:
             status_messages.append("❌ Failed to generate visualization")
             return {}, html.Div([html.P(msg) for msg in status_messages]), "", ""
@@ -349,6 +595,34 @@ def update_globe(n_clicks, selected_indicator, selected_year):
 
     return fig, html.Div([html.P(msg) for msg in status_messages]), info_content, stats_content
 
+def build_aggregate_content(indicator_code: str, year: str, group_code: str, weight: str) -> List:
+    """Info panel lines with the computed aggregate of the selected group."""
+    weight = resolve_weight(None if weight == 'none' else weight)
+    try:
+        aggregates = get_aggregates(indicator_code, year, weight)
+    except Exception as e:
+        print(f"Error computing aggregates: {e}")
+        return []
+    
+    row = aggregates[aggregates['GroupCode'] == group_code]
+    if row.empty:
+        return []
+    row = row.iloc[0]
+    
+    label = f"{weight}-weighted" if weight else "unweighted"
+    content = [html.P(
+        f"🗺️ {row['GroupName']} aggregate ({label}): {row['IndicatorValue']:,.2f} "
+        f"from {row['Countries']} countries, {row['WeightCoverage']:.0%} coverage",
+        style={'margin': '10px 0 5px 0'}
+    )]
+    
+    official = compare_with_official(indicator_code, year, weight)
+    official = official[official['GroupCode'] == group_code]
+    if not official.empty:
+        content.append(html.P(f"🏛️ Official World Bank aggregate: {official.iloc[0]['Official']:,.2f}",
+                              style={'margin': '5px 0', 'fontSize': '14px', 'color': '#666'}))
+    return content
+
 # Callback for showing available years
 @app.callback(
     Output('status-message', 'children', allow_duplicate=True),
@@ -416,11 +690,118 @@ def show_indicator_info(n_clicks, selected_indicator):
                 html.P(info['definition'], style={'lineHeight': '1.6', 'textAlign': 'justify'})
             ]))
         
+        # Provenance from the indexed series metadata
+        for label, field in [("📚 Source", 'source'), ("🔁 Periodicity", 'periodicity'),
+                             ("🧮 Aggregation method", 'aggregation_method'), ("⚖️ License", 'license_type')]:
+            if info.get(field):
+                content.append(html.P(f"{label}: {info[field]}", style={'margin': '6px 0', 'fontSize': '14px'}))
+        
+        series_time_notes = get_series_time_notes(selected_indicator)
+        if series_time_notes:
+            content.append(html.Div([
+                html.P("🗓️ Notes by year:", style={'fontWeight': 'bold', 'margin': '15px 0 5px 0'}),
+                html.Ul([html.Li(f"{year}: {note}") for year, note in sorted(series_time_notes.items())],
+                        style={'fontSize': '14px'})
+            ]))
+        
         return content
     
     except Exception as e:
         return f"❌ Error retrieving indicator info: {str(e)}"
 
+# Callback for showing correlated indicators
+@app.callback(
+    Output('correlation-panel', 'children'),
+    [Input('correlation-button', 'n_clicks')],
+    [State('indicator-dropdown', 'value'),
+     State('year-dropdown', 'value')],
+    prevent_initial_call=True
+)
+def show_correlations(n_clicks, selected_indicator, selected_year):
+    """Show the indicators most correlated with the selection across countries."""
+    if n_clicks == 0 or not selected_indicator:
+        return "Please select an indicator first."
+    
+    try:
+        if not is_ingested():
+            return "⏳ The data store is still being built; try again in a minute."
+        result = correlate_with(selected_indicator, selected_year)
+        if result.empty:
+            return f"❌ Not enough overlapping data to correlate this indicator in {selected_year}"
+        
+        result = add_indicator_names(result.head(config.CORRELATION_RESULTS_LIMIT))
+        return [
+            html.H5(f"🔗 Most correlated indicators across countries ({selected_year})", 
+                    style={'color': '#fd7e14', 'marginBottom': '10px'}),
+            html.Div([
+                html.P([
+                    html.Span(f"{row.Correlation:+.2f} ", 
+                              style={'fontWeight': 'bold', 'color': '#28a745' if row.Correlation > 0 else '#dc3545'}),
+                    f"{row.IndicatorName} ",
+                    html.Span(f"({row.IndicatorCode}, {row.Overlap} countries)", 
+                              style={'fontSize': '12px', 'color': '#666'})
+                ], style={'margin': '4px 0'}) for row in result.itertuples()
+            ]),
+            html.Small(f"Pearson correlation, countries with data for both indicators (minimum {config.MIN_CORRELATION_OVERLAP})", 
+                       style={'color': '#888', 'fontStyle': 'italic'})
+        ]
+    except Exception as e:
+        return f"❌ Error computing correlations: {str(e)}"
+
+# Callback for comparing two indicators on linked or bivariate globes
+@app.callback(
+    [Output('wb-globe-graph', 'figure', allow_duplicate=True),
+     Output('status-message', 'children', allow_duplicate=True)],
+    [Input('compare-button', 'n_clicks')],
+    [State('indicator-dropdown', 'value'),
+     State('compare-indicator-dropdown', 'value'),
+     State('year-dropdown', 'value'),
+     State('compare-mode-radio', 'value')],
+    prevent_initial_call=True
+)
+def show_comparison(n_clicks, selected_indicator, compare_indicator, selected_year, compare_mode):
+    """Show both indicators from a single joined data load."""
+    if n_clicks == 0 or not selected_indicator or not compare_indicator:
+        return {}, "⚠️ Please select two indicators to compare."
+    if selected_indicator == compare_indicator:
+        return {}, "⚠️ Please choose a different second indicator."
+    
+    try:
+        fig = create_comparison_figure(selected_indicator, compare_indicator, selected_year, compare_mode)
+        if fig is None or not fig.data:
+            return {}, f"❌ No overlapping data for these indicators in {selected_year}"
+        
+        if config.COMPACT_FIGURES:
+            fig = encode_compact_figure(fig)
+        
+        view = "Bivariate globe" if compare_mode == 'bivariate' else "Linked globes (rotate either one)"
+        return fig, f"✅ {view}: {selected_indicator} vs {compare_indicator} ({selected_year})"
+    except Exception as e:
+        return {}, f"❌ Error building comparison: {str(e)}"
+
+# Keep the rotation of side-by-side globes in sync without a server round trip
+app.clientside_callback(
+    SYNC_ROTATION_JS,
+    Output('wb-globe-graph', 'figure', allow_duplicate=True),
+    [Input('wb-globe-graph', 'relayoutData')],
+    [State('wb-globe-graph', 'figure')],
+    prevent_initial_call=True
+)
+
+# Load heavy modules and shared data in the background so the server can
+# start accepting requests immediately
+start_warm_up([
+    import_task('pandas'),
+    import_task('plotly.graph_objects'),
+    ('country ISO3 mapping', get_country_iso3_mapping),
+    ('footnote index', ingest_notes),
+    ('indicator metadata', load_metadata_index),
+    ('WDI store', ensure_ingested),
+    ('class breaks', build_class_breaks),
+    ('derived metrics', build_derived_metrics),
+    ('rankings', build_rankings),
+])
+
 # Run the app
 if __name__ == '__main__':
     print("🌍 Starting World Bank Development Indicators 3D Visualization...")
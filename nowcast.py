@@ -0,0 +1,256 @@
+"""
+Nowcasts for the latest years from per-country trends.
+
+Most indicators are published one to three years late, so recent globes are
+sparse. A trend is fitted to the last K observations of every country series
+and projected to the requested year for countries whose latest observation
+is at most NOWCAST_MAX_HORIZON years earlier. Projected values are flagged
+(``Estimated``) and never replace an observed value.
+
+Methods:
+    theil_sen   median of the pairwise slopes, robust to a bad observation
+    linear      ordinary least squares
+
+All series of all indicators are fitted at once: the last K observations form
+a (series x K) matrix and the slopes are reductions along its rows. Positive
+indicators spanning orders of magnitude are fitted on log10 values (constant
+growth rates), and projections are clipped to the indicator's observed range.
+
+``build_trend_fits`` stores the fits for the whole catalog per data
+fingerprint, so a projected globe is only arithmetic on stored slopes;
+indicators missing from the table, or other methods and K, are fitted on
+first use.
+
+Usage:
+    python nowcast.py --build
+    python nowcast.py --indicator SI.POV.DDAY --year 2023 [--method linear] [--observations 6]
+"""
+
+from __future__ import annotations
+
+import argparse
+import time
+from functools import lru_cache
+from typing import Optional
+
+import config
+from startup import lazy_import
+
+pd = lazy_import('pandas')
+np = lazy_import('numpy')
+
+NOWCAST_METHODS = ('theil_sen', 'linear')
+
+FIT_COLUMNS = ['IndicatorCode', 'CountryCode', 'ISO3', 'CountryName', 'Method', 'Observations',
+               'FirstYear', 'LastYear', 'LastValue', 'Slope', 'Intercept', 'LogScale', 'Low', 'High']
+
+def fit_trends(long_df: pd.DataFrame, method: str = config.NOWCAST_METHOD,
+               observations: int = config.NOWCAST_OBSERVATIONS) -> pd.DataFrame:
+    """Fit a trend to the last ``observations`` values of every series of a long-format frame.
+
+    Series are identified by ``IndicatorCode`` (if present) and
+    ``CountryCode``. ``Slope`` is per year and ``Intercept`` is the fitted
+    value in ``LastYear``, both on log10 values when ``LogScale``.
+    """
+    from classification import LOG_SCALE_RATIO
+
+    if method not in NOWCAST_METHODS:
+        raise ValueError(f"Unsupported nowcast method: {method}")
+
+    keys = [column for column in ('IndicatorCode', 'CountryCode', 'ISO3', 'CountryName') if column in long_df.columns]
+    series_keys = [column for column in ('IndicatorCode', 'CountryCode') if column in keys]
+    df = long_df.dropna(subset=['IndicatorValue']).sort_values(series_keys + ['Year'])
+    if 'IndicatorCode' in keys:
+        indicator = df.groupby('IndicatorCode', sort=False).ngroup().to_numpy()
+    else:
+        indicator = np.zeros(len(df), dtype=np.int64)
+
+    # Per-indicator log scale and clipping range, from all observations
+    values = df['IndicatorValue']
+    low = values.groupby(indicator).transform('min').to_numpy()
+    high = values.groupby(indicator).transform('max').to_numpy()
+    log_scale = (low > 0) & (high > low * LOG_SCALE_RATIO)
+
+    # The last K observations of each series with enough of them, oldest first
+    by_series = df.groupby(series_keys, sort=False)
+    from_end = by_series.cumcount(ascending=False).to_numpy()
+    recent = (from_end < observations) & (by_series['Year'].transform('size').to_numpy()
+                                          >= config.NOWCAST_MIN_OBSERVATIONS)
+    df, from_end = df[recent], from_end[recent]
+    low, high, log_scale = low[recent], high[recent], log_scale[recent]
+    series = df.groupby(series_keys, sort=False).ngroup().to_numpy()
+    count = np.bincount(series)
+    first_row = np.r_[0, np.cumsum(count)[:-1]]
+    last_row = first_row + count - 1
+
+    years = df['Year'].to_numpy(dtype=np.float64)
+    y = df['IndicatorValue'].to_numpy(dtype=np.float64)
+    y = np.where(log_scale, np.log10(np.where(log_scale, y, 1.0)), y)
+    x = np.full((len(count), observations), np.nan)
+    z = np.full((len(count), observations), np.nan)
+    column = observations - 1 - from_end
+    x[series, column] = years - years[last_row][series]  # years before the last observation
+    z[series, column] = y
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        if method == 'linear':
+            x_mean = np.nanmean(x, axis=1, keepdims=True)
+            z_mean = np.nanmean(z, axis=1, keepdims=True)
+            slope = np.nansum((x - x_mean) * (z - z_mean), axis=1) / np.nansum((x - x_mean) ** 2, axis=1)
+            intercept = z_mean[:, 0] - slope * x_mean[:, 0]
+        else:
+            i, j = np.triu_indices(observations, 1)
+            slope = np.nanmedian((z[:, j] - z[:, i]) / (x[:, j] - x[:, i]), axis=1)
+            intercept = np.nanmedian(z - slope[:, None] * x, axis=1)
+
+    fits = df.iloc[last_row][keys].reset_index(drop=True)
+    fits['Method'] = method
+    fits['Observations'] = count.astype('int16')
+    fits['FirstYear'] = years[first_row].astype('int16')
+    fits['LastYear'] = years[last_row].astype('int16')
+    fits['LastValue'] = df['IndicatorValue'].to_numpy()[last_row]
+    fits['Slope'] = slope
+    fits['Intercept'] = intercept
+    fits['LogScale'] = log_scale[last_row]
+    fits['Low'] = low[last_row]
+    fits['High'] = high[last_row]
+    return fits[np.isfinite(slope) & np.isfinite(intercept)].reset_index(drop=True)
+
+def project_trends(fits: pd.DataFrame, year: int) -> np.ndarray:
+    """Values of fitted trends in ``year``, clipped to the indicator's observed range."""
+    projected = fits['Intercept'] + fits['Slope'] * (year - fits['LastYear'])
+    projected = projected.where(~fits['LogScale'], 10.0 ** projected)
+    return projected.clip(fits['Low'], fits['High']).to_numpy()
+
+def build_trend_fits(force: bool = False) -> bool:
+    """Fit trends for every series in the store if out of date."""
+    from wdi_store import ensure_ingested, is_derived_table_current, read_store, write_derived_table
+
+    if not force and is_derived_table_current(config.NOWCAST_FITS_FILE):
+        return True
+    if not ensure_ingested():
+        return False
+
+    print(f"Fitting {config.NOWCAST_METHOD} trends to the last {config.NOWCAST_OBSERVATIONS} "
+          f"observations of every series in the WDI store...")
+    start = time.perf_counter()
+    long_df = read_store(columns=['IndicatorCode', 'CountryCode', 'ISO3', 'CountryName', 'Year', 'IndicatorValue'])
+    fits = fit_trends(long_df)
+    path = write_derived_table(fits[FIT_COLUMNS], config.NOWCAST_FITS_FILE)
+    _load_stored_fits.cache_clear()
+    print(f"Saved {len(fits):,} trend fits to {path} in {time.perf_counter() - start:.1f}s")
+    return True
+
+@lru_cache(maxsize=32)
+def _load_stored_fits(indicator_code: str, fingerprint: str) -> pd.DataFrame:
+    from wdi_store import read_derived_table
+
+    return read_derived_table(config.NOWCAST_FITS_FILE, filters=[('IndicatorCode', '==', indicator_code)])
+
+@lru_cache(maxsize=32)
+def _fit_indicator(indicator_code: str, method: str, observations: int, fingerprint: str) -> Optional[pd.DataFrame]:
+    from process_wb_data import load_indicator_time_series
+
+    ts_df = load_indicator_time_series(indicator_code)
+    if ts_df is None or ts_df.empty:
+        return None
+    return fit_trends(ts_df, method, observations)
+
+def get_trend_fits(indicator_code: str, method: str = config.NOWCAST_METHOD,
+                   observations: int = config.NOWCAST_OBSERVATIONS) -> Optional[pd.DataFrame]:
+    """Trend fits of every country of an indicator, stored or fitted once per data fingerprint."""
+    from process_wb_data import get_data_fingerprint
+    from wdi_store import is_derived_table_current
+
+    fingerprint = get_data_fingerprint()
+    if ((method, observations) == (config.NOWCAST_METHOD, config.NOWCAST_OBSERVATIONS)
+            and is_derived_table_current(config.NOWCAST_FITS_FILE, fingerprint)):
+        fits = _load_stored_fits(indicator_code, fingerprint)
+        if not fits.empty:
+            return fits
+    return _fit_indicator(indicator_code, method, observations, fingerprint)
+
+def get_nowcast_slice(indicator_code: str, year: str, method: str = config.NOWCAST_METHOD,
+                      observations: int = config.NOWCAST_OBSERVATIONS,
+                      horizon: int = config.NOWCAST_MAX_HORIZON) -> Optional[pd.DataFrame]:
+    """Observed values for ``year`` plus projections for countries whose data stops earlier.
+
+    ``Estimated`` marks projected rows, which also carry the years of the
+    observations the trend was fitted to (``FirstYear``, ``LastYear``).
+    """
+    from process_wb_data import PROCESSED_COLUMNS, process_indicator_for_year
+
+    year = int(year)
+    observed = process_indicator_for_year(indicator_code, str(year))
+    observed = observed if observed is not None else pd.DataFrame(columns=PROCESSED_COLUMNS)
+    observed = observed.assign(Estimated=False, FirstYear=pd.NA, LastYear=pd.NA)
+
+    fits = get_trend_fits(indicator_code, method, observations)
+    if fits is not None and not fits.empty:
+        lag = year - fits['LastYear']
+        fits = fits[(lag > 0) & (lag <= horizon) & ~fits['ISO3'].isin(observed['ISO3'])]
+
+    frames = [observed] if not observed.empty else []
+    if fits is not None and not fits.empty:
+        projected = fits[['CountryCode', 'ISO3', 'CountryName', 'FirstYear', 'LastYear']].copy()
+        projected['IndicatorValue'] = project_trends(fits, year)
+        projected['Year'] = year
+        projected['Estimated'] = True
+        frames.append(projected)
+    if not frames:
+        return None
+
+    df = pd.concat(frames, ignore_index=True).astype({'FirstYear': 'Int64', 'LastYear': 'Int64'})
+    columns = PROCESSED_COLUMNS + ['Estimated', 'FirstYear', 'LastYear']
+    return df[columns].sort_values('IndicatorValue', ascending=False).reset_index(drop=True)
+
+def describe_estimates(df: pd.DataFrame) -> pd.Series:
+    """Hover lines marking projected values, empty for observed ones."""
+    if not {'Estimated', 'FirstYear', 'LastYear'}.issubset(df.columns):
+        return pd.Series('', index=df.index)
+    trend = '<br>🔮 Projected from the ' + df['FirstYear'].astype(str) + '–' + df['LastYear'].astype(str) + ' trend'
+    return trend.where(df['Estimated'].astype(bool), '')
+
+def main():
+    """Main function for command line usage."""
+    parser = argparse.ArgumentParser(description="Project World Bank indicators to recent years from per-country trends")
+    parser.add_argument("--build", action="store_true",
+                       help="Fit (or refit with --force) trends for every series in the store")
+    parser.add_argument("--force", action="store_true",
+                       help="Refit even if the stored fits are up to date")
+    parser.add_argument("--indicator", type=str,
+                       help="World Bank indicator code: print its nowcast for --year")
+    parser.add_argument("--year", type=str, default=config.DEFAULT_YEAR,
+                       help=f"Year to project to (default: {config.DEFAULT_YEAR})")
+    parser.add_argument("--method", choices=NOWCAST_METHODS, default=config.NOWCAST_METHOD,
+                       help=f"Trend fit (default: {config.NOWCAST_METHOD})")
+    parser.add_argument("--observations", type=int, default=config.NOWCAST_OBSERVATIONS,
+                       help=f"Latest observations per country to fit (default: {config.NOWCAST_OBSERVATIONS})")
+    parser.add_argument("--horizon", type=int, default=config.NOWCAST_MAX_HORIZON,
+                       help=f"Most years to project past a country's latest observation "
+                            f"(default: {config.NOWCAST_MAX_HORIZON})")
+    parser.add_argument("--top", type=int, default=15,
+                       help="Projected countries to print (default: 15)")
+
+    args = parser.parse_args()
+
+    if args.build:
+        build_trend_fits(args.force)
+
+    if args.indicator:
+        start = time.perf_counter()
+        df = get_nowcast_slice(args.indicator, args.year, args.method, args.observations, args.horizon)
+        if df is None:
+            print(f"No data or trends for {args.indicator}")
+        else:
+            projected = df[df['Estimated']]
+            print(f"\n{args.indicator} in {args.year}: {len(df) - len(projected)} observed, "
+                  f"{len(projected)} projected ({time.perf_counter() - start:.3f}s)")
+            for row in projected.head(args.top).itertuples():
+                print(f"  {row.ISO3}: {row.IndicatorValue:,.2f}  (trend of {row.FirstYear}-{row.LastYear})")
+
+    if not (args.build or args.indicator):
+        parser.print_help()
+
+if __name__ == "__main__":
+    main()
@@ -1,19 +1,44 @@
-import pandas as pd
-import pycountry
-import numpy as np
+from __future__ import annotations
+
+import hashlib
 import os
 import argparse
-from typing import Dict, List, Optional, Tuple
+from functools import lru_cache
+from typing import Dict, List, Optional, Tuple, Union
 import config
+from startup import lazy_import, timed
+
+# Heavy dependencies are imported on first use to keep app startup fast
+pd = lazy_import('pandas')
+pycountry = lazy_import('pycountry')
+
+def ensure_data_dir() -> None:
+    """Create the directory for processed files if it does not exist."""
+    os.makedirs(config.DATA_DIR, exist_ok=True)
 
-# Ensure the directory for saving files exists
-if not os.path.exists(config.DATA_DIR):
-    os.makedirs(config.DATA_DIR)
+# Columns of a processed (indicator, year) slice
+PROCESSED_COLUMNS = ['CountryCode', 'ISO3', 'CountryName', 'IndicatorValue', 'Year']
+
+# Country mapping is expensive (fuzzy name search), so build it once per process
+_COUNTRY_MAPPING_CACHE: Optional[Dict[str, str]] = None
 
 def get_country_iso3_mapping() -> Dict[str, str]:
     """Create mapping from country codes to ISO3 codes using pycountry."""
+    global _COUNTRY_MAPPING_CACHE
+    if _COUNTRY_MAPPING_CACHE:
+        return _COUNTRY_MAPPING_CACHE
+    
     print("Creating country code to ISO3 mapping...")
     
+    with timed('country ISO3 mapping'):
+        country_mapping = _build_country_iso3_mapping()
+    
+    if country_mapping:
+        _COUNTRY_MAPPING_CACHE = country_mapping
+    return country_mapping
+
+def _build_country_iso3_mapping() -> Dict[str, str]:
+    """Map every non-aggregate WDI country code to an ISO3 code."""
     # Load WDI country data
     try:
         country_df = pd.read_csv(config.WDI_COUNTRY_FILE)
@@ -79,20 +104,86 @@ def get_country_name_from_iso3(iso3_code: str) -> str:
     except (LookupError, AttributeError):
         return iso3_code
 
+def get_year_columns(df: pd.DataFrame) -> List[str]:
+    """Return the four-digit year columns of a wide-format WDI frame."""
+    return [col for col in df.columns if col.isdigit() and len(col) == 4]
+
+@lru_cache(maxsize=64)
+def _load_indicator_rows(indicator_code: str, fingerprint: str) -> Optional[pd.DataFrame]:
+    """Rows of one indicator streamed from the main data file (cached per data fingerprint)."""
+    print("Loading WDI main data file...")
+    with timed(f'main data rows for {indicator_code}'):
+        matches = [
+            chunk[chunk['Indicator Code'] == indicator_code]
+            for chunk in pd.read_csv(config.WDI_MAIN_DATA_FILE, chunksize=config.CSV_CHUNK_SIZE)
+        ]
+        indicator_df = pd.concat(matches, ignore_index=True)
+    if indicator_df.empty:
+        print(f"No data found for indicator {indicator_code}")
+        return None
+    return indicator_df
+
+def load_indicator_rows(indicator_code: str) -> Optional[pd.DataFrame]:
+    """Load the wide-format rows of the main data file for a single indicator.
+    
+    The main file is streamed in chunks so only the matching rows are kept in
+    memory, and the result is cached for the most recently used indicators of
+    the current data fingerprint, so repeated per-year lookups for the same
+    indicator do not parse the file again.
+    """
+    indicator_df = _load_indicator_rows(indicator_code, get_data_fingerprint())
+    return None if indicator_df is None else indicator_df.copy()
+
+def tidy_indicator_rows(indicator_df: pd.DataFrame, years: List[str]) -> pd.DataFrame:
+    """Reshape wide indicator rows into long format for the given years.
+    
+    Regional aggregates, missing values and countries without an ISO3 code are
+    dropped. The result has one row per (country, year) with the same columns
+    as the per-year processed files.
+    """
+    year_columns = [year for year in years if year in indicator_df.columns]
+    long_df = indicator_df.melt(
+        id_vars=['Country Code'],
+        value_vars=year_columns,
+        var_name='Year',
+        value_name='IndicatorValue'
+    ).dropna(subset=['IndicatorValue'])
+    long_df = long_df[~long_df['Country Code'].isin(config.REGIONAL_AGGREGATES)]
+    
+    country_mapping = get_country_iso3_mapping()
+    long_df['ISO3'] = long_df['Country Code'].map(country_mapping)
+    long_df = long_df.dropna(subset=['ISO3'])
+    
+    # Resolve each country name once rather than once per (country, year)
+    country_names = {iso3: get_country_name_from_iso3(iso3) for iso3 in long_df['ISO3'].unique()}
+    
+    return pd.DataFrame({
+        'CountryCode': long_df['Country Code'],
+        'ISO3': long_df['ISO3'],
+        'CountryName': long_df['ISO3'].map(country_names),
+        'IndicatorValue': long_df['IndicatorValue'].astype(float),
+        'Year': long_df['Year'].astype(int)
+    }).reset_index(drop=True)
+
 def load_and_process_indicator_data(indicator_code: str, year: str) -> Optional[pd.DataFrame]:
     """Load and process World Bank indicator data for a specific indicator and year."""
     print(f"\\nProcessing indicator {indicator_code} for year {year}...")
     
     try:
-        # Load main WDI data
-        print("Loading WDI main data file...")
-        df = pd.read_csv(config.WDI_MAIN_DATA_FILE)
-        print(f"Loaded {len(df)} rows from main data file")
+        # Read straight from the columnar store when it is current
+        from wdi_store import is_ingested, read_store
+        if is_ingested():
+            result_df = read_store(indicators=[indicator_code], years=[int(year)],
+                                   columns=PROCESSED_COLUMNS)
+            if result_df.empty:
+                print(f"No valid data points found for {indicator_code} in {year}")
+                return None
+            print(f"Loaded {len(result_df)} countries from the WDI store")
+            return result_df.sort_values('IndicatorValue', ascending=False)
         
-        # Filter for specific indicator
-        indicator_df = df[df['Indicator Code'] == indicator_code].copy()
-        if indicator_df.empty:
-            print(f"No data found for indicator {indicator_code}")
+        # Load the rows for this indicator only
+        indicator_df = load_indicator_rows(indicator_code)
+        if indicator_df is None:
             return None
         
         print(f"Found {len(indicator_df)} countries with data for {indicator_code}")
@@ -102,46 +193,12 @@ def load_and_process_indicator_data(indicator_code: str, year: str) -> Optional[
             print(f"Year {year} not available in dataset")
             return None
         
-        # Create country mapping
-        country_mapping = get_country_iso3_mapping()
+        result_df = tidy_indicator_rows(indicator_df, [year])
         
-        # Process the data
-        processed_data = []
-        
-        for _, row in indicator_df.iterrows():
-            wb_code = row['Country Code']
-            wb_name = row['Country Name']
-            value = row[year]
-            
-            # Skip if no value for this year
-            if pd.isna(value):
-                continue
-            
-            # Skip regional aggregates
-            if wb_code in config.REGIONAL_AGGREGATES:
-                continue
-            
-            # Get ISO3 code
-            iso3_code = country_mapping.get(wb_code)
-            if not iso3_code:
-                continue
-            
-            # Get country name from ISO3
-            country_name = get_country_name_from_iso3(iso3_code)
-            
-            processed_data.append({
-                'CountryCode': wb_code,
-                'ISO3': iso3_code,
-                'CountryName': country_name,
-                'IndicatorValue': float(value),
-                'Year': int(year)
-            })
-        
-        if not processed_data:
+        if result_df.empty:
             print(f"No valid data points found for {indicator_code} in {year}")
             return None
         
-        result_df = pd.DataFrame(processed_data)
         result_df = result_df.sort_values('IndicatorValue', ascending=False)
         
         print(f"Successfully processed {len(result_df)} countries with valid data")
@@ -154,50 +211,52 @@ def load_and_process_indicator_data(indicator_code: str, year: str) -> Optional[
         print(f"Error processing indicator data: {e}")
         return None
 
+INDICATOR_INFO_FIELDS = ('name', 'unit', 'topic', 'definition', 'source',
+                         'periodicity', 'aggregation_method', 'license_type')
+
 def get_indicator_info(indicator_code: str) -> Dict[str, str]:
-    """Get indicator information from WDI series file."""
+    """Get indicator information from the indexed series metadata.
+    
+    Returns the fields used by the panels; the full record is available from
+    ``wdi_metadata.get_series_metadata``.
+    """
     try:
-        series_df = pd.read_csv(config.WDI_SERIES_FILE)
-        indicator_info = series_df[series_df['Series Code'] == indicator_code]
-        
-        if not indicator_info.empty:
-            row = indicator_info.iloc[0]
-            
-            # Helper function to safely get string values, handling NaN
-            def safe_get_str(column_name, default=''):
-                value = row.get(column_name, default)
-                if pd.isna(value):
-                    return default
-                return str(value)
-            
-            return {
-                'name': safe_get_str('Indicator Name', indicator_code),
-                'unit': safe_get_str('Unit of measure', ''),
-                'topic': safe_get_str('Topic', ''),
-                'definition': safe_get_str('Short definition', '')
-            }
+        from wdi_metadata import get_series_metadata
+        record = get_series_metadata(indicator_code)
+        if record:
+            info = {field: str(record.get(field) or '') for field in INDICATOR_INFO_FIELDS}
+            info['name'] = info['name'] or indicator_code
+            return info
     except Exception as e:
         print(f"Warning: Could not load indicator info: {e}")
     
-    return {
-        'name': indicator_code,
-        'unit': '',
-        'topic': '',
-        'definition': ''
-    }
+    info = {field: '' for field in INDICATOR_INFO_FIELDS}
+    info['name'] = indicator_code
+    return info
 
 def get_available_years_for_indicator(indicator_code: str) -> List[str]:
-    """Get list of years with data for a specific indicator."""
+    """Get list of years with data for a specific indicator.
+    
+    Answered from the store's summary table when it is current, otherwise
+    from the indicator's rows of the main data file.
+    """
+    from wdi_store import is_ingested, load_summary_tables
+    
     try:
-        df = pd.read_csv(config.WDI_MAIN_DATA_FILE)
-        indicator_df = df[df['Indicator Code'] == indicator_code]
+        if is_ingested():
+            summary = load_summary_tables()['summary']
+            if indicator_code not in summary.index:
+                return []
+            counts = summary.loc[indicator_code, 'Count']
+            return sorted(str(year) for year, count in counts.items() if count > 0)
         
-        if indicator_df.empty:
+        indicator_df = load_indicator_rows(indicator_code)
+        
+        if indicator_df is None:
             return []
         
         # Check which year columns have data
-        year_columns = [col for col in indicator_df.columns 
-                       if col.isdigit() and len(col) == 4]
+        year_columns = get_year_columns(indicator_df)
         
         available_years = []
         for year in year_columns:
@@ -213,10 +272,12 @@ def save_processed_data(df: pd.DataFrame, indicator_code: str, year: str) -> str
     """Save processed data to CSV file."""
     filename = config.PROCESSED_INDICATOR_FILE_TEMPLATE.format(
         indicator_code=indicator_code.replace('.', '_'), 
-        year=year
+        year=year,
+        fingerprint=get_data_fingerprint()
     )
     filepath = os.path.join(config.DATA_DIR, filename)
     
+    ensure_data_dir()
     df.to_csv(filepath, index=False)
     print(f"Saved processed data to {filepath}")
     return filepath
@@ -225,7 +286,8 @@ def load_processed_data(indicator_code: str, year: str) -> Optional[pd.DataFrame
     """Load processed data from CSV file if it exists."""
     filename = config.PROCESSED_INDICATOR_FILE_TEMPLATE.format(
         indicator_code=indicator_code.replace('.', '_'), 
-        year=year
+        year=year,
+        fingerprint=get_data_fingerprint()
     )
     filepath = os.path.join(config.DATA_DIR, filename)
     
@@ -234,8 +296,23 @@ def load_processed_data(indicator_code: str, year: str) -> Optional[pd.DataFrame
         return pd.read_csv(filepath)
     return None
 
-def process_indicator_for_year(indicator_code: str, year: str, force_refresh: bool = False) -> Optional[pd.DataFrame]:
-    """Process an indicator for a specific year, with caching."""
+def process_indicator_for_year(indicator_code: str, year: str, force_refresh: bool = False,
+                               gap_fill: Optional[str] = None,
+                               window: int = config.GAP_FILL_WINDOW,
+                               vintage: Optional[str] = None) -> Optional[pd.DataFrame]:
+    """Process an indicator for a specific year, with caching.
+    
+    With ``gap_fill`` set to ``'latest'`` or ``'interpolate'``, countries
+    without a value in ``year`` are filled from observations up to ``window``
+    years away (see ``fill_indicator_gaps``). With ``vintage``, the data is
+    read as published in that stored release (see ``wdi_vintages``).
+    """
+    if vintage:
+        from wdi_vintages import process_vintage_slice
+        return process_vintage_slice(indicator_code, year, vintage, gap_fill, window)
+    
+    if gap_fill:
+        return process_gap_filled_slice(indicator_code, year, gap_fill, window, force_refresh)
     
     # Try to load cached data first
     if not force_refresh:
@@ -250,24 +327,211 @@ def process_indicator_for_year(indicator_code: str, year: str, force_refresh: bo
     
     return df
 
-def get_indicator_summary_stats(df: pd.DataFrame, indicator_code: str) -> Dict:
-    """Calculate summary statistics for an indicator."""
+def fill_indicator_gaps(ts_df: pd.DataFrame, year: str, mode: str = 'latest',
+                        window: int = config.GAP_FILL_WINDOW) -> pd.DataFrame:
+    """Build a slice for ``year`` from a long-format time series, filling gaps.
+    
+    ``'latest'`` takes each country's most recent value from the ``window``
+    years up to and including ``year``. ``'interpolate'`` additionally
+    interpolates linearly between the last observation before ``year`` and
+    the first one after it, when both lie within ``window`` years; countries
+    with no later observation fall back to their latest value.
+    
+    ``SourceYear`` records the year each value comes from and ``GapFill`` is
+    one of ``'observed'``, ``'latest'`` or ``'interpolated'``.
+    """
+    if mode not in config.GAP_FILL_MODES:
+        raise ValueError(f"Unsupported gap fill mode: {mode}")
+    
+    year = int(year)
+    ts_df = ts_df.sort_values('Year')
+    
+    before = ts_df[ts_df['Year'].between(year - window, year)]
+    result = before.groupby('ISO3', sort=False).last().reset_index()
+    result['SourceYear'] = result['Year']
+    result['GapFill'] = 'latest'
+    result.loc[result['SourceYear'] == year, 'GapFill'] = 'observed'
+    
+    if mode == 'interpolate':
+        after = ts_df[ts_df['Year'].between(year + 1, year + window)]
+        after = after.groupby('ISO3', sort=False)[['Year', 'IndicatorValue']].first()
+        after = after.rename(columns={'Year': 'NextYear', 'IndicatorValue': 'NextValue'})
+        result = result.join(after, on='ISO3')
+        
+        bracketed = (result['GapFill'] == 'latest') & result['NextYear'].notna()
+        fraction = (year - result['SourceYear']) / (result['NextYear'] - result['SourceYear'])
+        result['IndicatorValue'] = result['IndicatorValue'].where(
+            ~bracketed, result['IndicatorValue'] + (result['NextValue'] - result['IndicatorValue']) * fraction
+        )
+        result.loc[bracketed, 'SourceYear'] = year
+        result.loc[bracketed, 'GapFill'] = 'interpolated'
+    
+    result['Year'] = year
+    result['SourceYear'] = result['SourceYear'].astype(int)
+    return result[PROCESSED_COLUMNS + ['SourceYear', 'GapFill']].sort_values(
+        'IndicatorValue', ascending=False
+    ).reset_index(drop=True)
+
+def process_gap_filled_slice(indicator_code: str, year: str, mode: str = 'latest',
+                             window: int = config.GAP_FILL_WINDOW,
+                             force_refresh: bool = False) -> Optional[pd.DataFrame]:
+    """Gap-filled slice of an indicator for a year, cached like the exact slices."""
+    filename = config.PROCESSED_GAP_FILLED_FILE_TEMPLATE.format(
+        indicator_code=indicator_code.replace('.', '_'),
+        year=year,
+        mode=mode,
+        window=window,
+        fingerprint=get_data_fingerprint()
+    )
+    filepath = os.path.join(config.DATA_DIR, filename)
+    
+    if not force_refresh and os.path.exists(filepath):
+        print(f"Loading cached gap-filled data from {filepath}")
+        return pd.read_csv(filepath)
+    
+    ts_df = load_indicator_time_series(indicator_code)
+    if ts_df is None or ts_df.empty:
+        return None
+    
+    df = fill_indicator_gaps(ts_df, year, mode, window)
     if df.empty:
+        print(f"No values within {window} years of {year} for {indicator_code}")
+        return None
+    
+    filled = int((df['GapFill'] != 'observed').sum())
+    print(f"Gap-filled {filled} of {len(df)} countries for {indicator_code} in {year} ({mode}, {window} years)")
+    ensure_data_dir()
+    df.to_csv(filepath, index=False)
+    print(f"Saved processed data to {filepath}")
+    return df
+
+def load_indicator_time_series(indicator_code: str, years: Optional[List[str]] = None,
+                               force_refresh: bool = False) -> Optional[pd.DataFrame]:
+    """Load an indicator in long format for many years from a single read.
+    
+    All years are processed together and cached to one file per indicator, so
+    building a multi-year view never triggers per-year file I/O. Pass ``years``
+    to restrict the result; by default every available year is returned.
+    """
+    filename = config.PROCESSED_TIMESERIES_FILE_TEMPLATE.format(
+        indicator_code=indicator_code.replace('.', '_'),
+        fingerprint=get_data_fingerprint()
+    )
+    filepath = os.path.join(config.DATA_DIR, filename)
+    
+    ts_df = None
+    if not force_refresh and os.path.exists(filepath):
+        print(f"Loading cached time series from {filepath}")
+        ts_df = pd.read_csv(filepath)
+    
+    if ts_df is None:
+        from wdi_store import is_ingested, read_store
+        if is_ingested():
+            ts_df = read_store(indicators=[indicator_code], columns=PROCESSED_COLUMNS)
+            ts_df = ts_df.sort_values(['Year', 'IndicatorValue'], ascending=[True, False])
+            if years is not None:
+                ts_df = ts_df[ts_df['Year'].isin([int(year) for year in years])]
+            return ts_df.reset_index(drop=True) if not ts_df.empty else None
+        
+        try:
+            indicator_df = load_indicator_rows(indicator_code)
+        except FileNotFoundError as e:
+            print(f"Error: Could not find required data file: {e}")
+            return None
+        if indicator_df is None:
+            return None
+        
+        ts_df = tidy_indicator_rows(indicator_df, get_year_columns(indicator_df))
+        ts_df = ts_df.sort_values(['Year', 'IndicatorValue'], ascending=[True, False])
+        ensure_data_dir()
+        ts_df.to_csv(filepath, index=False)
+        print(f"Saved time series with {len(ts_df)} rows to {filepath}")
+    
+    if years is not None:
+        ts_df = ts_df[ts_df['Year'].isin([int(year) for year in years])]
+    
+    return ts_df.reset_index(drop=True)
+
+def select_top_countries(ts_df: pd.DataFrame, country_limit: int = 20,
+                         rank_by: Union[str, int] = 'latest') -> List[str]:
+    """Pick the ISO3 codes of the top countries in a long-format time series.
+    
+    ``rank_by`` is either a year, ``'latest'`` for each country's most recent
+    non-null value, or an aggregate across the years present: ``'mean'``,
+    ``'median'``, ``'min'`` or ``'max'``.
+    """
+    if ts_df.empty:
+        return []
+    
+    rank_by = str(rank_by)
+    if rank_by.isdigit():
+        scores = ts_df[ts_df['Year'] == int(rank_by)].set_index('ISO3')['IndicatorValue']
+    elif rank_by == 'latest':
+        scores = ts_df.sort_values('Year').groupby('ISO3')['IndicatorValue'].last()
+    elif rank_by in ('mean', 'median', 'min', 'max'):
+        scores = ts_df.groupby('ISO3')['IndicatorValue'].agg(rank_by)
+    else:
+        raise ValueError(f"Unsupported rank_by value: {rank_by}")
+    
+    return scores.nlargest(country_limit).index.tolist()
+
+DATA_FINGERPRINT_FILES = (config.WDI_MAIN_DATA_FILE, config.WDI_COUNTRY_FILE, config.WDI_SERIES_FILE)
+
+def get_data_fingerprint(paths: Tuple[str, ...] = DATA_FINGERPRINT_FILES) -> str:
+    """Short hash identifying the current version of the source data files.
+    
+    Built from file sizes, modification times and the processing version, so
+    it is cheap to compute on every request and changes whenever a new WDI
+    release is dropped in. Pass ``paths`` to fingerprint other source files.
+    """
+    parts = [f"v{config.DATA_PROCESSING_VERSION}"]
+    for path in paths:
+        try:
+            stat = os.stat(path)
+            parts.append(f"{path}:{stat.st_size}:{stat.st_mtime_ns}")
+        except FileNotFoundError:
+            parts.append(f"{path}:missing")
+    return hashlib.sha1("|".join(parts).encode('utf-8')).hexdigest()[:16]
+
+def get_indicator_summary_stats(df: Optional[pd.DataFrame], indicator_code: str,
+                                year: Optional[str] = None) -> Dict:
+    """Calculate summary statistics for an indicator.
+    
+    When ``year`` is given and the WDI store has been ingested, the
+    precomputed statistics are returned without touching ``df`` (which may
+    then be None). Otherwise they are computed from ``df``, which must be
+    sorted by value in descending order like the processed slices.
+    """
+    if year is not None:
+        from wdi_store import get_summary_stats
+        stats = get_summary_stats(indicator_code, year)
+        if stats is not None:
+            return stats
+    
+    if df is None or df.empty:
         return {}
     
+    values = df['IndicatorValue']
+    ranked_columns = ['ISO3', 'CountryName', 'IndicatorValue']
     return {
         'count': len(df),
-        'mean': df['IndicatorValue'].mean(),
-        'median': df['IndicatorValue'].median(),
-        'std': df['IndicatorValue'].std(),
-        'min': df['IndicatorValue'].min(),
-        'max': df['IndicatorValue'].max(),
+        'mean': values.mean(),
+        'median': values.median(),
+        'std': values.std(),
+        'min': values.min(),
+        'max': values.max(),
+        'q25': values.quantile(0.25),
+        'q75': values.quantile(0.75),
         'top_country': df.iloc[0]['CountryName'] if not df.empty else '',
-        'top_value': df.iloc[0]['IndicatorValue'] if not df.empty else 0
+        'top_value': df.iloc[0]['IndicatorValue'] if not df.empty else 0,
+        'top_10': df.head(10)[ranked_columns].to_dict('records'),
+        'bottom_10': df.tail(10)[::-1][ranked_columns].to_dict('records')
     }
 
 def main():
     """Main function for command line usage."""
+    from profiling import add_profile_argument, profiled
+
     parser = argparse.ArgumentParser(description="Process World Bank indicator data for 3D visualization")
     parser.add_argument("--indicator", type=str, required=True, 
                        help="World Bank indicator code (e.g., NY.GDP.PCAP.CD)")
@@ -275,27 +539,32 @@ def main():
                        help="Year to process (default: 2023)")
     parser.add_argument("--force", action="store_true",
                        help="Force refresh of cached data")
+    parser.add_argument("--vintage", type=str, default=None,
+                       help="Read the data as of a stored release (see wdi_vintages.py)")
+    add_profile_argument(parser)
     
     args = parser.parse_args()
     
     print(f"Processing indicator: {args.indicator}")
     print(f"Year: {args.year}")
     
-    # Get indicator info
-    info = get_indicator_info(args.indicator)
-    print(f"Indicator name: {info['name']}")
-    
-    # Process data
-    df = process_indicator_for_year(args.indicator, args.year, args.force)
-    
-    if df is not None:
-        stats = get_indicator_summary_stats(df, args.indicator)
-        print(f"\\nSummary Statistics:")
-        print(f"Countries with data: {stats['count']}")
-        print(f"Mean value: {stats['mean']:.2f}")
-        print(f"Top country: {stats['top_country']} ({stats['top_value']:.2f})")
-    else:
-        print("Failed to process data")
+    with profiled('process_wb_data', {'indicator': args.indicator, 'year': args.year},
+                  mode=args.profile, enabled=args.profile is not None):
+        # Get indicator info
+        info = get_indicator_info(args.indicator)
+        print(f"Indicator name: {info['name']}")
+        
+        # Process data
+        df = process_indicator_for_year(args.indicator, args.year, args.force, vintage=args.vintage)
+        
+        if df is not None:
+            stats = get_indicator_summary_stats(df, args.indicator, args.year)
+            print(f"\\nSummary Statistics:")
+            print(f"Countries with data: {stats['count']}")
+            print(f"Mean value: {stats['mean']:.2f}")
+            print(f"Top country: {stats['top_country']} ({stats['top_value']:.2f})")
+        else:
+            print("Failed to process data")
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,295 @@
+"""
+On-demand profiling of single requests and CLI runs, with flamegraph output.
+
+A profile follows one thread: either by sampling its stack every
+``config.PROFILE_INTERVAL`` seconds from a background thread ('sample'), or
+by recording every call and return in it ('trace', exact but slower; its
+time is summed per call stack, so the flame chart is not in time order). The
+result is written as a speedscope file (open it at https://www.speedscope.app)
+or as collapsed stacks for flamegraph.pl, named after the indicator, year and
+request id.
+
+On the Dash server, ``install_request_profiling(server)`` profiles:
+
+- every request, with WDI_PROFILE=1
+- a random share of requests, with WDI_PROFILE_RATE (e.g. 0.01)
+- requests sending the ``X-WDI-Profile`` header ('1', 'sample' or 'trace'),
+  with WDI_PROFILE_HEADER=1
+
+With none of these set no hook is registered, so requests run exactly as
+without profiling. The CLIs of process_wb_data.py and wb_globe.py take
+``--profile``.
+
+Usage:
+    WDI_PROFILE_RATE=0.05 python main_app.py
+    curl -H "X-WDI-Profile: trace" http://127.0.0.1:8050/api/figure/SP.POP.TOTL/2020
+    python wb_globe.py --indicator SP.POP.TOTL --year 2020 --profile
+"""
+
+import json
+import os
+import random
+import re
+import sys
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Optional, Tuple
+
+import config
+
+PROFILE_MODES = ('sample', 'trace')
+PROFILE_FORMATS = ('speedscope', 'collapsed')
+
+# Dash controls whose values tag a profile of a callback request
+TAG_COMPONENTS = {'indicator-dropdown': 'indicator', 'year-dropdown': 'year'}
+
+FrameKey = Tuple[str, str, int]
+
+class Profiler:
+    """Sampling or tracing profiler of a single thread.
+
+    Collects ``(stack, seconds)`` pairs, where a stack is a tuple of indexes
+    into ``frames`` from the outermost call inwards: time-ordered when
+    sampling, one per distinct stack when tracing.
+    """
+
+    def __init__(self, mode: str = config.PROFILE_MODE, interval: float = config.PROFILE_INTERVAL,
+                 thread_id: Optional[int] = None):
+        if mode not in PROFILE_MODES:
+            raise ValueError(f"Unsupported profile mode: {mode}")
+        self.mode = mode
+        self.interval = interval
+        self.thread_id = thread_id or threading.get_ident()
+        self.frames: List[FrameKey] = []
+        self.samples: List[Tuple[Tuple[int, ...], float]] = []
+        self.seconds = 0.0
+        self._frame_index: Dict[FrameKey, int] = {}
+        self._stop = threading.Event()
+        self._sampler: Optional[threading.Thread] = None
+        self._start = 0.0
+        self._last = 0.0
+        # Trace mode: the current stack as ids of nodes in a call tree, each
+        # keyed on (parent node, frame), with the time spent in each node
+        self._stack: List[int] = []
+        self._nodes: Dict[Tuple[int, int], int] = {}
+        self._node_stacks: List[Tuple[int, ...]] = []
+        self._node_seconds: List[float] = []
+
+    def _frame_id(self, key: FrameKey) -> int:
+        index = self._frame_index.get(key)
+        if index is None:
+            index = self._frame_index[key] = len(self.frames)
+            self.frames.append(key)
+        return index
+
+    def _code_id(self, code) -> int:
+        return self._frame_id((getattr(code, 'co_qualname', code.co_name), code.co_filename, code.co_firstlineno))
+
+    def _add_sample(self, stack: Tuple[int, ...], seconds: float) -> None:
+        # Consecutive identical stacks are merged to keep the file small
+        if self.samples and self.samples[-1][0] == stack:
+            self.samples[-1] = (stack, self.samples[-1][1] + seconds)
+        else:
+            self.samples.append((stack, seconds))
+
+    def _sample(self) -> None:
+        last = time.perf_counter()
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            now = time.perf_counter()
+            stack = []
+            while frame is not None:
+                stack.append(self._code_id(frame.f_code))
+                frame = frame.f_back
+            self._add_sample(tuple(reversed(stack)), now - last)
+            last = now
+
+    def _push(self, frame_id: int) -> None:
+        parent = self._stack[-1] if self._stack else -1
+        node = self._nodes.get((parent, frame_id))
+        if node is None:
+            node = self._nodes[(parent, frame_id)] = len(self._node_stacks)
+            parent_stack = self._node_stacks[parent] if parent >= 0 else ()
+            self._node_stacks.append(parent_stack + (frame_id,))
+            self._node_seconds.append(0.0)
+        self._stack.append(node)
+
+    def _trace(self, frame, event: str, arg) -> None:
+        now = time.perf_counter()
+        if self._stack:
+            self._node_seconds[self._stack[-1]] += now - self._last
+        self._last = now
+        if event == 'call':
+            self._push(self._code_id(frame.f_code))
+        elif event == 'c_call':
+            name = getattr(arg, '__qualname__', None) or repr(arg)
+            self._push(self._frame_id((name, '<built-in>', 0)))
+        elif self._stack and event in ('return', 'c_return', 'c_exception'):
+            self._stack.pop()
+
+    def start(self) -> 'Profiler':
+        self._start = self._last = time.perf_counter()
+        if self.mode == 'trace':
+            if self.thread_id != threading.get_ident():
+                raise ValueError("Trace profiling must be started in the profiled thread")
+            sys.setprofile(self._trace)
+        else:
+            self._sampler = threading.Thread(target=self._sample, name='profiler', daemon=True)
+            self._sampler.start()
+        return self
+
+    def stop(self) -> 'Profiler':
+        if self.mode == 'trace':
+            sys.setprofile(None)
+            self.samples = [(stack, seconds) for stack, seconds in zip(self._node_stacks, self._node_seconds)
+                            if seconds > 0]
+        elif self._sampler is not None:
+            self._stop.set()
+            self._sampler.join()
+        self.seconds = time.perf_counter() - self._start
+        return self
+
+    def to_speedscope(self, name: str) -> Dict:
+        """The profile in speedscope's file format (one sampled profile, weighted by time)."""
+        return {
+            '$schema': 'https://www.speedscope.app/file-format-schema.json',
+            'name': name,
+            'exporter': 'WDI_3d profiling.py',
+            'shared': {'frames': [{'name': frame_name, 'file': filename, 'line': line}
+                                  for frame_name, filename, line in self.frames]},
+            'profiles': [{
+                'type': 'sampled',
+                'name': name,
+                'unit': 'seconds',
+                'startValue': 0,
+                'endValue': sum(seconds for _, seconds in self.samples),
+                'samples': [list(stack) for stack, _ in self.samples],
+                'weights': [seconds for _, seconds in self.samples]
+            }]
+        }
+
+    def to_collapsed(self) -> str:
+        """The profile as collapsed stacks (``a;b;c microseconds``) for flamegraph.pl."""
+        totals: Dict[Tuple[int, ...], float] = {}
+        for stack, seconds in self.samples:
+            totals[stack] = totals.get(stack, 0.0) + seconds
+        lines = []
+        for stack, seconds in totals.items():
+            names = ';'.join(f"{self.frames[i][0]} ({os.path.basename(self.frames[i][1])}:{self.frames[i][2]})"
+                             for i in stack)
+            if names and seconds >= 1e-6:
+                lines.append(f"{names} {int(round(seconds * 1e6))}")
+        return "\n".join(lines) + "\n"
+
+def write_profile(profiler: Profiler, name: str, tags: Dict[str, Optional[str]],
+                  fmt: str = config.PROFILE_FORMAT, out_dir: str = config.PROFILE_DIR) -> str:
+    """Write a finished profile to ``out_dir``; returns its path."""
+    if fmt not in PROFILE_FORMATS:
+        raise ValueError(f"Unsupported profile format: {fmt}")
+
+    os.makedirs(out_dir, exist_ok=True)
+    parts = [time.strftime('%Y%m%dT%H%M%S'), name] + [str(value) for value in tags.values() if value]
+    stem = re.sub(r'[^A-Za-z0-9_.-]+', '_', '_'.join(parts))
+    if fmt == 'speedscope':
+        path = os.path.join(out_dir, f"{stem}.speedscope.json")
+        title = f"{name} " + " ".join(f"{key}={value}" for key, value in tags.items() if value)
+        with open(path, 'w') as f:
+            json.dump(profiler.to_speedscope(title.strip()), f)
+    else:
+        path = os.path.join(out_dir, f"{stem}.collapsed.txt")
+        with open(path, 'w') as f:
+            f.write(profiler.to_collapsed())
+    return path
+
+@contextmanager
+def profiled(name: str, tags: Optional[Dict[str, Optional[str]]] = None, mode: Optional[str] = None,
+             enabled: bool = True) -> Iterator[Optional[Profiler]]:
+    """Profile the wrapped block and write the result when it exits.
+
+    With ``enabled`` False the block runs unprofiled.
+    """
+    if not enabled:
+        yield None
+        return
+
+    profiler = Profiler(mode or config.PROFILE_MODE).start()
+    try:
+        yield profiler
+    finally:
+        profiler.stop()
+        path = write_profile(profiler, name, tags or {})
+        print(f"Profile ({profiler.mode}, {profiler.seconds:.2f}s) written to {path}")
+
+def add_profile_argument(parser) -> None:
+    """Add the ``--profile [MODE]`` option of the CLIs."""
+    parser.add_argument("--profile", nargs='?', const=config.PROFILE_MODE, choices=PROFILE_MODES,
+                        default=config.PROFILE_MODE if config.PROFILE_ENABLED else None,
+                        help=f"Profile the run and write a flamegraph file to {config.PROFILE_DIR}/ "
+                             f"(mode: sample or trace; default: {config.PROFILE_MODE})")
+
+def _request_tags(request) -> Dict[str, Optional[str]]:
+    """Indicator and year of a request, from the URL or the callback's control values."""
+    args = request.view_args or {}
+    tags = {'indicator': args.get('indicator_code'), 'year': args.get('year')}
+    if request.path.endswith('_dash-update-component'):
+        payload = request.get_json(silent=True) or {}
+        for item in payload.get('state', []) + payload.get('inputs', []):
+            if isinstance(item, dict) and item.get('id') in TAG_COMPONENTS:
+                tags[TAG_COMPONENTS[item['id']]] = item.get('value')
+    return tags
+
+def _requested_mode(request) -> Optional[str]:
+    """Profile mode for a request, or None to leave it unprofiled."""
+    if config.PROFILE_HEADER_ENABLED:
+        value = request.headers.get(config.PROFILE_HEADER, '').strip().lower()
+        if value in PROFILE_MODES:
+            return value
+        if value in ('1', 'true', 'yes'):
+            return config.PROFILE_MODE
+    if config.PROFILE_ENABLED or (config.PROFILE_RATE > 0 and random.random() < config.PROFILE_RATE):
+        return config.PROFILE_MODE
+    return None
+
+def install_request_profiling(server) -> bool:
+    """Profile requests of a Flask server as configured; returns whether hooks were added.
+
+    Profiles are tagged with the request id from ``X-Request-ID`` (or a new
+    one) and their path is returned in the ``X-WDI-Profile-File`` header.
+    """
+    if not (config.PROFILE_ENABLED or config.PROFILE_RATE > 0 or config.PROFILE_HEADER_ENABLED):
+        return False
+
+    from flask import g, request
+
+    def start_profile() -> None:
+        mode = _requested_mode(request)
+        if mode:
+            g.wdi_profiler = Profiler(mode).start()
+
+    def finish_profile(response):
+        profiler = g.pop('wdi_profiler', None)
+        if profiler is None:
+            return response
+        profiler.stop()
+        request_id = request.headers.get('X-Request-ID') or uuid.uuid4().hex[:12]
+        tags = {**_request_tags(request), 'request': request_id}
+        name = (request.endpoint or request.path).strip('/').replace('/', '_') or 'index'
+        try:
+            response.headers['X-WDI-Profile-File'] = write_profile(profiler, name, tags)
+        except OSError as e:
+            print(f"Warning: Could not write profile: {e}")
+        return response
+
+    def discard_profile(exc) -> None:
+        # Stops a profile left running when the request failed before after_request
+        profiler = g.pop('wdi_profiler', None)
+        if profiler is not None:
+            profiler.stop()
+
+    server.before_request(start_profile)
+    server.after_request(finish_profile)
+    server.teardown_request(discard_profile)
+    print(f"Request profiling enabled (mode {config.PROFILE_MODE}, profiles in {config.PROFILE_DIR}/)")
+    return True
@@ -0,0 +1,160 @@
+"""
+Bulk country rankings and percentiles across indicators and years.
+
+``build_rankings`` ranks every (indicator, year) group of the WDI store in one
+vectorized pass and stores the result sorted by indicator, year and rank. A
+year's ranking, a country's rank trajectory and rank changes are then plain
+filtered reads, with no sorting at query time. The app builds the table
+during warm-up; lookups never build it.
+
+Ranks are dense and descending (1 = highest value). The percentile is the
+share of countries with a value at or below the country's value.
+
+Usage:
+    python rankings.py --build
+    python rankings.py --indicator NY.GDP.PCAP.CD --country USA
+    python rankings.py --indicator NY.GDP.PCAP.CD --compare 2000 2020
+"""
+
+from __future__ import annotations
+
+import argparse
+from functools import lru_cache
+from typing import List, Optional
+
+import config
+from startup import lazy_import
+
+pd = lazy_import('pandas')
+
+RANKING_COLUMNS = ['IndicatorCode', 'ISO3', 'Year', 'IndicatorValue', 'Rank', 'Percentile', 'Countries']
+
+def compute_rankings(long_df: pd.DataFrame) -> pd.DataFrame:
+    """Rank every (indicator, year) group of a long-format frame at once."""
+    grouped = long_df.groupby(['IndicatorCode', 'Year'], sort=False)['IndicatorValue']
+    rankings = long_df[['IndicatorCode', 'ISO3', 'Year', 'IndicatorValue']].astype({'Year': 'int16'})
+    rankings['Rank'] = grouped.rank(method='dense', ascending=False).astype('int32')
+    rankings['Percentile'] = (grouped.rank(method='max', pct=True) * 100).round(2)
+    rankings['Countries'] = grouped.transform('size').astype('int32')
+    return rankings.sort_values(['IndicatorCode', 'Year', 'Rank', 'ISO3']).reset_index(drop=True)
+
+def build_rankings(force: bool = False) -> bool:
+    """Compute and store rankings for the whole catalog if out of date."""
+    from wdi_store import ensure_ingested, is_derived_table_current, read_store, write_derived_table
+
+    if not force and is_derived_table_current(config.RANKINGS_FILE):
+        return True
+    if not ensure_ingested():
+        return False
+
+    print("Ranking every (indicator, year) in the WDI store...")
+    long_df = read_store(columns=['IndicatorCode', 'ISO3', 'Year', 'IndicatorValue'])
+    rankings = compute_rankings(long_df)
+    path = write_derived_table(rankings, config.RANKINGS_FILE)
+    _load_indicator_rankings.cache_clear()
+    print(f"Saved {len(rankings):,} rankings to {path}")
+    return True
+
+@lru_cache(maxsize=32)
+def _load_indicator_rankings(indicator_code: str, fingerprint: str) -> pd.DataFrame:
+    """All rankings of one indicator, in stored (year, rank) order."""
+    from wdi_store import read_derived_table
+
+    return read_derived_table(config.RANKINGS_FILE, filters=[('IndicatorCode', '==', indicator_code)])
+
+def get_indicator_rankings(indicator_code: str) -> pd.DataFrame:
+    """Rankings of one indicator for all countries and years, by year and rank.
+
+    Empty until the rankings table is built (``build_rankings``).
+    """
+    from process_wb_data import get_data_fingerprint
+    from wdi_store import is_derived_table_current
+
+    fingerprint = get_data_fingerprint()
+    if not is_derived_table_current(config.RANKINGS_FILE, fingerprint):
+        return pd.DataFrame(columns=RANKING_COLUMNS)
+    return _load_indicator_rankings(indicator_code, fingerprint)
+
+def get_rank_trajectory(indicator_code: str, iso3: str) -> pd.DataFrame:
+    """A country's rank and percentile on an indicator for every year with data."""
+    rankings = get_indicator_rankings(indicator_code)
+    trajectory = rankings[rankings['ISO3'] == iso3]
+    return trajectory[['Year', 'IndicatorValue', 'Rank', 'Percentile', 'Countries']].reset_index(drop=True)
+
+def get_year_rankings(indicator_code: str, year: str) -> pd.DataFrame:
+    """Ranks and percentiles of all countries for an (indicator, year), by rank."""
+    rankings = get_indicator_rankings(indicator_code)
+    return rankings[rankings['Year'] == int(year)].drop(columns='Year').reset_index(drop=True)
+
+def get_rank_changes(indicator_code: str, from_year: str, to_year: str,
+                     countries: Optional[List[str]] = None) -> pd.DataFrame:
+    """Rank change of every country between two years.
+
+    ``RankChange`` is positive when a country moved up (to a smaller rank
+    number). Only countries ranked in both years are returned.
+    """
+    rankings = get_indicator_rankings(indicator_code)
+    years = rankings[rankings['Year'].isin([int(from_year), int(to_year)])]
+    if countries is not None:
+        years = years[years['ISO3'].isin(countries)]
+
+    wide = years.pivot(index='ISO3', columns='Year', values=['Rank', 'Percentile']).dropna()
+    ranked_years = set(wide.columns.get_level_values('Year'))
+    if wide.empty or not {int(from_year), int(to_year)} <= ranked_years:
+        return pd.DataFrame(columns=['ISO3', 'FromRank', 'ToRank', 'RankChange',
+                                     'FromPercentile', 'ToPercentile', 'PercentileChange'])
+
+    changes = pd.DataFrame({
+        'FromRank': wide[('Rank', int(from_year))].astype(int),
+        'ToRank': wide[('Rank', int(to_year))].astype(int),
+        'FromPercentile': wide[('Percentile', int(from_year))],
+        'ToPercentile': wide[('Percentile', int(to_year))]
+    })
+    changes['RankChange'] = changes['FromRank'] - changes['ToRank']
+    changes['PercentileChange'] = (changes['ToPercentile'] - changes['FromPercentile']).round(2)
+    changes = changes.reset_index().sort_values('RankChange', ascending=False)
+    return changes[['ISO3', 'FromRank', 'ToRank', 'RankChange',
+                    'FromPercentile', 'ToPercentile', 'PercentileChange']].reset_index(drop=True)
+
+def main():
+    """Main function for command line usage."""
+    parser = argparse.ArgumentParser(description="Country rankings across years for World Bank indicators")
+    parser.add_argument("--build", action="store_true",
+                       help="Build (or rebuild with --force) the rankings table")
+    parser.add_argument("--force", action="store_true",
+                       help="Rebuild even if the rankings are up to date")
+    parser.add_argument("--indicator", type=str,
+                       help="World Bank indicator code (e.g., NY.GDP.PCAP.CD)")
+    parser.add_argument("--country", type=str,
+                       help="ISO3 code: print the country's rank trajectory")
+    parser.add_argument("--compare", type=str, nargs=2, metavar=("FROM", "TO"),
+                       help="Print rank changes for all countries between two years")
+    parser.add_argument("--top", type=int, default=15,
+                       help="Rows to print for --compare (default: 15)")
+
+    args = parser.parse_args()
+
+    if args.build or args.indicator:
+        build_rankings(args.force)
+
+    if args.indicator and args.country:
+        trajectory = get_rank_trajectory(args.indicator, args.country.upper())
+        if trajectory.empty:
+            print(f"No rankings for {args.country} on {args.indicator}")
+        else:
+            print(f"\nRank trajectory of {args.country.upper()} on {args.indicator}:")
+            for row in trajectory.itertuples():
+                print(f"  {row.Year}: #{row.Rank:<4d} of {row.Countries:<4d} "
+                      f"({row.Percentile:5.1f} percentile)  {row.IndicatorValue:,.2f}")
+
+    if args.indicator and args.compare:
+        changes = get_rank_changes(args.indicator, *args.compare)
+        print(f"\nBiggest rank gains on {args.indicator}, {args.compare[0]} -> {args.compare[1]}:")
+        for row in changes.head(args.top).itertuples():
+            print(f"  {row.ISO3}: #{row.FromRank} -> #{row.ToRank} ({row.RankChange:+d})")
+
+    if not (args.build or args.indicator):
+        parser.print_help()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,299 @@
+"""
+Regional and income-group aggregates computed from country values.
+
+Countries are grouped by the Region and Income Group columns of
+WDICountry.csv. For an indicator, every year and every group (regions, income
+groups and the world) is aggregated in a single group-by over the WDI store,
+optionally weighted by population or GDP. Groups carry the World Bank
+aggregate code (EAS, HIC, WLD, ...) so the results can be checked against the
+official aggregate rows of the main data file.
+
+Usage:
+    python regional_aggregates.py --indicator SP.DYN.LE00.IN --year 2020
+    python regional_aggregates.py --indicator SP.DYN.LE00.IN --year 2020 --compare
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+from functools import lru_cache
+from typing import Dict, List, Optional
+
+import config
+from startup import lazy_import
+
+pd = lazy_import('pandas')
+np = lazy_import('numpy')
+
+METHODS = ('mean', 'sum')
+
+GROUPINGS = ('region', 'income', 'world')
+
+AGGREGATE_COLUMNS = ['Grouping', 'GroupCode', 'GroupName', 'Year', 'IndicatorValue',
+                     'Countries', 'WeightCoverage']
+
+_COUNTRY_GROUPS_CACHE: Optional[pd.DataFrame] = None
+
+def load_country_groups() -> pd.DataFrame:
+    """Region and income group of every country in WDICountry.csv.
+
+    Rows without a region are World Bank aggregates and are left out.
+    """
+    global _COUNTRY_GROUPS_CACHE
+    if _COUNTRY_GROUPS_CACHE is not None:
+        return _COUNTRY_GROUPS_CACHE
+
+    try:
+        country_df = pd.read_csv(config.WDI_COUNTRY_FILE,
+                                 usecols=['Country Code', 'Region', 'Income Group'], dtype=str)
+    except FileNotFoundError:
+        print(f"Error: Could not find {config.WDI_COUNTRY_FILE}")
+        return pd.DataFrame(columns=['CountryCode', 'Region', 'IncomeGroup'])
+
+    country_df = country_df[country_df['Region'].notna()
+                            & ~country_df['Country Code'].isin(config.REGIONAL_AGGREGATES)]
+    _COUNTRY_GROUPS_CACHE = country_df.rename(columns={
+        'Country Code': 'CountryCode',
+        'Income Group': 'IncomeGroup'
+    }).reset_index(drop=True)
+    return _COUNTRY_GROUPS_CACHE
+
+def get_group_options() -> List[Dict[str, str]]:
+    """Dropdown options for filtering the globe to a region or income group."""
+    options = [{'label': "🌐 All countries", 'value': config.WORLD_AGGREGATE_CODE}]
+    seen = set()
+    for name, code in config.REGION_AGGREGATE_CODES.items():
+        if code not in seen:
+            options.append({'label': f"🗺️ {name}", 'value': code})
+            seen.add(code)
+    for name, code in config.INCOME_GROUP_AGGREGATE_CODES.items():
+        options.append({'label': f"💵 {name}", 'value': code})
+    return options
+
+def _group_memberships(groups: pd.DataFrame) -> pd.DataFrame:
+    """One row per (country, group) for every grouping at once."""
+    def membership(grouping: str, names: pd.Series, codes: Dict[str, str]) -> pd.DataFrame:
+        return pd.DataFrame({
+            'CountryCode': groups['CountryCode'],
+            'Grouping': grouping,
+            'GroupCode': names.map(codes).fillna(names),
+            'GroupName': names
+        }).dropna(subset=['GroupName'])
+
+    return pd.concat([
+        membership('region', groups['Region'], config.REGION_AGGREGATE_CODES),
+        membership('income', groups['IncomeGroup'], config.INCOME_GROUP_AGGREGATE_CODES),
+        membership('world', pd.Series('World', index=groups.index),
+                   {'World': config.WORLD_AGGREGATE_CODE})
+    ], ignore_index=True)
+
+def get_group_members(group_code: str) -> List[str]:
+    """ISO3 codes of the countries in a region or income group."""
+    from process_wb_data import get_country_iso3_mapping
+
+    memberships = _group_memberships(load_country_groups())
+    codes = memberships.loc[memberships['GroupCode'] == group_code, 'CountryCode']
+    mapping = get_country_iso3_mapping()
+    return sorted({mapping[code] for code in codes if code in mapping})
+
+@lru_cache(maxsize=8)
+def _resolve_weight(weight: str, fingerprint: str) -> Optional[str]:
+    """``resolve_weight`` for an ingested store, warning once per data fingerprint."""
+    from wdi_store import load_summary_tables
+
+    weight_code = config.AGGREGATE_WEIGHTS[weight]
+    if weight_code in load_summary_tables()['summary'].index:
+        return weight
+    print(f"Warning: weight indicator {weight_code} is not in the WDI store; aggregating without weights")
+    return None
+
+def resolve_weight(weight: Optional[str]) -> Optional[str]:
+    """The weight aggregates are actually computed with.
+
+    This is ``weight``, or None (a plain mean) when its indicator has no
+    country values in the WDI store.
+    """
+    from wdi_store import is_ingested
+    from process_wb_data import get_data_fingerprint
+
+    if weight is None or not is_ingested():
+        return weight
+    return _resolve_weight(weight, get_data_fingerprint())
+
+def compute_aggregates(indicator_code: str, weight: Optional[str] = config.DEFAULT_AGGREGATE_WEIGHT,
+                       how: str = 'mean') -> pd.DataFrame:
+    """Aggregate an indicator over every group and year in one group-by.
+
+    ``weight`` is a key of ``config.AGGREGATE_WEIGHTS`` (or None for a plain
+    mean). With ``how='sum'`` values are added up and the weight only feeds
+    ``WeightCoverage``: the share of the group's total weight held by the
+    countries that report the indicator. A weight missing from the store
+    falls back to a plain mean (see ``resolve_weight``).
+    """
+    from wdi_store import is_ingested, read_store
+
+    if how not in METHODS:
+        raise ValueError(f"Unsupported aggregation method: {how}")
+    if weight is not None and weight not in config.AGGREGATE_WEIGHTS:
+        raise ValueError(f"Unknown aggregate weight: {weight}")
+    if not is_ingested():
+        return pd.DataFrame(columns=AGGREGATE_COLUMNS)
+
+    weight_code = config.AGGREGATE_WEIGHTS.get(resolve_weight(weight))
+    codes = [indicator_code] + ([weight_code] if weight_code and weight_code != indicator_code else [])
+    long_df = read_store(indicators=codes, columns=['IndicatorCode', 'CountryCode', 'Year', 'IndicatorValue'])
+    if not (long_df['IndicatorCode'] == indicator_code).any():
+        return pd.DataFrame(columns=AGGREGATE_COLUMNS)
+
+    wide = long_df.pivot_table(index=['CountryCode', 'Year'], columns='IndicatorCode',
+                               values='IndicatorValue', aggfunc='first')
+    values = wide[indicator_code]
+    weights = wide[weight_code] if weight_code else pd.Series(1.0, index=wide.index)
+
+    frame = pd.DataFrame({'Value': values, 'Weight': weights}).reset_index()
+    frame = frame.merge(_group_memberships(load_country_groups()), on='CountryCode')
+
+    has_value = frame['Value'].notna()
+    has_both = has_value & frame['Weight'].notna()
+    frame['WeightedValue'] = np.where(has_both, frame['Value'] * frame['Weight'], 0.0)
+    frame['UsedWeight'] = np.where(has_both, frame['Weight'], 0.0)
+    frame['CoveredWeight'] = np.where(has_value, frame['Weight'], 0.0)
+    frame['HasValue'] = has_value
+
+    grouped = frame.groupby(['Grouping', 'GroupCode', 'GroupName', 'Year']).agg(
+        ValueSum=('Value', 'sum'),
+        WeightedValue=('WeightedValue', 'sum'),
+        UsedWeight=('UsedWeight', 'sum'),
+        CoveredWeight=('CoveredWeight', 'sum'),
+        TotalWeight=('Weight', 'sum'),
+        Countries=('HasValue', 'sum')
+    ).reset_index()
+    grouped = grouped[grouped['Countries'] > 0]
+
+    with np.errstate(invalid='ignore', divide='ignore'):
+        if how == 'sum':
+            grouped['IndicatorValue'] = grouped['ValueSum']
+        else:
+            grouped['IndicatorValue'] = grouped['WeightedValue'] / grouped['UsedWeight']
+        grouped['WeightCoverage'] = (grouped['CoveredWeight'] / grouped['TotalWeight']).round(4)
+
+    grouped['Countries'] = grouped['Countries'].astype(int)
+    grouped = grouped.dropna(subset=['IndicatorValue'])
+    return grouped[AGGREGATE_COLUMNS].sort_values(['Grouping', 'GroupCode', 'Year']).reset_index(drop=True)
+
+@lru_cache(maxsize=16)
+def _load_aggregates(indicator_code: str, weight: Optional[str], how: str,
+                     fingerprint: str) -> pd.DataFrame:
+    """Aggregates of one indicator for all years, cached on disk per data fingerprint."""
+    from process_wb_data import ensure_data_dir
+
+    filename = config.PROCESSED_AGGREGATES_FILE_TEMPLATE.format(
+        indicator_code=indicator_code.replace('.', '_'),
+        weight=weight or 'unweighted',
+        how=how,
+        fingerprint=fingerprint
+    )
+    filepath = os.path.join(config.DATA_DIR, filename)
+
+    if os.path.exists(filepath):
+        print(f"Loading cached aggregates from {filepath}")
+        return pd.read_csv(filepath)
+
+    result = compute_aggregates(indicator_code, weight, how)
+    if not result.empty:
+        ensure_data_dir()
+        result.to_csv(filepath, index=False)
+        print(f"Saved {len(result)} aggregates to {filepath}")
+    return result
+
+def get_aggregates(indicator_code: str, year: Optional[str] = None,
+                   weight: Optional[str] = config.DEFAULT_AGGREGATE_WEIGHT,
+                   how: str = 'mean', grouping: Optional[str] = None) -> pd.DataFrame:
+    """Cached aggregates of an indicator, optionally for one year or grouping.
+
+    They are cached under the weight actually used (``resolve_weight``), and
+    empty while the WDI store is not built.
+    """
+    from process_wb_data import get_data_fingerprint
+    from wdi_store import is_ingested
+
+    if not is_ingested():
+        return pd.DataFrame(columns=AGGREGATE_COLUMNS)
+    result = _load_aggregates(indicator_code, resolve_weight(weight), how, get_data_fingerprint())
+    if year is not None:
+        result = result[result['Year'] == int(year)]
+    if grouping is not None:
+        result = result[result['Grouping'] == grouping]
+    return result.reset_index(drop=True)
+
+def compare_with_official(indicator_code: str, year: Optional[str] = None,
+                          weight: Optional[str] = config.DEFAULT_AGGREGATE_WEIGHT,
+                          how: str = 'mean') -> pd.DataFrame:
+    """Join computed aggregates with the official World Bank aggregate rows.
+
+    Only groups that have an official row for the same year are returned.
+    ``Difference`` is computed minus official.
+    """
+    from wdi_store import read_store
+
+    computed = get_aggregates(indicator_code, year, weight, how)
+    official = read_store(indicators=[indicator_code],
+                          years=None if year is None else [int(year)],
+                          countries=list(computed['GroupCode'].unique()),
+                          columns=['CountryCode', 'ISO3', 'Year', 'IndicatorValue'],
+                          include_aggregates=True)
+    official = official[official['ISO3'].isna()].rename(columns={
+        'CountryCode': 'GroupCode',
+        'IndicatorValue': 'Official'
+    })[['GroupCode', 'Year', 'Official']]
+
+    comparison = computed.merge(official, on=['GroupCode', 'Year'])
+    comparison['Difference'] = comparison['IndicatorValue'] - comparison['Official']
+    with np.errstate(invalid='ignore', divide='ignore'):
+        comparison['RelativeDifference'] = (comparison['Difference'] / comparison['Official'].abs()).round(4)
+    return comparison
+
+def main():
+    """Main function for command line usage."""
+    from wdi_store import ensure_ingested
+
+    parser = argparse.ArgumentParser(description="Compute regional and income-group aggregates of World Bank indicators")
+    parser.add_argument("--indicator", type=str, required=True,
+                       help="World Bank indicator code (e.g., SP.DYN.LE00.IN)")
+    parser.add_argument("--year", type=str, default=config.DEFAULT_YEAR,
+                       help="Year to aggregate (default: 2023)")
+    parser.add_argument("--weight", choices=list(config.AGGREGATE_WEIGHTS) + ['none'],
+                       default=config.DEFAULT_AGGREGATE_WEIGHT,
+                       help=f"Weighting indicator (default: {config.DEFAULT_AGGREGATE_WEIGHT})")
+    parser.add_argument("--how", choices=METHODS, default='mean',
+                       help="Weighted mean or sum of country values (default: mean)")
+    parser.add_argument("--compare", action="store_true",
+                       help="Compare against the official World Bank aggregates")
+
+    args = parser.parse_args()
+    ensure_ingested()
+    weight = resolve_weight(None if args.weight == 'none' else args.weight)
+
+    if args.compare:
+        result = compare_with_official(args.indicator, args.year, weight, args.how)
+        if result.empty:
+            print(f"No official aggregates to compare for {args.indicator} in {args.year}")
+            return
+        print(f"\nComputed vs official aggregates of {args.indicator} ({args.year}):")
+        for row in result.itertuples():
+            print(f"  {row.GroupCode:<4} {row.GroupName[:35]:<35} {row.IndicatorValue:>14,.2f} "
+                  f"{row.Official:>14,.2f}  ({row.RelativeDifference:+.1%})")
+        return
+
+    result = get_aggregates(args.indicator, args.year, weight, args.how)
+    if result.empty:
+        print(f"No aggregates for {args.indicator} in {args.year}")
+        return
+    print(f"\nAggregates of {args.indicator} ({args.year}, weight: {weight or 'none'}, {args.how}):")
+    for row in result.itertuples():
+        print(f"  {row.GroupCode:<4} {row.GroupName[:35]:<35} {row.IndicatorValue:>14,.2f}  "
+              f"({row.Countries} countries, {row.WeightCoverage:.0%} coverage)")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,160 @@
+"""
+Startup timing and deferred initialization for the Dash apps.
+
+Heavy third-party modules are imported through ``lazy_import`` so they load on
+first use, and expensive data loads can be pushed to a background warm-up
+thread. Every import and load is timed so a startup report can show where
+cold-start time goes.
+
+Run ``python startup.py [module]`` to import an app module (default:
+``main_app``), wait for its warm-up and print the report.
+"""
+
+import argparse
+import importlib
+import sys
+import threading
+import time
+import types
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+import config
+
+_PROCESS_START = time.perf_counter()
+_TIMINGS: List[Dict] = []
+_TIMINGS_LOCK = threading.Lock()
+_WARM_UP_THREAD: Optional[threading.Thread] = None
+
+def record_timing(name: str, kind: str, seconds: float) -> None:
+    """Record how long an import or data load took."""
+    with _TIMINGS_LOCK:
+        _TIMINGS.append({
+            'name': name,
+            'kind': kind,
+            'seconds': seconds,
+            'started_at': time.perf_counter() - _PROCESS_START - seconds,
+            'thread': threading.current_thread().name
+        })
+
+@contextmanager
+def timed(name: str, kind: str = 'load') -> Iterator[None]:
+    """Context manager that records the duration of the wrapped block."""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        record_timing(name, kind, time.perf_counter() - start)
+
+class LazyModule(types.ModuleType):
+    """Module proxy that performs the real import on first attribute access."""
+
+    def __init__(self, name: str):
+        super().__init__(name)
+        self._lazy_name = name
+        self._lazy_module: Optional[types.ModuleType] = None
+
+    def _load(self) -> types.ModuleType:
+        if self._lazy_module is None:
+            already_loaded = self._lazy_name in sys.modules
+            start = time.perf_counter()
+            module = importlib.import_module(self._lazy_name)
+            if not already_loaded:
+                record_timing(self._lazy_name, 'import', time.perf_counter() - start)
+            self._lazy_module = module
+        return self._lazy_module
+
+    def __getattr__(self, attr: str):
+        return getattr(self._load(), attr)
+
+    def __dir__(self) -> List[str]:
+        return dir(self._load())
+
+def lazy_import(name: str) -> LazyModule:
+    """Return a proxy for ``name`` that is imported on first use."""
+    return LazyModule(name)
+
+def import_task(name: str) -> Tuple[str, Callable[[], object]]:
+    """Warm-up task that imports a module ahead of first use."""
+    return f'import {name}', lambda: importlib.import_module(name)
+
+def start_warm_up(tasks: List[Tuple[str, Callable[[], object]]]) -> Optional[threading.Thread]:
+    """Run initialization tasks in a background daemon thread.
+
+    Each task is timed; failures are reported but do not stop later tasks,
+    since anything skipped here is simply loaded on first use instead.
+    """
+    global _WARM_UP_THREAD
+    if not config.WARM_UP_ON_START:
+        return None
+
+    def run() -> None:
+        for name, task in tasks:
+            try:
+                with timed(name, 'warm-up'):
+                    task()
+            except Exception as e:
+                print(f"Warning: warm-up task {name} failed: {e}")
+        if config.STARTUP_REPORT:
+            print_startup_report()
+
+    _WARM_UP_THREAD = threading.Thread(target=run, name='warm-up', daemon=True)
+    _WARM_UP_THREAD.start()
+    return _WARM_UP_THREAD
+
+def wait_for_warm_up(timeout: Optional[float] = None) -> bool:
+    """Block until the warm-up thread finishes; returns False on timeout."""
+    if _WARM_UP_THREAD is None:
+        return True
+    _WARM_UP_THREAD.join(timeout)
+    return not _WARM_UP_THREAD.is_alive()
+
+def get_startup_report() -> List[Dict]:
+    """Return recorded timings in the order they started."""
+    with _TIMINGS_LOCK:
+        return sorted(_TIMINGS, key=lambda entry: entry['started_at'])
+
+def format_startup_report() -> str:
+    """Format recorded timings as a text table."""
+    lines = [
+        "Startup report",
+        "=" * 72,
+        f"{'start (s)':>10} {'took (s)':>10}  {'kind':<8} {'thread':<12} name",
+        "-" * 72
+    ]
+    for entry in get_startup_report():
+        lines.append(
+            f"{entry['started_at']:>10.3f} {entry['seconds']:>10.3f}  "
+            f"{entry['kind']:<8} {entry['thread'][:12]:<12} {entry['name']}"
+        )
+    lines.append("-" * 72)
+    lines.append(f"Elapsed since process start: {time.perf_counter() - _PROCESS_START:.3f}s")
+    return "\n".join(lines)
+
+def print_startup_report() -> None:
+    """Print the startup report."""
+    print(format_startup_report())
+
+def main():
+    """Import an app module, wait for warm-up and print the startup report."""
+    parser = argparse.ArgumentParser(description="Measure Dash app startup time")
+    parser.add_argument("module", nargs="?", default="main_app",
+                        help="App module to import (default: main_app)")
+    parser.add_argument("--timeout", type=float, default=120.0,
+                        help="Seconds to wait for background warm-up (default: 120)")
+
+    args = parser.parse_args()
+
+    # Run as a script this module is __main__, while the app records its
+    # timings in the importable ``startup`` module, so report from that one
+    startup = importlib.import_module('startup')
+
+    with startup.timed(args.module, 'import'):
+        importlib.import_module(args.module)
+
+    if not startup.wait_for_warm_up(args.timeout):
+        print(f"Warning: warm-up still running after {args.timeout:.0f}s")
+    startup.print_startup_report()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,348 @@
+"""
+Deterministic generator of WDI-shaped data files for benchmarks and load tests.
+
+Writes WDICSV.csv, WDICountry.csv and WDISeries.csv (plus small footnote,
+country-series and series-time files) with the column layout of the World
+Bank bulk download, so every pipeline in this repository runs against them
+unchanged: run the scripts from the output directory.
+
+Scale 1 matches the size of a WDI release (about 1,500 indicators for 217
+economies and 49 aggregates over 1960-2023); ``--scale 10`` or ``--scale 100``
+multiplies the indicator count. Countries are real ISO countries so they map
+to the globe; counts beyond the ISO list get synthetic codes that, like
+aggregates, are skipped by the country mapping.
+
+Values follow one of three distributions per indicator, marked by the code
+suffix as in WDI: ``.CD`` levels (lognormal with compound growth), ``.ZS``
+shares (bounded 0-100 random walk) and ``.ZG`` rates (normal around a
+country mean); ``--distribution`` draws every synthetic indicator from one
+of them instead of cycling through all three. ``--sparsity`` is the
+average share of missing values. Output is identical for the same
+arguments and seed.
+
+Values are generated a block of countries at a time, sized so a block holds
+at most SYNTHETIC_BLOCK_VALUES values; at large scales a single country is
+split into chunks of indicators, so memory stays bounded at any scale.
+
+Usage:
+    python synthetic_data.py --out synthetic_1x
+    python synthetic_data.py --scale 10 --sparsity 0.5 --out synthetic_10x
+    python synthetic_data.py --indicators 200 --countries 100 --years 2000 2023 --out small
+    python synthetic_data.py --scale 100 --countries-per-block 1 --out synthetic_100x
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import time
+from typing import Dict, List, Optional, Tuple
+
+import config
+from startup import lazy_import
+
+pd = lazy_import('pandas')
+np = lazy_import('numpy')
+pycountry = lazy_import('pycountry')
+
+# Size of one WDI release, multiplied by --scale
+BASE_INDICATORS = 1496
+BASE_COUNTRIES = 217
+
+# Most countries per generated block (fewer when over SYNTHETIC_BLOCK_VALUES)
+MAX_COUNTRIES_PER_BLOCK = 10
+
+DISTRIBUTIONS = {
+    'CD': 'lognormal',
+    'ZS': 'share',
+    'ZG': 'rate'
+}
+
+TOPICS = [
+    'Economic Policy & Debt: National accounts',
+    'Health: Mortality',
+    'Education: Participation',
+    'Environment: Energy production & use',
+    'Infrastructure: Communications',
+    'Social Protection & Labor: Unemployment',
+    'Poverty: Poverty rates',
+    'Public Sector: Government finance'
+]
+
+UNITS = {
+    'lognormal': 'current US$',
+    'share': '%',
+    'rate': 'annual %'
+}
+
+COUNTRY_COLUMNS = ['Country Code', 'Short Name', 'Table Name', 'Long Name', '2-alpha code',
+                   'Currency Unit', 'Special Notes', 'Region', 'Income Group', 'WB-2 code']
+
+SERIES_COLUMNS = ['Series Code', 'Topic', 'Indicator Name', 'Short definition', 'Long definition',
+                  'Unit of measure', 'Periodicity', 'Base Period', 'Other notes', 'Aggregation method',
+                  'Limitations and exceptions', 'Notes from original source', 'General comments',
+                  'Source', 'Statistical concept and methodology', 'Development relevance',
+                  'Related source links', 'Other web links', 'Related indicators', 'License Type']
+
+def build_countries(count: int, include_aggregates: bool = True) -> pd.DataFrame:
+    """Country metadata: real ISO countries first, then synthetic codes, then aggregates."""
+    iso_countries = sorted(pycountry.countries, key=lambda country: country.alpha_3)[:count]
+    regions = sorted(set(config.REGION_AGGREGATE_CODES))
+    incomes = list(config.INCOME_GROUP_AGGREGATE_CODES)
+
+    rows = [(country.alpha_3, getattr(country, 'common_name', country.name), country.alpha_2)
+            for country in iso_countries]
+
+    # Synthetic codes for counts beyond the ISO list
+    taken = {country.alpha_3 for country in pycountry.countries} | set(config.REGIONAL_AGGREGATES)
+    letters = 'ABCDEFGHIJKLMNOPQRSTUVWXYZ'
+    synthetic = (f"X{a}{b}" for a in letters for b in letters if f"X{a}{b}" not in taken)
+    while len(rows) < count:
+        code = next(synthetic)
+        rows.append((code, f"Synthetic country {code}", ''))
+
+    countries = pd.DataFrame(rows, columns=['Country Code', 'Short Name', '2-alpha code'])
+    countries['Table Name'] = countries['Short Name']
+    countries['Long Name'] = countries['Short Name']
+    countries['Currency Unit'] = 'Synthetic currency'
+    countries['Special Notes'] = ''
+    countries['Region'] = [regions[i % len(regions)] for i in range(len(countries))]
+    countries['Income Group'] = [incomes[(i // len(regions)) % len(incomes)] for i in range(len(countries))]
+    countries['WB-2 code'] = countries['2-alpha code']
+
+    if include_aggregates:
+        aggregate_names = {
+            config.WORLD_AGGREGATE_CODE: 'World',
+            **{code: name for name, code in config.REGION_AGGREGATE_CODES.items()},
+            **{code: name for name, code in config.INCOME_GROUP_AGGREGATE_CODES.items()}
+        }
+        aggregates = pd.DataFrame({
+            'Country Code': list(aggregate_names),
+            'Short Name': list(aggregate_names.values())
+        })
+        aggregates['Table Name'] = aggregates['Short Name']
+        aggregates['Long Name'] = aggregates['Short Name']
+        countries = pd.concat([countries, aggregates], ignore_index=True).fillna('')
+
+    return countries[COUNTRY_COLUMNS]
+
+def build_series(count: int, sparsity: float, seed: int, distribution: str = 'mixed') -> pd.DataFrame:
+    """Series metadata plus the generation parameters of every indicator.
+
+    The popular indicators from config come first so the apps' defaults
+    exist; the rest get synthetic codes, cycling through the distributions
+    or all drawn from ``distribution``.
+    """
+    rng = np.random.default_rng([seed, 0])
+    names = {code: name for name, code in config.POPULAR_INDICATORS.items()}
+    codes = list(names)[:count]
+    suffixes = [suffix for suffix, name in DISTRIBUTIONS.items() if distribution in ('mixed', name)]
+    for i in range(count - len(codes)):
+        suffix = suffixes[i % len(suffixes)]
+        codes.append(f"SYN.{i:06d}.{suffix}")
+        names[codes[-1]] = f"Synthetic indicator {i:06d} ({UNITS[DISTRIBUTIONS[suffix]]})"
+
+    distributions = [DISTRIBUTIONS.get(code.rsplit('.', 1)[-1], 'lognormal') for code in codes]
+    series = pd.DataFrame({column: '' for column in SERIES_COLUMNS}, index=range(len(codes)))
+    series['Series Code'] = codes
+    series['Topic'] = [TOPICS[i % len(TOPICS)] for i in range(len(codes))]
+    series['Indicator Name'] = [names[code] for code in codes]
+    series['Short definition'] = [f"Synthetic {distribution} values for load testing." for distribution in distributions]
+    series['Unit of measure'] = [UNITS[distribution] for distribution in distributions]
+    series['Periodicity'] = 'Annual'
+    series['Aggregation method'] = ['Sum' if distribution == 'lognormal' else 'Weighted average'
+                                    for distribution in distributions]
+    series['Source'] = 'Synthetic data generator'
+    series['License Type'] = 'CC BY-4.0'
+
+    # Generation parameters (not written to WDISeries.csv)
+    series['Distribution'] = distributions
+    # Share of missing values of each indicator, averaging ``sparsity``. Gaps
+    # at rate r plus a start up to r of the period late leave about
+    # r + (1 - r) * r / 2 of the values missing, solved here for r.
+    missing_share = np.clip(rng.uniform(max(0, 2 * sparsity - 1), min(1, 2 * sparsity), len(codes)), 0, 0.98)
+    series['MissingRate'] = (3 - np.sqrt(9 - 8 * missing_share)) / 2
+    series['Scale'] = rng.lognormal(3, 2, len(codes))
+    series['Growth'] = rng.normal(0.02, 0.02, len(codes))
+    return series
+
+def generate_values(series: pd.DataFrame, n_countries: int, n_years: int,
+                    rng: np.random.Generator) -> np.ndarray:
+    """Values for every (country, indicator) row of a block of countries.
+
+    Rows are country-major, as in WDICSV.csv: all indicators of the first
+    country, then all indicators of the next.
+    """
+    n_indicators = len(series)
+    shape = (n_countries, n_indicators, n_years)
+    distribution = series['Distribution'].to_numpy()
+    values = np.empty(shape)
+
+    levels = distribution == 'lognormal'
+    if levels.any():
+        base = series['Scale'].to_numpy()[levels] * rng.lognormal(0, 1, (n_countries, levels.sum()))
+        growth = series['Growth'].to_numpy()[levels][None, :, None] + rng.normal(0, 0.05, (n_countries, levels.sum(), n_years))
+        values[:, levels] = base[:, :, None] * np.cumprod(1 + growth, axis=2)
+
+    shares = distribution == 'share'
+    if shares.any():
+        walk = rng.normal(0, 1.5, (n_countries, shares.sum(), 1)) + np.cumsum(
+            rng.normal(0.02, 0.1, (n_countries, shares.sum(), n_years)), axis=2)
+        values[:, shares] = 100 / (1 + np.exp(-walk))
+
+    rates = distribution == 'rate'
+    if rates.any():
+        values[:, rates] = rng.normal(2, 2, (n_countries, rates.sum(), 1)) + rng.normal(0, 3, (n_countries, rates.sum(), n_years))
+
+    # Random gaps, plus series that only start some years into the period
+    missing_rate = series['MissingRate'].to_numpy()[None, :, None]
+    missing = rng.random(shape) < missing_rate
+    start = (rng.random((n_countries, n_indicators, 1)) * missing_rate * n_years).astype(int)
+    missing |= np.arange(n_years)[None, None, :] < start
+    values[missing] = np.nan
+    return values.reshape(n_countries * n_indicators, n_years)
+
+def plan_blocks(n_indicators: int, n_years: int, countries_per_block: Optional[int] = None) -> Tuple[int, int]:
+    """Countries per block and indicators per chunk keeping blocks within SYNTHETIC_BLOCK_VALUES.
+
+    Indicators are only chunked in single-country blocks, so rows stay
+    country-major.
+    """
+    values_per_country = n_indicators * n_years
+    if countries_per_block is None:
+        countries_per_block = max(1, min(MAX_COUNTRIES_PER_BLOCK, config.SYNTHETIC_BLOCK_VALUES // values_per_country))
+    indicators_per_chunk = n_indicators
+    if countries_per_block == 1 and values_per_country > config.SYNTHETIC_BLOCK_VALUES:
+        indicators_per_chunk = max(1, config.SYNTHETIC_BLOCK_VALUES // n_years)
+    return countries_per_block, indicators_per_chunk
+
+def write_main_data(path: str, countries: pd.DataFrame, series: pd.DataFrame, years: List[str],
+                    seed: int, countries_per_block: Optional[int] = None) -> int:
+    """Stream WDICSV.csv one block of countries at a time; returns the row count."""
+    header = ['Country Name', 'Country Code', 'Indicator Name', 'Indicator Code'] + years
+    pd.DataFrame(columns=header).to_csv(path, index=False)
+
+    countries_per_block, indicators_per_chunk = plan_blocks(len(series), len(years), countries_per_block)
+    rows = 0
+    for block_start in range(0, len(countries), countries_per_block):
+        block = countries.iloc[block_start:block_start + countries_per_block]
+        for chunk_start in range(0, len(series), indicators_per_chunk):
+            chunk_series = series.iloc[chunk_start:chunk_start + indicators_per_chunk]
+
+            # Seeded per block (and chunk) so the output does not depend on earlier blocks
+            seed_key = [seed, 1, block_start] + ([chunk_start] if indicators_per_chunk < len(series) else [])
+            values = generate_values(chunk_series, len(block), len(years), np.random.default_rng(seed_key))
+
+            chunk = pd.DataFrame(values, columns=years)
+            chunk.insert(0, 'Country Name', np.repeat(block['Short Name'].to_numpy(), len(chunk_series)))
+            chunk.insert(1, 'Country Code', np.repeat(block['Country Code'].to_numpy(), len(chunk_series)))
+            chunk.insert(2, 'Indicator Name', np.tile(chunk_series['Indicator Name'].to_numpy(), len(block)))
+            chunk.insert(3, 'Indicator Code', np.tile(chunk_series['Series Code'].to_numpy(), len(block)))
+            chunk.to_csv(path, mode='a', header=False, index=False, float_format='%.10g')
+
+            rows += len(chunk)
+            print(f"  ...{rows:,} rows written")
+    return rows
+
+def write_notes(out_dir: str, countries: pd.DataFrame, series: pd.DataFrame, years: List[str],
+                footnote_rate: float, seed: int) -> Dict[str, int]:
+    """Write small footnote, country-series and series-time files."""
+    rng = np.random.default_rng([seed, 2])
+    codes = series['Series Code'].to_numpy()
+    country_codes = countries['Country Code'].to_numpy()
+
+    n_footnotes = int(footnote_rate * len(codes) * len(country_codes) * len(years))
+    footnotes = pd.DataFrame({
+        'CountryCode': rng.choice(country_codes, n_footnotes),
+        'SeriesCode': rng.choice(codes, n_footnotes),
+        'Year': ['YR' + year for year in rng.choice(years, n_footnotes)],
+        'DESCRIPTION': rng.choice(['Estimate.', 'Provisional.', 'Break in series.',
+                                   'Data refer to a different reference period.'], n_footnotes)
+    }).drop_duplicates(subset=['CountryCode', 'SeriesCode', 'Year'])
+    footnotes.to_csv(os.path.join(out_dir, config.WDI_FOOTNOTE_FILE), index=False)
+
+    n_country_series = min(len(codes) * len(country_codes), max(1, n_footnotes // 10))
+    country_series = pd.DataFrame({
+        'CountryCode': rng.choice(country_codes, n_country_series),
+        'SeriesCode': rng.choice(codes, n_country_series),
+        'DESCRIPTION': 'Sources: synthetic national statistics office.'
+    }).drop_duplicates(subset=['CountryCode', 'SeriesCode'])
+    country_series.to_csv(os.path.join(out_dir, config.WDI_COUNTRY_SERIES_FILE), index=False)
+
+    series_time = pd.DataFrame({
+        'SeriesCode': codes[:min(len(codes), 50)],
+        'Year': 'YR' + years[len(years) // 2],
+        'DESCRIPTION': 'Methodology revised.'
+    })
+    series_time.to_csv(os.path.join(out_dir, config.WDI_SERIES_TIME_FILE), index=False)
+
+    return {'footnotes': len(footnotes), 'country-series notes': len(country_series),
+            'series-time notes': len(series_time)}
+
+def generate_dataset(out_dir: str, indicators: int, countries: int, first_year: int, last_year: int,
+                     sparsity: float = 0.5, seed: int = 0, distribution: str = 'mixed',
+                     include_aggregates: bool = True,
+                     footnote_rate: float = 0.001, countries_per_block: Optional[int] = None) -> Dict[str, int]:
+    """Write a complete synthetic WDI dataset to ``out_dir``.
+
+    ``countries_per_block`` overrides the block size derived from
+    SYNTHETIC_BLOCK_VALUES; values depend on it, like on the seed.
+    """
+    start = time.perf_counter()
+    os.makedirs(out_dir, exist_ok=True)
+    years = [str(year) for year in range(first_year, last_year + 1)]
+
+    country_df = build_countries(countries, include_aggregates)
+    series = build_series(indicators, sparsity, seed, distribution)
+    country_df.to_csv(os.path.join(out_dir, config.WDI_COUNTRY_FILE), index=False)
+    series[SERIES_COLUMNS].to_csv(os.path.join(out_dir, config.WDI_SERIES_FILE), index=False)
+
+    print(f"Generating {len(series):,} indicators x {len(country_df):,} countries x {len(years)} years "
+          f"into {out_dir}/")
+    main_path = os.path.join(out_dir, config.WDI_MAIN_DATA_FILE)
+    rows = write_main_data(main_path, country_df, series, years, seed, countries_per_block)
+    note_counts = write_notes(out_dir, country_df, series, years, footnote_rate, seed)
+
+    summary = {'rows': rows, 'indicators': len(series), 'countries': len(country_df),
+               'years': len(years), 'bytes': os.path.getsize(main_path), **note_counts}
+    print(f"Wrote {rows:,} rows ({summary['bytes'] / 1e6:,.1f} MB) in {time.perf_counter() - start:.1f}s")
+    return summary
+
+def main():
+    """Main function for command line usage."""
+    parser = argparse.ArgumentParser(description="Generate synthetic WDI-shaped data files")
+    parser.add_argument("--out", type=str, default="synthetic_data",
+                       help="Output directory (default: synthetic_data)")
+    parser.add_argument("--scale", type=float, default=1.0,
+                       help="Multiple of a WDI release's indicator count (default: 1)")
+    parser.add_argument("--indicators", type=int, default=None,
+                       help=f"Number of indicators (overrides --scale; default: {BASE_INDICATORS} x scale)")
+    parser.add_argument("--countries", type=int, default=BASE_COUNTRIES,
+                       help=f"Number of countries, excluding aggregates (default: {BASE_COUNTRIES})")
+    parser.add_argument("--years", type=int, nargs=2, default=[1960, 2023], metavar=("FIRST", "LAST"),
+                       help="Year span (default: 1960 2023)")
+    parser.add_argument("--sparsity", type=float, default=0.5,
+                       help="Average share of missing values (default: 0.5)")
+    parser.add_argument("--distribution", choices=('mixed',) + tuple(DISTRIBUTIONS.values()), default='mixed',
+                       help="Value distribution of the synthetic indicators (default: mixed)")
+    parser.add_argument("--footnote-rate", type=float, default=0.001,
+                       help="Footnotes per cell (default: 0.001)")
+    parser.add_argument("--no-aggregates", action="store_true",
+                       help="Do not write World Bank aggregate rows")
+    parser.add_argument("--seed", type=int, default=0,
+                       help="Random seed (default: 0)")
+    parser.add_argument("--countries-per-block", type=int, default=None,
+                       help="Countries generated at once (default: up to "
+                            f"{MAX_COUNTRIES_PER_BLOCK}, within {config.SYNTHETIC_BLOCK_VALUES:,} values)")
+
+    args = parser.parse_args()
+    if args.countries_per_block is not None and args.countries_per_block < 1:
+        parser.error("--countries-per-block must be at least 1")
+
+    indicators = args.indicators or int(round(BASE_INDICATORS * args.scale))
+    generate_dataset(args.out, indicators, args.countries, args.years[0], args.years[1],
+                     args.sparsity, args.seed, args.distribution, not args.no_aggregates,
+                     args.footnote_rate, args.countries_per_block)
+
+if __name__ == "__main__":
+    main()
@@ -2,11 +2,13 @@
 Utility script to quickly test and explore World Bank indicators
 """
 
-import pandas as pd
 import config
+from startup import lazy_import
 from process_wb_data import get_available_years_for_indicator, get_indicator_info
 from wb_globe import create_enhanced_3d_globe, add_indicator_statistics
 
+pd = lazy_import('pandas')
+
 def list_popular_indicators():
     """List popular indicators available for quick access."""
     print("🌟 Popular World Bank Indicators:")
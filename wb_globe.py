@@ -1,13 +1,37 @@
-import plotly.express as px
-import plotly.graph_objects as go
-import pandas as pd
-import numpy as np
+from __future__ import annotations
+
+import base64
 import json
 import os
 import argparse
 from typing import Optional, Dict, List
 import config
 from process_wb_data import get_indicator_info
+from startup import lazy_import
+
+# Plotting libraries are imported on first use to keep app startup fast
+px = lazy_import('plotly.express')
+go = lazy_import('plotly.graph_objects')
+pd = lazy_import('pandas')
+np = lazy_import('numpy')
+
+# Orthographic globe styling shared by the single and comparison globes
+GLOBE_GEO_STYLE = dict(
+    projection_type='orthographic',
+    projection_rotation=dict(lon=0, lat=20, roll=0),
+    showland=True,
+    landcolor='rgba(50, 50, 50, 0.8)',
+    showocean=True,
+    oceancolor='rgba(0, 20, 40, 0.9)',
+    showlakes=True,
+    lakecolor='rgba(0, 30, 60, 0.7)',
+    showcountries=True,
+    countrycolor='rgba(255, 255, 255, 0.2)',
+    coastlinecolor='rgba(255, 255, 255, 0.4)',
+    showframe=False,
+    showcoastlines=True,
+    bgcolor='rgba(0, 0, 0, 0)'
+)
 
 def determine_color_scheme(indicator_code: str) -> str:
     """Determine appropriate color scheme based on indicator category."""
@@ -16,13 +40,54 @@ def determine_color_scheme(indicator_code: str) -> str:
             return config.COLOR_SCHEMES.get(category, config.COLOR_SCHEMES["default"])
     return config.COLOR_SCHEMES["default"]
 
+def get_value_precision(values: pd.Series) -> int:
+    """Decimal places worth keeping for an indicator's values.
+    
+    Enough for the two decimals of the hover text and for
+    COMPACT_SIGNIFICANT_DIGITS digits of the value range, so small-magnitude
+    indicators keep their colors. Values that are whole numbers in the
+    source (counts such as population) keep no decimals at all.
+    """
+    if values.empty or (values == values.round()).all():
+        return 0
+    spread = float(values.max() - values.min()) or float(values.abs().max())
+    if not spread > 0:
+        return config.HOVER_DECIMALS
+    return max(config.HOVER_DECIMALS, config.COMPACT_SIGNIFICANT_DIGITS - int(np.floor(np.log10(spread))) - 1)
+
+def _fits_float32(values: np.ndarray, decimals: int) -> bool:
+    """Check that float32 reproduces the values at the displayed precision."""
+    as_float32 = values.astype(np.float32).astype(np.float64)
+    return bool(np.all(np.abs(as_float32 - values) < 0.5 * 10.0 ** -decimals))
+
+def describe_source_years(df: pd.DataFrame) -> pd.Series:
+    """Hover lines naming the year behind each value of a gap-filled slice."""
+    labels = 'Year: ' + df['SourceYear'].astype(str)
+    labels = labels.where(df['GapFill'] != 'latest', labels + ' (most recent)')
+    return labels.where(df['GapFill'] != 'interpolated', labels + ' (interpolated)')
+
 def create_enhanced_3d_globe(df_processed: pd.DataFrame, 
                            indicator_code: str,
                            year: str,
                            geojson_url: str = config.GEOJSON_URL,
                            color_column: str = 'IndicatorValue', 
-                           hover_name_column: str = 'CountryName') -> go.Figure:
-    """Creates an enhanced 3D globe visualization for World Bank indicators."""
+                           hover_name_column: str = 'CountryName',
+                           compact: bool = False,
+                           classification: str = config.GLOBE_CLASSIFICATION,
+                           metric: str = 'value') -> go.Figure:
+    """Creates an enhanced 3D globe visualization for World Bank indicators.
+    
+    Colors use one scale for every year of the indicator: the classes of
+    ``classification`` ('fisher_jenks', 'quantile', 'equal_interval') or, with
+    ``'continuous'``, a continuous scale over the indicator's full range.
+    Slices of a derived ``metric`` (see ``derived_metrics.get_metric_slice``)
+    are titled after the metric and classified on their own values.
+    
+    With ``compact=True`` values are rounded to the precision shown on hover
+    and the hover text reads them from ``z`` instead of a duplicated
+    ``customdata`` column where possible. Pass the result through
+    ``encode_compact_figure`` to also send the arrays as binary typed arrays.
+    """
     
     if df_processed.empty:
         print("Warning: No data to visualize")
@@ -32,47 +97,116 @@ def create_enhanced_3d_globe(df_processed: pd.DataFrame,
     indicator_info = get_indicator_info(indicator_code)
     indicator_name = indicator_info['name']
     unit = indicator_info['unit']
+    if metric != 'value':
+        from derived_metrics import describe_metric
+        metric_label, percent = describe_metric(metric)
+        indicator_name = f"{metric_label}: {indicator_name}"
+        unit = '%' if percent else unit
     
     # Determine color scheme based on indicator type
     color_scheme = determine_color_scheme(indicator_code)
     
-    # Apply log transformation for better color differentiation if values span multiple orders of magnitude
-    values = df_processed[color_column]
-    use_log_scale = (values.max() / values.min()) > 1000 if values.min() > 0 else False
+    # Breaks and log scale come from all years of the indicator (stored or
+    # computed once per indicator), so colors are comparable from year to year
+    from classification import CLASSIFICATION_LABELS, assign_classes, class_labels, classify_values, get_class_breaks
     
-    if use_log_scale:
-        df_processed = df_processed.copy()
-        df_processed['LogValue'] = np.log10(df_processed[color_column])
-        color_col = 'LogValue'
+    values = df_processed[color_column]
+    classified = classification != 'continuous'
+    method = classification if classified else 'equal_interval'
+    scale = get_class_breaks(indicator_code, method) if color_column == 'IndicatorValue' and metric == 'value' else None
+    if scale is None:
+        scale = classify_values(values, method)
+    use_log_scale = scale['log_scale'] and values.min() > 0
+    
+    colorscale = color_scheme
+    colorbar = dict(titleside="right", thickness=15, len=0.7, x=1.02)
+    customdata = df_processed[[color_column]]  # Pass original values for hover
+    value_ref = 'customdata[0]'
+    
+    if classified:
+        breaks = scale['breaks']
+        z_values = assign_classes(values, breaks).astype(np.uint8)
+        colors = px.colors.sample_colorscale(color_scheme, [i / max(len(breaks) - 1, 1) for i in range(len(breaks))])
+        colorscale = []
+        for i, color in enumerate(colors):
+            colorscale += [[i / len(colors), color], [(i + 1) / len(colors), color]]
+        colorbar.update(tickvals=list(range(len(breaks))), ticktext=class_labels(scale['min'], breaks))
+        scale_note = f" ({CLASSIFICATION_LABELS[classification]})"
+        zmin, zmax = -0.5, len(breaks) - 0.5
+    elif use_log_scale:
+        # Log transformation for indicators spanning several orders of magnitude
+        z_values = np.log10(values)
         scale_note = " (Log Scale)"
+        zmin, zmax = np.log10(scale['min']), np.log10(scale['breaks'][-1])
     else:
-        color_col = color_column
+        z_values = values
         scale_note = ""
+        zmin, zmax = scale['min'], scale['breaks'][-1]
+    
+    if compact:
+        decimals = get_value_precision(values)
+        raw_values = values.round(decimals).to_numpy(dtype=np.float64)
+        if classified or use_log_scale:
+            # Colors only need the class or the log values to a few decimals
+            if use_log_scale and not classified:
+                z_values = z_values.round(config.LOG_SCALE_DECIMALS).to_numpy(dtype=np.float32)
+            customdata = raw_values
+            value_ref = 'customdata'
+        elif _fits_float32(raw_values, decimals):
+            # z carries the exact hover values, so customdata is redundant
+            z_values = raw_values.astype(np.float32)
+            customdata = None
+            value_ref = 'z'
+        else:
+            z_values = raw_values
+            customdata = None
+            value_ref = 'z'
+    
+    # Gap-filled slices say which year each value comes from, derived
+    # metrics their end points, nowcasts which values are projected, and
+    # attached footnotes or anomaly flags are shown below
+    hover_lines = None
+    year_line = f'Year: {year}<br>'
+    if {'SourceYear', 'StartYear', 'Estimated', 'Note', 'Anomaly'} & set(df_processed.columns):
+        if 'SourceYear' in df_processed.columns:
+            hover_lines = describe_source_years(df_processed)
+        else:
+            hover_lines = pd.Series(f'Year: {year}', index=df_processed.index)
+        if 'StartYear' in df_processed.columns:
+            from derived_metrics import describe_metric_years
+            hover_lines = hover_lines + '<br>' + describe_metric_years(df_processed)
+        if 'Estimated' in df_processed.columns:
+            from nowcast import describe_estimates
+            hover_lines = hover_lines + describe_estimates(df_processed)
+        if 'Note' in df_processed.columns:
+            from wdi_notes import format_hover_notes
+            hover_lines = hover_lines + format_hover_notes(df_processed['Note'])
+        if 'Anomaly' in df_processed.columns:
+            from anomalies import format_hover_anomalies
+            hover_lines = hover_lines + format_hover_anomalies(df_processed['Anomaly'])
+        year_line = '%{hovertext}<br>'
     
     # Create custom hover template
     hover_template = (
         '<b>%{text}</b><br>' +
-        f'{indicator_name}: %{{customdata[0]:,.2f}} {unit}<br>' +
+        f'{indicator_name}: %{{{value_ref}:,.2f}} {unit}<br>' +
         'ISO Code: %{location}<br>' +
-        f'Year: {year}<br>' +
+        year_line +
         '<extra></extra>'
     )
     
     # Create the main choropleth trace
     choropleth_trace = go.Choropleth(
         locations=df_processed['ISO3'],
-        z=df_processed[color_col],
+        z=z_values,
         text=df_processed[hover_name_column],
-        customdata=df_processed[[color_column]],  # Pass original values for hover
+        hovertext=hover_lines,
+        customdata=customdata,
         hovertemplate=hover_template,
-        colorscale=color_scheme,
-        colorbar=dict(
-            title=f"{indicator_name} {unit}{scale_note}",
-            titleside="right",
-            thickness=15,
-            len=0.7,
-            x=1.02
-        ),
+        colorscale=colorscale,
+        zmin=zmin,
+        zmax=zmax,
+        colorbar=dict(title=f"{indicator_name} {unit}{scale_note}", **colorbar),
         marker_line_color='rgba(255,255,255,0.3)',
         marker_line_width=0.5
     )
@@ -80,6 +214,20 @@ def create_enhanced_3d_globe(df_processed: pd.DataFrame,
     # Create the figure
     fig = go.Figure(data=[choropleth_trace])
     
+    # Projected values of a nowcast are outlined on top of the colors
+    if 'Estimated' in df_processed.columns and df_processed['Estimated'].any():
+        estimated = df_processed.loc[df_processed['Estimated'].astype(bool), 'ISO3']
+        fig.add_trace(go.Choropleth(
+            locations=estimated,
+            z=np.zeros(len(estimated), dtype=np.uint8),
+            colorscale=[[0, 'rgba(0,0,0,0)'], [1, 'rgba(0,0,0,0)']],
+            showscale=False,
+            hoverinfo='skip',
+            name='Projected',
+            marker_line_color='rgba(255,255,255,0.9)',
+            marker_line_width=1.5
+        ))
+    
     # Enhanced layout with better styling
     fig.update_layout(
         title={
@@ -88,22 +236,7 @@ def create_enhanced_3d_globe(df_processed: pd.DataFrame,
             'xanchor': 'center',
             'font': {'size': 20, 'color': '#ffffff', 'family': 'Arial Black'}
         },
-        geo=dict(
-            projection_type='orthographic',
-            projection_rotation=dict(lon=0, lat=20, roll=0),
-            showland=True,
-            landcolor='rgba(50, 50, 50, 0.8)',
-            showocean=True,
-            oceancolor='rgba(0, 20, 40, 0.9)',
-            showlakes=True,
-            lakecolor='rgba(0, 30, 60, 0.7)',
-            showcountries=True,
-            countrycolor='rgba(255, 255, 255, 0.2)',
-            coastlinecolor='rgba(255, 255, 255, 0.4)',
-            showframe=False,
-            showcoastlines=True,
-            bgcolor='rgba(0, 0, 0, 0)'
-        ),
+        geo=GLOBE_GEO_STYLE,
         paper_bgcolor='rgba(10, 10, 20, 1)',
         plot_bgcolor='rgba(10, 10, 20, 1)',
         font=dict(color='white', family='Arial'),
@@ -125,84 +258,140 @@ def create_enhanced_3d_globe(df_processed: pd.DataFrame,
     
     return fig
 
+def _encode_typed_array(values) -> Optional[Dict[str, str]]:
+    """Encode a numeric array as a Plotly typed-array spec, or None if not numeric."""
+    if isinstance(values, dict):
+        return None  # Already encoded
+    array = np.asarray(values)
+    if array.dtype.kind not in 'iuf' or array.ndim == 0:
+        return None
+    
+    if array.dtype.kind == 'f' and array.dtype.itemsize > 4 and np.array_equal(
+            array.astype(np.float32).astype(array.dtype), array, equal_nan=True):
+        array = array.astype(np.float32)
+    
+    dtype = array.dtype.str[1:]
+    if dtype not in ('i1', 'u1', 'i2', 'u2', 'i4', 'u4', 'f4', 'f8'):
+        dtype = 'f8'
+    little_endian = array.astype(np.dtype(dtype).newbyteorder('<'))
+    
+    encoded = {
+        'dtype': dtype,
+        'bdata': base64.b64encode(little_endian.tobytes()).decode('ascii')
+    }
+    if array.ndim > 1:
+        encoded['shape'] = ','.join(str(size) for size in array.shape)
+    return encoded
+
+def encode_compact_figure(fig: go.Figure) -> Dict:
+    """Convert a figure to a compact plain-dict payload for the browser.
+    
+    Numeric ``z`` and ``customdata`` arrays become base64 typed arrays, which
+    Plotly.js decodes natively, and animation frames drop ``locations``,
+    ``text`` and ``hovertemplate`` when they repeat the base trace, since
+    frames are merged onto the existing traces.
+    """
+    fig_dict = fig.to_plotly_json()
+    base_traces = fig_dict.get('data', [])
+    
+    def compact_trace(trace: Dict, base: Optional[Dict] = None) -> Dict:
+        for key in ('z', 'customdata'):
+            if trace.get(key) is not None:
+                encoded = _encode_typed_array(trace[key])
+                if encoded is not None:
+                    trace[key] = encoded
+        if base is not None:
+            for key in ('locations', 'text', 'hovertemplate'):
+                if key in trace and key in base and np.array_equal(
+                        np.asarray(trace[key], dtype=object), np.asarray(base[key], dtype=object)):
+                    del trace[key]
+        return trace
+    
+    for trace in base_traces:
+        compact_trace(trace)
+    
+    for frame in fig_dict.get('frames', []):
+        frame['data'] = [
+            compact_trace(trace, base_traces[i] if i < len(base_traces) else None)
+            for i, trace in enumerate(frame.get('data', []))
+        ]
+    
+    return fig_dict
+
+def get_figure_payload_size(figure) -> int:
+    """Size in bytes of the JSON sent to the browser for a figure or figure dict."""
+    import plotly.io as pio
+    return len(pio.to_json(figure, validate=False).encode('utf-8'))
+
 def add_indicator_statistics(df: pd.DataFrame, indicator_code: str, year: str) -> None:
     """Prints comprehensive statistics for the indicator."""
     if df.empty:
         print("No data available for statistics")
         return
     
+    from process_wb_data import get_indicator_summary_stats
+    
     indicator_info = get_indicator_info(indicator_code)
     indicator_name = indicator_info['name']
     unit = indicator_info['unit']
     
+    # Precomputed when the WDI store is ingested, otherwise computed from df
+    # (always for gap-filled, derived and nowcast slices, which differ from the stored year)
+    stats = get_indicator_summary_stats(df, indicator_code,
+                                        None if {'SourceYear', 'StartYear', 'Estimated'} & set(df.columns) else year)
+    
     print("\\n" + "="*80)
     print(f"📊 {indicator_name.upper()} - {year}")
     print("="*80)
     
-    total_countries = len(df)
-    mean_value = df['IndicatorValue'].mean()
-    median_value = df['IndicatorValue'].median()
-    std_value = df['IndicatorValue'].std()
-    min_value = df['IndicatorValue'].min()
-    max_value = df['IndicatorValue'].max()
-    
-    print(f"Total Countries with Data: {total_countries}")
+    print(f"Total Countries with Data: {stats['count']}")
     unit_str = unit if unit and str(unit) != 'nan' else ''
-    print(f"Mean Value: {mean_value:,.2f} {unit_str}")
-    print(f"Median Value: {median_value:,.2f} {unit_str}")
-    print(f"Standard Deviation: {std_value:,.2f} {unit_str}")
-    print(f"Range: {min_value:,.2f} - {max_value:,.2f} {unit_str}")
+    print(f"Mean Value: {stats['mean']:,.2f} {unit_str}")
+    print(f"Median Value: {stats['median']:,.2f} {unit_str}")
+    print(f"Standard Deviation: {stats['std']:,.2f} {unit_str}")
+    print(f"Range: {stats['min']:,.2f} - {stats['max']:,.2f} {unit_str}")
     
     print("\\n🏆 TOP 10 COUNTRIES:")
     print("-" * 50)
-    top_10 = df.head(10)
-    for i, (_, row) in enumerate(top_10.iterrows(), 1):
+    for i, row in enumerate(stats['top_10'], 1):
         print(f"{i:2d}. {row['CountryName']:<25} {row['IndicatorValue']:>12,.2f} {unit_str}")
     
     print("\\n📉 BOTTOM 10 COUNTRIES:")
     print("-" * 50)
-    bottom_10 = df.tail(10)[::-1]  # Reverse to show lowest first
-    for i, (_, row) in enumerate(bottom_10.iterrows(), 1):
+    for i, row in enumerate(stats['bottom_10'], 1):
         print(f"{i:2d}. {row['CountryName']:<25} {row['IndicatorValue']:>12,.2f} {unit_str}")
     
     print("\\n📈 DISTRIBUTION:")
     print("-" * 30)
-    quartiles = df['IndicatorValue'].quantile([0.25, 0.5, 0.75])
-    print(f"25th Percentile: {quartiles[0.25]:,.2f} {unit_str}")
-    print(f"50th Percentile: {quartiles[0.5]:,.2f} {unit_str}")
-    print(f"75th Percentile: {quartiles[0.75]:,.2f} {unit_str}")
+    print(f"25th Percentile: {stats['q25']:,.2f} {unit_str}")
+    print(f"50th Percentile: {stats['median']:,.2f} {unit_str}")
+    print(f"75th Percentile: {stats['q75']:,.2f} {unit_str}")
     print("="*80 + "\\n")
 
-def create_time_series_visualization(indicator_code: str, years: List[str], country_limit: int = 20) -> Optional[go.Figure]:
-    """Create a time series visualization showing top countries over multiple years."""
+def create_time_series_visualization(indicator_code: str, years: List[str], country_limit: int = 20,
+                                    rank_by: Optional[str] = None) -> Optional[go.Figure]:
+    """Create a time series visualization showing top countries over multiple years.
     
-    from process_wb_data import process_indicator_for_year
+    Countries are ranked by ``rank_by`` (a year, ``'latest'``, ``'mean'``, ...);
+    by default the latest requested year is used.
+    """
+    
+    from process_wb_data import load_indicator_time_series, select_top_countries
     
     print(f"\\nCreating time series visualization for {indicator_code}...")
     
-    # Collect data for all years
-    all_data = []
-    for year in years:
-        df = process_indicator_for_year(indicator_code, year)
-        if df is not None:
-            df['Year'] = int(year)
-            all_data.append(df)
+    # Load all requested years in one pass
+    combined_df = load_indicator_time_series(indicator_code, years)
     
-    if not all_data:
+    if combined_df is None or combined_df.empty:
         print("No data available for time series")
         return None
     
-    # Combine all years
-    combined_df = pd.concat(all_data, ignore_index=True)
-    
-    # Get top countries by latest year average
-    latest_year = max(years)
-    latest_df = process_indicator_for_year(indicator_code, latest_year)
-    if latest_df is None:
+    # Get top countries by the requested ranking
+    top_countries = select_top_countries(combined_df, country_limit, rank_by or max(years))
+    if not top_countries:
         return None
     
-    top_countries = latest_df.head(country_limit)['ISO3'].tolist()
-    
     # Filter for top countries only
     time_series_df = combined_df[combined_df['ISO3'].isin(top_countries)]
     
@@ -228,6 +417,8 @@ def create_time_series_visualization(indicator_code: str, years: List[str], coun
 
 def main():
     """Main function for command line usage."""
+    from profiling import add_profile_argument, profiled
+
     parser = argparse.ArgumentParser(description="Generate 3D globe visualizations for World Bank indicators")
     parser.add_argument("--indicator", type=str, required=True,
                        help="World Bank indicator code (e.g., NY.GDP.PCAP.CD)")
@@ -238,6 +429,24 @@ def main():
     parser.add_argument("--years", type=str, nargs='+', 
                        default=[str(y) for y in range(2018, 2024)],
                        help="Years for time series (default: 2018-2023)")
+    parser.add_argument("--compact", action="store_true",
+                       help="Use compact figure encoding and report the payload size")
+    parser.add_argument("--rank-by", type=str, default=None,
+                       help="Rank time series countries by a year, 'latest', 'mean', 'median', 'min' or 'max' "
+                            "(default: last requested year)")
+    parser.add_argument("--gap-fill", choices=config.GAP_FILL_MODES, default=None,
+                       help="Fill countries without data in --year from nearby years")
+    parser.add_argument("--window", type=int, default=config.GAP_FILL_WINDOW,
+                       help=f"Years to look around --year when gap filling (default: {config.GAP_FILL_WINDOW})")
+    parser.add_argument("--classification", choices=('fisher_jenks', 'quantile', 'equal_interval', 'continuous'),
+                       default=config.GLOBE_CLASSIFICATION,
+                       help=f"Color classes shared by all years of the indicator (default: {config.GLOBE_CLASSIFICATION})")
+    parser.add_argument("--nowcast", action="store_true",
+                       help="Project countries whose data stops before --year from their recent trend")
+    parser.add_argument("--metric", type=str, default='value',
+                       help="Derived metric to show instead of the values: yoy, change:N, pct_change:N, cagr:N "
+                            "or <metric>:since<YEAR> (see derived_metrics.py)")
+    add_profile_argument(parser)
     
     args = parser.parse_args()
     
@@ -248,18 +457,39 @@ def main():
     # Import here to avoid circular imports
     from process_wb_data import process_indicator_for_year
     
-    # Load and process data
-    df = process_indicator_for_year(args.indicator, args.year)
-    
-    if df is None or df.empty:
-        print(f"No data available for {args.indicator} in {args.year}")
-        return
-    
-    # Create and show 3D globe
-    print("Creating 3D globe visualization...")
-    fig = create_enhanced_3d_globe(df, args.indicator, args.year)
+    # Loading and building the figure are profiled; displaying it is not
+    with profiled('wb_globe', {'indicator': args.indicator, 'year': args.year},
+                  mode=args.profile, enabled=args.profile is not None):
+        # Load and process data (a derived metric uses --window as its gap tolerance)
+        if args.nowcast:
+            from nowcast import get_nowcast_slice
+            df = get_nowcast_slice(args.indicator, args.year)
+        elif args.metric != 'value':
+            from derived_metrics import get_metric_slice
+            df = get_metric_slice(args.indicator, args.year, args.metric,
+                                  tolerance=args.window if args.gap_fill else 0)
+        else:
+            df = process_indicator_for_year(args.indicator, args.year,
+                                            gap_fill=args.gap_fill, window=args.window)
+        
+        if df is None or df.empty:
+            print(f"No data available for {args.indicator} in {args.year}")
+            return
+        
+        # Create and show 3D globe
+        print("Creating 3D globe visualization...")
+        fig = create_enhanced_3d_globe(df, args.indicator, args.year, compact=args.compact,
+                                       classification=args.classification, metric=args.metric)
     
     if fig:
+        if args.compact:
+            full_size = get_figure_payload_size(create_enhanced_3d_globe(df, args.indicator, args.year,
+                                                                         classification=args.classification,
+                                                                         metric=args.metric))
+            compact_size = get_figure_payload_size(encode_compact_figure(fig))
+            print(f"Figure payload: {compact_size:,} bytes compact vs {full_size:,} bytes full "
+                  f"({100 * (1 - compact_size / full_size):.0f}% smaller)")
+        
         print("Displaying 3D Globe...")
         fig.show()
         
@@ -269,7 +499,7 @@ def main():
     # Create time series if requested
     if args.time_series:
         print("Creating time series visualization...")
-        ts_fig = create_time_series_visualization(args.indicator, args.years)
+        ts_fig = create_time_series_visualization(args.indicator, args.years, rank_by=args.rank_by)
         if ts_fig:
             print("Displaying time series...")
             ts_fig.show()
@@ -0,0 +1,160 @@
+"""
+Unified indicator metadata store.
+
+Every column of WDISeries.csv and the per-year notes of WDIseries-time.csv are
+ingested once into Parquet tables, then loaded into an in-memory index keyed
+by series code, so the info panel, the globe and the API look up a full
+indicator record in constant time instead of re-reading the series file.
+
+Usage:
+    python wdi_metadata.py --ingest [--force]
+    python wdi_metadata.py --indicator NY.GDP.PCAP.CD
+"""
+
+from __future__ import annotations
+
+import argparse
+import re
+from typing import Dict, Optional
+
+import config
+from startup import lazy_import, timed
+from wdi_store import ingest_locked
+
+pd = lazy_import('pandas')
+
+METADATA_FILES = (config.WDI_SERIES_FILE, config.WDI_SERIES_TIME_FILE)
+
+# Series file columns exposed under the field names the app already uses;
+# every other column is exposed as its snake_case name
+FIELD_NAMES = {
+    'Series Code': 'code',
+    'Indicator Name': 'name',
+    'Unit of measure': 'unit',
+    'Short definition': 'definition'
+}
+
+_METADATA_CACHE: Dict[str, object] = {}
+
+def get_metadata_fingerprint() -> str:
+    """Fingerprint of the series and series-time files."""
+    from process_wb_data import get_data_fingerprint
+    return get_data_fingerprint(METADATA_FILES)
+
+def field_name(column: str) -> str:
+    """Field name of a series file column (e.g. 'Aggregation method' -> 'aggregation_method')."""
+    return FIELD_NAMES.get(column) or re.sub(r'[^a-z0-9]+', '_', column.lower()).strip('_')
+
+def _read_series_time_notes() -> pd.DataFrame:
+    try:
+        notes = pd.read_csv(config.WDI_SERIES_TIME_FILE, usecols=['SeriesCode', 'Year', 'DESCRIPTION'],
+                            dtype=str).dropna()
+    except FileNotFoundError:
+        print(f"Warning: Could not find {config.WDI_SERIES_TIME_FILE}")
+        return pd.DataFrame({'code': pd.Series(dtype=str), 'year': pd.Series(dtype='int16'),
+                             'note': pd.Series(dtype=str)})
+    return pd.DataFrame({
+        'code': notes['SeriesCode'],
+        'year': pd.to_numeric(notes['Year'].str.removeprefix('YR'), errors='coerce').astype('Int16'),
+        'note': notes['DESCRIPTION'].str.strip()
+    }).dropna().sort_values(['code', 'year']).reset_index(drop=True)
+
+def metadata_is_current() -> bool:
+    """True if both metadata tables were built from the current series files."""
+    from wdi_store import is_derived_table_current
+
+    fingerprint = get_metadata_fingerprint()
+    return all(is_derived_table_current(filename, fingerprint)
+               for filename in (config.SERIES_METADATA_FILE, config.SERIES_TIME_FILE))
+
+@ingest_locked(metadata_is_current)
+def ingest_metadata(force: bool = False) -> bool:
+    """Build the series metadata and series-time tables if out of date."""
+    from wdi_store import write_derived_table
+
+    if not force and metadata_is_current():
+        return True
+    fingerprint = get_metadata_fingerprint()
+
+    try:
+        with timed('ingest series metadata'):
+            series_df = pd.read_csv(config.WDI_SERIES_FILE, dtype=str)
+    except FileNotFoundError:
+        print(f"Error: Could not find {config.WDI_SERIES_FILE}")
+        return False
+
+    series_df = series_df.loc[:, ~series_df.columns.str.startswith('Unnamed')]
+    series_df = series_df.rename(columns=field_name).sort_values('code').reset_index(drop=True)
+    series_time = _read_series_time_notes()
+
+    write_derived_table(series_df, config.SERIES_METADATA_FILE, fingerprint)
+    write_derived_table(series_time, config.SERIES_TIME_FILE, fingerprint)
+    _METADATA_CACHE.clear()
+    print(f"Indexed metadata for {len(series_df):,} series and {len(series_time):,} series-time notes")
+    return True
+
+def load_metadata_index() -> Dict[str, Dict]:
+    """In-memory metadata index, reloaded only when the source files change.
+
+    Returns ``{'series': {code: record}, 'series_time': {code: {year: note}}}``.
+    """
+    fingerprint = get_metadata_fingerprint()
+    if _METADATA_CACHE.get('fingerprint') == fingerprint:
+        return _METADATA_CACHE['index']
+
+    from wdi_store import read_derived_table
+
+    index = {'series': {}, 'series_time': {}}
+    if ingest_metadata():
+        series_df = read_derived_table(config.SERIES_METADATA_FILE)
+        index['series'] = {
+            record['code']: record
+            for record in series_df.astype(object).where(series_df.notna(), '').to_dict('records')
+        }
+        series_time = read_derived_table(config.SERIES_TIME_FILE)
+        for code, group in series_time.groupby('code', sort=False):
+            index['series_time'][code] = dict(zip(group['year'].astype(int), group['note']))
+
+    _METADATA_CACHE.update({'fingerprint': fingerprint, 'index': index})
+    return index
+
+def get_series_metadata(indicator_code: str) -> Optional[Dict[str, str]]:
+    """Full metadata record of an indicator, or None if it is not in the series file."""
+    return load_metadata_index()['series'].get(indicator_code)
+
+def get_series_time_notes(indicator_code: str) -> Dict[int, str]:
+    """Per-year notes of an indicator from WDIseries-time.csv."""
+    return load_metadata_index()['series_time'].get(indicator_code, {})
+
+def main():
+    """Main function for command line usage."""
+    parser = argparse.ArgumentParser(description="Index and query World Bank indicator metadata")
+    parser.add_argument("--ingest", action="store_true",
+                       help="Build the metadata tables (rebuilt automatically when the files change)")
+    parser.add_argument("--force", action="store_true",
+                       help="Rebuild even if the metadata tables are up to date")
+    parser.add_argument("--indicator", type=str,
+                       help="Print the full metadata record of an indicator")
+
+    args = parser.parse_args()
+
+    if args.ingest:
+        ingest_metadata(args.force)
+
+    if args.indicator:
+        record = get_series_metadata(args.indicator)
+        if record is None:
+            print(f"No metadata found for {args.indicator}")
+            return
+        print()
+        for key, value in record.items():
+            if value:
+                print(f"{key:<35} {value}")
+        for year, note in sorted(get_series_time_notes(args.indicator).items()):
+            print(f"{'note ' + str(year):<35} {note}")
+
+    if not (args.ingest or args.indicator):
+        parser.print_help()
+
+if __name__ == "__main__":
+    main()
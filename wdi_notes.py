@@ -0,0 +1,189 @@
+"""
+Indexed stores for WDI footnotes and country-series notes.
+
+WDIfootnote.csv (one note per country, series and year) and
+WDIcountry-series.csv (one note per country and series) are streamed once
+into Parquet tables sorted by series, so the notes for a globe slice are read
+from a few row groups instead of the whole file. The tables are built on
+first use and rebuilt when the note files change.
+
+Usage:
+    python wdi_notes.py --ingest [--force]
+    python wdi_notes.py --indicator SP.POP.TOTL --year 2020 [--country USA]
+"""
+
+from __future__ import annotations
+
+import argparse
+import html
+from functools import lru_cache
+from typing import Dict, Optional
+
+import config
+from startup import lazy_import, timed
+from wdi_store import ingest_locked
+
+pd = lazy_import('pandas')
+
+NOTE_FILES = (config.WDI_FOOTNOTE_FILE, config.WDI_COUNTRY_SERIES_FILE)
+
+def get_notes_fingerprint() -> str:
+    """Fingerprint of the footnote and country-series files."""
+    from process_wb_data import get_data_fingerprint
+    return get_data_fingerprint(NOTE_FILES)
+
+def _read_footnotes() -> pd.DataFrame:
+    """Stream WDIfootnote.csv into (SeriesCode, Year, CountryCode, Note) rows."""
+    chunks = []
+    for chunk in pd.read_csv(config.WDI_FOOTNOTE_FILE, usecols=['CountryCode', 'SeriesCode', 'Year', 'DESCRIPTION'],
+                             dtype=str, chunksize=config.CSV_CHUNK_SIZE):
+        chunk = chunk.dropna()
+        chunks.append(pd.DataFrame({
+            'SeriesCode': chunk['SeriesCode'],
+            'Year': pd.to_numeric(chunk['Year'].str.removeprefix('YR'), errors='coerce').astype('Int16'),
+            'CountryCode': chunk['CountryCode'],
+            'Note': chunk['DESCRIPTION'].str.strip()
+        }).dropna())
+    footnotes = pd.concat(chunks, ignore_index=True)
+    return footnotes.sort_values(['SeriesCode', 'Year', 'CountryCode']).reset_index(drop=True)
+
+def _read_country_series_notes() -> pd.DataFrame:
+    """Read WDIcountry-series.csv into (SeriesCode, CountryCode, Note) rows."""
+    notes = pd.read_csv(config.WDI_COUNTRY_SERIES_FILE, usecols=['CountryCode', 'SeriesCode', 'DESCRIPTION'],
+                        dtype=str).dropna()
+    notes = pd.DataFrame({
+        'SeriesCode': notes['SeriesCode'],
+        'CountryCode': notes['CountryCode'],
+        'Note': notes['DESCRIPTION'].str.strip()
+    })
+    return notes.sort_values(['SeriesCode', 'CountryCode']).reset_index(drop=True)
+
+def notes_are_current() -> bool:
+    """True if both note tables were built from the current note files."""
+    from wdi_store import is_derived_table_current
+
+    fingerprint = get_notes_fingerprint()
+    return all(is_derived_table_current(filename, fingerprint)
+               for filename in (config.FOOTNOTES_FILE, config.COUNTRY_SERIES_NOTES_FILE))
+
+@ingest_locked(notes_are_current)
+def ingest_notes(force: bool = False) -> bool:
+    """Build both note tables if they are missing or out of date."""
+    from wdi_store import write_derived_table
+
+    if not force and notes_are_current():
+        return True
+    fingerprint = get_notes_fingerprint()
+
+    try:
+        with timed('ingest footnotes'):
+            footnotes = _read_footnotes()
+            country_series = _read_country_series_notes()
+    except FileNotFoundError as e:
+        print(f"Error: Could not find notes file: {e}")
+        return False
+
+    write_derived_table(footnotes, config.FOOTNOTES_FILE, fingerprint)
+    write_derived_table(country_series, config.COUNTRY_SERIES_NOTES_FILE, fingerprint)
+    _load_slice_footnotes.cache_clear()
+    _load_country_series_notes.cache_clear()
+    print(f"Indexed {len(footnotes):,} footnotes and {len(country_series):,} country-series notes")
+    return True
+
+@lru_cache(maxsize=64)
+def _load_slice_footnotes(indicator_code: str, years: tuple, fingerprint: str) -> pd.DataFrame:
+    from wdi_store import read_derived_table
+
+    return read_derived_table(config.FOOTNOTES_FILE,
+                              filters=[('SeriesCode', '==', indicator_code), ('Year', 'in', list(years))],
+                              columns=['CountryCode', 'Year', 'Note'])
+
+@lru_cache(maxsize=64)
+def _load_country_series_notes(indicator_code: str, fingerprint: str) -> Dict[str, str]:
+    from wdi_store import read_derived_table
+
+    notes = read_derived_table(config.COUNTRY_SERIES_NOTES_FILE,
+                               filters=[('SeriesCode', '==', indicator_code)],
+                               columns=['CountryCode', 'Note'])
+    return dict(zip(notes['CountryCode'], notes['Note']))
+
+def get_footnotes(indicator_code: str, year: str) -> Dict[str, str]:
+    """Footnotes of an (indicator, year) slice keyed by World Bank country code."""
+    if not ingest_notes():
+        return {}
+    footnotes = _load_slice_footnotes(indicator_code, (int(year),), get_notes_fingerprint())
+    return dict(zip(footnotes['CountryCode'], footnotes['Note']))
+
+def get_country_series_notes(indicator_code: str) -> Dict[str, str]:
+    """Country-level notes on how an indicator is compiled, keyed by country code."""
+    if not ingest_notes():
+        return {}
+    return _load_country_series_notes(indicator_code, get_notes_fingerprint())
+
+def get_cell_notes(country_code: str, indicator_code: str, year: str) -> Dict[str, Optional[str]]:
+    """The footnote and country-series note of a single (country, series, year) cell."""
+    return {
+        'footnote': get_footnotes(indicator_code, year).get(country_code),
+        'country_series_note': get_country_series_notes(indicator_code).get(country_code)
+    }
+
+def attach_footnotes(df: pd.DataFrame, indicator_code: str) -> pd.DataFrame:
+    """Add a ``Note`` column with the footnote of each row of a slice.
+
+    Gap-filled slices are matched on ``SourceYear``, so a value carried from
+    an earlier year keeps that year's footnote.
+    """
+    if df.empty or not ingest_notes():
+        return df
+
+    year_column = 'SourceYear' if 'SourceYear' in df.columns else 'Year'
+    years = tuple(sorted(int(year) for year in df[year_column].unique()))
+    footnotes = _load_slice_footnotes(indicator_code, years, get_notes_fingerprint())
+    footnotes = footnotes.astype({'Year': int}).set_index(['CountryCode', 'Year'])['Note']
+
+    keys = pd.MultiIndex.from_arrays([df['CountryCode'], df[year_column].astype(int)])
+    df = df.copy()
+    df['Note'] = footnotes.reindex(keys).to_numpy()
+    return df
+
+def format_hover_notes(notes: pd.Series) -> pd.Series:
+    """Hover lines for a ``Note`` column: escaped, shortened, empty when missing."""
+    text = notes.fillna('').astype(str).map(html.escape)
+    long_notes = text.str.len() > config.HOVER_NOTE_LENGTH
+    text = text.where(~long_notes, text.str.slice(0, config.HOVER_NOTE_LENGTH - 3) + '...')
+    return ('<br>📝 ' + text).where(text != '', '')
+
+def main():
+    """Main function for command line usage."""
+    parser = argparse.ArgumentParser(description="Index and query WDI footnotes and country-series notes")
+    parser.add_argument("--ingest", action="store_true",
+                       help="Build the note tables (rebuilt automatically when the files change)")
+    parser.add_argument("--force", action="store_true",
+                       help="Rebuild even if the note tables are up to date")
+    parser.add_argument("--indicator", type=str,
+                       help="World Bank indicator code (e.g., SP.POP.TOTL)")
+    parser.add_argument("--year", type=str, default=config.DEFAULT_YEAR,
+                       help="Year of the footnotes (default: 2023)")
+    parser.add_argument("--country", type=str,
+                       help="World Bank country code: print the notes of a single cell")
+
+    args = parser.parse_args()
+
+    if args.ingest:
+        ingest_notes(args.force)
+
+    if args.indicator and args.country:
+        notes = get_cell_notes(args.country.upper(), args.indicator, args.year)
+        print(f"\nFootnote: {notes['footnote'] or '-'}")
+        print(f"Country-series note: {notes['country_series_note'] or '-'}")
+    elif args.indicator:
+        footnotes = get_footnotes(args.indicator, args.year)
+        print(f"\n{len(footnotes)} footnotes for {args.indicator} in {args.year}:")
+        for country_code, note in sorted(footnotes.items()):
+            print(f"  {country_code}: {note}")
+
+    if not (args.ingest or args.indicator):
+        parser.print_help()
+
+if __name__ == "__main__":
+    main()
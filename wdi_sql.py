@@ -0,0 +1,227 @@
+"""
+Embedded SQL over the WDI store, metadata and notes.
+
+An in-process DuckDB connection exposes the columnar files in DATA_DIR as
+views, so filters and column selections are pushed down into the Parquet
+scans and a catalog-wide query reads only the row groups and columns it
+needs. Missing or outdated tables are built on first use. Every view has
+PascalCase columns; the snake_case fields of the metadata tables are
+renamed in their views.
+
+Views:
+    wdi                   IndicatorCode, CountryCode, ISO3 (NULL for aggregates), CountryName,
+                          Year, IndicatorValue
+    series                one row per indicator, every WDISeries.csv column (SeriesCode, Name, Unit, ...)
+    series_time_notes     SeriesCode, Year, Note
+    countries             every WDICountry.csv column (CountryCode, ShortName, Region, ...)
+    footnotes             SeriesCode, Year, CountryCode, Note
+    country_series_notes  SeriesCode, CountryCode, Note
+    summary_stats         per (IndicatorCode, Year): Count, Mean, Median, ...
+    summary_extremes      top and bottom countries per (IndicatorCode, Year)
+    rankings              Rank and Percentile per (IndicatorCode, Year, country), if built
+
+Usage:
+    python wdi_sql.py "SELECT SeriesCode, Name FROM series WHERE Name ILIKE '%CO2%'"
+    python wdi_sql.py --file query.sql --format csv --output result.csv
+    python wdi_sql.py --tables
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import sys
+from typing import TYPE_CHECKING, Dict, List, Optional, Union
+
+import config
+from startup import lazy_import, timed
+from wdi_store import ingest_locked
+
+if TYPE_CHECKING:
+    import pyarrow
+
+pd = lazy_import('pandas')
+pq = lazy_import('pyarrow.parquet')
+duckdb = lazy_import('duckdb')
+
+OUTPUT_FORMATS = ('table', 'csv', 'parquet', 'arrow')
+
+# View name -> derived table file in DATA_DIR
+SQL_VIEWS = {
+    'wdi': config.WDI_STORE_FILE,
+    'series': config.SERIES_METADATA_FILE,
+    'series_time_notes': config.SERIES_TIME_FILE,
+    'countries': config.COUNTRY_METADATA_FILE,
+    'footnotes': config.FOOTNOTES_FILE,
+    'country_series_notes': config.COUNTRY_SERIES_NOTES_FILE,
+    'summary_stats': config.SUMMARY_STATS_FILE,
+    'summary_extremes': config.SUMMARY_EXTREMES_FILE,
+    'rankings': config.RANKINGS_FILE
+}
+
+# View columns of metadata fields that are not plain PascalCase of the field
+VIEW_COLUMN_NAMES = {
+    'code': 'SeriesCode',
+    '2_alpha_code': 'Alpha2Code'
+}
+
+_CONNECTION: Dict[str, object] = {}
+
+def view_column_name(field: str) -> str:
+    """View column of a table field ('income_group' -> 'IncomeGroup'; PascalCase is kept)."""
+    if field != field.lower():
+        return field
+    return VIEW_COLUMN_NAMES.get(field) or ''.join(part.capitalize() for part in field.split('_'))
+
+def country_metadata_is_current() -> bool:
+    """True if the country metadata table was built from the current WDICountry.csv."""
+    from process_wb_data import get_data_fingerprint
+    from wdi_store import is_derived_table_current
+
+    return is_derived_table_current(config.COUNTRY_METADATA_FILE, get_data_fingerprint((config.WDI_COUNTRY_FILE,)))
+
+@ingest_locked(country_metadata_is_current)
+def ingest_country_metadata(force: bool = False) -> bool:
+    """Build the country metadata table from WDICountry.csv if out of date."""
+    from process_wb_data import get_data_fingerprint
+    from wdi_metadata import field_name
+    from wdi_store import write_derived_table
+
+    if not force and country_metadata_is_current():
+        return True
+    fingerprint = get_data_fingerprint((config.WDI_COUNTRY_FILE,))
+
+    try:
+        countries = pd.read_csv(config.WDI_COUNTRY_FILE, dtype=str)
+    except FileNotFoundError:
+        print(f"Error: Could not find {config.WDI_COUNTRY_FILE}")
+        return False
+
+    countries = countries.loc[:, ~countries.columns.str.startswith('Unnamed')]
+    countries = countries.rename(columns=field_name).sort_values('country_code').reset_index(drop=True)
+    write_derived_table(countries, config.COUNTRY_METADATA_FILE, fingerprint)
+    return True
+
+def prepare_tables() -> List[str]:
+    """Build any missing or outdated tables; returns the views that can be created."""
+    from wdi_metadata import ingest_metadata
+    from wdi_notes import ingest_notes
+    from wdi_store import ensure_ingested, get_store_path
+
+    with timed('prepare SQL tables'):
+        ensure_ingested()
+        ingest_metadata()
+        ingest_country_metadata()
+        ingest_notes()
+
+    # Rankings are only exposed when built (python rankings.py --build)
+    return [view for view, filename in SQL_VIEWS.items() if os.path.exists(get_store_path(filename))]
+
+def _get_fingerprint() -> str:
+    from process_wb_data import get_data_fingerprint
+    from wdi_metadata import get_metadata_fingerprint
+    from wdi_notes import get_notes_fingerprint
+
+    return "|".join([get_data_fingerprint(), get_metadata_fingerprint(), get_notes_fingerprint()])
+
+def get_connection():
+    """DuckDB connection with every available view, rebuilt when the source files change."""
+    from wdi_store import get_store_path
+
+    fingerprint = _get_fingerprint()
+    if _CONNECTION.get('fingerprint') != fingerprint:
+        connection = duckdb.connect()
+        for view in prepare_tables():
+            path = get_store_path(SQL_VIEWS[view])
+            columns = ", ".join(f'"{field}" AS "{view_column_name(field)}"'
+                                for field in pq.read_schema(path).names)
+            escaped_path = path.replace("'", "''")
+            connection.execute(f"CREATE VIEW {view} AS SELECT {columns} FROM read_parquet('{escaped_path}')")
+        _CONNECTION.update({'fingerprint': fingerprint, 'connection': connection})
+    return _CONNECTION['connection']
+
+def query(sql: str, params: Optional[List] = None,
+          arrow: bool = False) -> Union[pd.DataFrame, 'pyarrow.Table']:
+    """Run a SQL query and return a DataFrame, or an Arrow table with ``arrow=True``.
+
+    Safe to call from several threads: each query runs on its own cursor.
+    """
+    cursor = get_connection().cursor()
+    try:
+        result = cursor.execute(sql, params or [])
+        if arrow:
+            to_arrow = getattr(result, 'to_arrow_table', None) or result.fetch_arrow_table
+            return to_arrow()
+        return result.df()
+    finally:
+        cursor.close()
+
+def describe_tables() -> pd.DataFrame:
+    """Columns and types of every view."""
+    return query("SELECT table_name AS view, column_name AS column, data_type AS type "
+                 "FROM information_schema.columns ORDER BY table_name, ordinal_position")
+
+def write_result(sql: str, fmt: str = 'table', output: Optional[str] = None) -> None:
+    """Run a query and print it or write it to ``output`` in the given format."""
+    if fmt == 'table':
+        df = query(sql)
+        if output:
+            df.to_string(output, index=False)
+        else:
+            print(df.to_string(index=False))
+        print(f"({len(df):,} rows)", file=sys.stderr)
+        return
+
+    if fmt in ('parquet', 'arrow') and output is None:
+        raise ValueError(f"--output is required for {fmt} output")
+
+    import pyarrow.csv
+    import pyarrow.feather
+    import pyarrow.parquet
+
+    table = query(sql, arrow=True)
+    if fmt == 'csv':
+        pyarrow.csv.write_csv(table, output or sys.stdout.buffer)
+    elif fmt == 'parquet':
+        pyarrow.parquet.write_table(table, output, compression='zstd')
+    else:
+        pyarrow.feather.write_feather(table, output)
+    print(f"({table.num_rows:,} rows)", file=sys.stderr)
+
+def main():
+    """Main function for command line usage."""
+    parser = argparse.ArgumentParser(description="Run SQL over the WDI store, metadata and notes")
+    parser.add_argument("sql", nargs="?",
+                       help="SQL query (or use --file); views: " + ", ".join(SQL_VIEWS))
+    parser.add_argument("--file", type=str,
+                       help="Read the query from a file ('-' for standard input)")
+    parser.add_argument("--format", choices=OUTPUT_FORMATS, default='table',
+                       help="Output format (default: table)")
+    parser.add_argument("--output", type=str, default=None,
+                       help="Write the result to a file instead of standard output")
+    parser.add_argument("--tables", action="store_true",
+                       help="List the views and their columns")
+
+    args = parser.parse_args()
+
+    if args.tables:
+        for view, columns in describe_tables().groupby('view', sort=False):
+            print(f"{view}: " + ", ".join(f"{row.column} {row.type}" for row in columns.itertuples()))
+        return
+
+    sql = args.sql
+    if args.file:
+        with (sys.stdin if args.file == '-' else open(args.file)) as f:
+            sql = f.read()
+    if not sql:
+        parser.print_help()
+        return
+
+    try:
+        write_result(sql, args.format, args.output)
+    except (ValueError, duckdb.Error) as e:
+        print(f"Error: {e}", file=sys.stderr)
+        raise SystemExit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,405 @@
+"""
+Columnar long-format store for the WDI main data file.
+
+``ingest_wdi_data`` streams WDICSV.csv once and writes every non-null
+(indicator, country, year) value to a Parquet file sorted by indicator and
+year, so later reads of one indicator or one year only touch the matching row
+groups. Summary statistics for every (indicator, year) are computed during the
+same ingest into indexed summary tables, which the panels and CLIs read
+without loading the underlying slice.
+
+Usage:
+    python wdi_store.py --ingest [--force]
+    python wdi_store.py --stats NY.GDP.PCAP.CD --year 2022
+"""
+
+from __future__ import annotations
+
+import argparse
+import functools
+import json
+import os
+import threading
+import time
+from typing import Callable, Dict, List, Optional
+
+import config
+from startup import lazy_import, timed
+
+pd = lazy_import('pandas')
+pa = lazy_import('pyarrow')
+pq = lazy_import('pyarrow.parquet')
+
+# Number of countries kept at each end of the ranking in the summary tables
+SUMMARY_EXTREMES = 10
+
+# Store rows converted to pandas at once when computing the summary tables
+SUMMARY_BATCH_ROWS = 1_000_000
+
+_SUMMARY_CACHE: Dict[str, object] = {}
+
+# Serializes builds of the store and the tables ingested next to it, so
+# concurrent requests wait for one build instead of racing on the files
+INGEST_LOCK = threading.RLock()
+
+def ingest_locked(is_current: Callable[[], bool]) -> Callable:
+    """Decorate an ``ingest(force=False)`` function with double-checked locking.
+
+    When ``is_current()`` is True the call returns at once without the lock,
+    so readers never wait behind a build; otherwise the function runs while
+    holding ``INGEST_LOCK`` and re-checks inside.
+    """
+    def decorator(func: Callable) -> Callable:
+        @functools.wraps(func)
+        def wrapper(force: bool = False) -> bool:
+            if not force and is_current():
+                return True
+            with INGEST_LOCK:
+                return func(force)
+        return wrapper
+    return decorator
+
+def get_store_path(filename: str) -> str:
+    """Path of a store file inside the processed data directory."""
+    return os.path.join(config.DATA_DIR, filename)
+
+def _write_parquet(table: pa.Table, path: str, **kwargs) -> None:
+    """Write a Parquet file atomically, so readers never see a partial file."""
+    tmp_path = path + '.tmp'
+    pq.write_table(table, tmp_path, compression='zstd', **kwargs)
+    os.replace(tmp_path, path)
+
+def _read_store_meta() -> Dict:
+    try:
+        with open(get_store_path(config.WDI_STORE_META_FILE)) as f:
+            return json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return {}
+
+def is_ingested() -> bool:
+    """True if the store exists and was built from the current source files."""
+    from process_wb_data import get_data_fingerprint
+
+    meta = _read_store_meta()
+    return (meta.get('fingerprint') == get_data_fingerprint()
+            and os.path.exists(get_store_path(config.WDI_STORE_FILE)))
+
+def _melt_chunk(chunk: pd.DataFrame, country_mapping: Dict[str, str],
+                country_names: Dict[str, str]) -> pd.DataFrame:
+    """Reshape a chunk of the wide main file into store rows."""
+    from process_wb_data import get_year_columns
+
+    long_df = chunk.melt(
+        id_vars=['Indicator Code', 'Country Code', 'Country Name'],
+        value_vars=get_year_columns(chunk),
+        var_name='Year',
+        value_name='IndicatorValue'
+    ).dropna(subset=['IndicatorValue'])
+
+    # Aggregates are kept (without an ISO3 code) so they can be compared
+    # against computed regional aggregates
+    iso3 = long_df['Country Code'].map(country_mapping)
+    return pd.DataFrame({
+        'IndicatorCode': long_df['Indicator Code'],
+        'CountryCode': long_df['Country Code'],
+        'ISO3': iso3,
+        'CountryName': iso3.map(country_names).fillna(long_df['Country Name']),
+        'Year': long_df['Year'].astype('int16'),
+        'IndicatorValue': long_df['IndicatorValue'].astype('float64')
+    })
+
+def compute_summary_tables(long_df: pd.DataFrame) -> Dict[str, pd.DataFrame]:
+    """Compute per-(indicator, year) statistics and top/bottom countries.
+
+    Only rows that map to a country are used, matching the processed slices.
+    Returns the ``summary`` table (one row per group) and the ``extremes``
+    table (top and bottom countries per group with their rank).
+    """
+    countries = long_df[long_df['ISO3'].notna()]
+    keys = ['IndicatorCode', 'Year']
+    grouped = countries.groupby(keys, sort=True)['IndicatorValue']
+
+    summary = grouped.agg(Count='count', Mean='mean', Median='median',
+                          Std='std', Min='min', Max='max')
+    quartiles = grouped.quantile([0.25, 0.75]).unstack()
+    summary['Q25'] = quartiles[0.25]
+    summary['Q75'] = quartiles[0.75]
+
+    ranked = countries.sort_values(keys + ['IndicatorValue'], ascending=[True, True, False])
+    top = ranked.groupby(keys, sort=False).head(SUMMARY_EXTREMES).copy()
+    top['Position'] = 'top'
+    top['Rank'] = top.groupby(keys, sort=False).cumcount() + 1
+
+    ranked_up = countries.sort_values(keys + ['IndicatorValue'], ascending=[True, True, True])
+    bottom = ranked_up.groupby(keys, sort=False).head(SUMMARY_EXTREMES).copy()
+    bottom['Position'] = 'bottom'
+    bottom['Rank'] = bottom.groupby(keys, sort=False).cumcount() + 1
+
+    leaders = top[top['Rank'] == 1].set_index(keys)
+    summary['TopCountry'] = leaders['CountryName']
+    summary['TopValue'] = leaders['IndicatorValue']
+
+    extremes = pd.concat([top, bottom], ignore_index=True)[
+        keys + ['Position', 'Rank', 'ISO3', 'CountryName', 'IndicatorValue']
+    ].sort_values(keys + ['Position', 'Rank'])
+
+    return {'summary': summary.reset_index(), 'extremes': extremes.reset_index(drop=True)}
+
+def summarize_store_table(table: pa.Table) -> Dict[str, pd.DataFrame]:
+    """``compute_summary_tables`` over a store table sorted by indicator, a few indicators at a time.
+
+    Only about SUMMARY_BATCH_ROWS rows are converted to pandas at once, so the
+    whole store never has to fit in memory as a DataFrame.
+    """
+    import pyarrow.compute as pc
+
+    counts = pc.value_counts(table.column('IndicatorCode')).field('counts').to_pylist()
+    batches, offset, start = [], 0, 0
+    for count in counts:
+        if offset > start and offset + count - start > SUMMARY_BATCH_ROWS:
+            batches.append((start, offset - start))
+            start = offset
+        offset += count
+    if offset > start:
+        batches.append((start, offset - start))
+
+    parts = [compute_summary_tables(table.slice(start, length).to_pandas()) for start, length in batches]
+    return {name: pd.concat([part[name] for part in parts], ignore_index=True)
+            for name in ('summary', 'extremes')}
+
+@ingest_locked(is_ingested)
+def ingest_wdi_data(force: bool = False) -> bool:
+    """Build the long-format store and summary tables from the main data file."""
+    from process_wb_data import (
+        ensure_data_dir,
+        get_country_iso3_mapping,
+        get_country_name_from_iso3,
+        get_data_fingerprint
+    )
+
+    if not force and is_ingested():
+        print("WDI store is up to date")
+        return True
+
+    print(f"Ingesting {config.WDI_MAIN_DATA_FILE} into the WDI store...")
+    start = time.perf_counter()
+
+    try:
+        country_mapping = get_country_iso3_mapping()
+        country_names = {iso3: get_country_name_from_iso3(iso3) for iso3 in set(country_mapping.values())}
+
+        with timed('ingest main data file'):
+            tables = []
+            for chunk in pd.read_csv(config.WDI_MAIN_DATA_FILE, chunksize=config.CSV_CHUNK_SIZE):
+                chunk_df = _melt_chunk(chunk, country_mapping, country_names)
+                tables.append(pa.Table.from_pandas(chunk_df, preserve_index=False))
+                print(f"  ...{sum(len(table) for table in tables):,} values read")
+    except FileNotFoundError as e:
+        print(f"Error: Could not find required data file: {e}")
+        return False
+
+    if not tables:
+        print("No data found in the main data file")
+        return False
+
+    # The sorted copy replaces the chunks, so only one copy is kept
+    table = pa.concat_tables(tables)
+    del tables
+    table = table.sort_by([
+        ('IndicatorCode', 'ascending'),
+        ('Year', 'ascending'),
+        ('IndicatorValue', 'descending')
+    ])
+
+    ensure_data_dir()
+    _write_parquet(table, get_store_path(config.WDI_STORE_FILE), row_group_size=config.STORE_ROW_GROUP_SIZE)
+
+    with timed('summary statistics'):
+        summary_tables = summarize_store_table(table)
+    for name, filename in (('summary', config.SUMMARY_STATS_FILE), ('extremes', config.SUMMARY_EXTREMES_FILE)):
+        _write_parquet(pa.Table.from_pandas(summary_tables[name], preserve_index=False), get_store_path(filename))
+    _SUMMARY_CACHE.clear()
+
+    # The metadata marks the store as current, so it is replaced last
+    meta_path = get_store_path(config.WDI_STORE_META_FILE)
+    with open(meta_path + '.tmp', 'w') as f:
+        json.dump({
+            'fingerprint': get_data_fingerprint(),
+            'rows': table.num_rows,
+            'indicators': len(table.column('IndicatorCode').unique()),
+            'ingested_at': time.strftime('%Y-%m-%dT%H:%M:%S')
+        }, f, indent=2)
+    os.replace(meta_path + '.tmp', meta_path)
+
+    print(f"Ingested {table.num_rows:,} values and {len(summary_tables['summary']):,} "
+          f"(indicator, year) summaries in {time.perf_counter() - start:.1f}s")
+    return True
+
+def ensure_ingested() -> bool:
+    """Ingest the main data file if the store is missing or out of date.
+
+    Request handlers check ``is_ingested`` instead, leaving the build to the
+    warm-up and the CLIs.
+    """
+    return is_ingested() or ingest_wdi_data()
+
+def read_store(indicators: Optional[List[str]] = None,
+               years: Optional[List[int]] = None,
+               countries: Optional[List[str]] = None,
+               columns: Optional[List[str]] = None,
+               include_aggregates: bool = False) -> pd.DataFrame:
+    """Read store rows, pushing indicator/year/country filters into the Parquet scan.
+
+    ``countries`` are World Bank country codes. Regional aggregates are only
+    returned with ``include_aggregates=True``.
+    """
+    filters = []
+    if indicators is not None:
+        filters.append(('IndicatorCode', 'in', list(indicators)))
+    if years is not None:
+        filters.append(('Year', 'in', [int(year) for year in years]))
+    if countries is not None:
+        filters.append(('CountryCode', 'in', list(countries)))
+
+    read_columns = None
+    if columns is not None:
+        read_columns = list(dict.fromkeys(columns + ([] if include_aggregates else ['ISO3'])))
+
+    table = pq.read_table(get_store_path(config.WDI_STORE_FILE),
+                          columns=read_columns, filters=filters or None)
+    df = table.to_pandas()
+    if 'Year' in df.columns:
+        df['Year'] = df['Year'].astype(int)
+    if not include_aggregates:
+        df = df[df['ISO3'].notna()]
+        if columns is not None and 'ISO3' not in columns:
+            df = df.drop(columns='ISO3')
+    return df.reset_index(drop=True)
+
+def write_derived_table(df: pd.DataFrame, filename: str, fingerprint: Optional[str] = None) -> str:
+    """Write a table derived from the store, tagged with the data fingerprint.
+
+    Rows should already be sorted by the columns queries filter on, so the
+    Parquet row-group statistics can skip unrelated rows. Tables built from
+    other source files pass their own ``fingerprint``.
+    """
+    from process_wb_data import ensure_data_dir, get_data_fingerprint
+
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    table = table.replace_schema_metadata({
+        **(table.schema.metadata or {}),
+        b'wdi_fingerprint': (fingerprint or get_data_fingerprint()).encode('utf-8')
+    })
+    ensure_data_dir()
+    path = get_store_path(filename)
+    with INGEST_LOCK:
+        _write_parquet(table, path, row_group_size=config.STORE_ROW_GROUP_SIZE)
+    return path
+
+def is_derived_table_current(filename: str, fingerprint: Optional[str] = None) -> bool:
+    """True if a derived table exists and was built from the current data."""
+    from process_wb_data import get_data_fingerprint
+
+    path = get_store_path(filename)
+    if not os.path.exists(path):
+        return False
+    metadata = pq.read_schema(path).metadata or {}
+    return metadata.get(b'wdi_fingerprint') == (fingerprint or get_data_fingerprint()).encode('utf-8')
+
+def read_derived_table(filename: str, filters: Optional[List] = None,
+                       columns: Optional[List[str]] = None) -> pd.DataFrame:
+    """Read a derived table, pushing filters into the Parquet scan."""
+    table = pq.read_table(get_store_path(filename), columns=columns, filters=filters or None)
+    return table.to_pandas()
+
+def load_summary_tables() -> Dict[str, pd.DataFrame]:
+    """Load the summary tables indexed by (indicator, year), cached in memory.
+
+    The cache is keyed on the fingerprint of the store on disk, so a store
+    rebuilt by another process is picked up.
+    """
+    fingerprint = _read_store_meta().get('fingerprint')
+    if _SUMMARY_CACHE.get('fingerprint') != fingerprint:
+        with timed('summary tables'):
+            summary = pd.read_parquet(get_store_path(config.SUMMARY_STATS_FILE))
+            extremes = pd.read_parquet(get_store_path(config.SUMMARY_EXTREMES_FILE))
+        _SUMMARY_CACHE.update({
+            'fingerprint': fingerprint,
+            'summary': summary.set_index(['IndicatorCode', 'Year']).sort_index(),
+            'extremes': extremes.set_index(['IndicatorCode', 'Year']).sort_index()
+        })
+    return _SUMMARY_CACHE
+
+def get_summary_stats(indicator_code: str, year: str) -> Optional[Dict]:
+    """Precomputed statistics for an (indicator, year), or None if unavailable.
+
+    Returns the same keys as ``process_wb_data.get_indicator_summary_stats``.
+    """
+    if not is_ingested():
+        return None
+
+    tables = load_summary_tables()
+    key = (indicator_code, int(year))
+    if key not in tables['summary'].index:
+        return None
+
+    row = tables['summary'].loc[key]
+    extremes = tables['extremes'].loc[[key]]
+
+    def ranked(position: str) -> List[Dict]:
+        rows = extremes[extremes['Position'] == position].sort_values('Rank')
+        return rows[['ISO3', 'CountryName', 'IndicatorValue']].to_dict('records')
+
+    return {
+        'count': int(row['Count']),
+        'mean': row['Mean'],
+        'median': row['Median'],
+        'std': row['Std'],
+        'min': row['Min'],
+        'max': row['Max'],
+        'q25': row['Q25'],
+        'q75': row['Q75'],
+        'top_country': row['TopCountry'],
+        'top_value': row['TopValue'],
+        'top_10': ranked('top'),
+        'bottom_10': ranked('bottom')
+    }
+
+def main():
+    """Main function for command line usage."""
+    parser = argparse.ArgumentParser(description="Build and query the columnar WDI store")
+    parser.add_argument("--ingest", action="store_true",
+                       help="Ingest the main data file into the store")
+    parser.add_argument("--force", action="store_true",
+                       help="Rebuild the store even if it is up to date")
+    parser.add_argument("--stats", type=str, metavar="INDICATOR",
+                       help="Print precomputed summary statistics for an indicator")
+    parser.add_argument("--year", type=str, default=config.DEFAULT_YEAR,
+                       help="Year for --stats (default: 2023)")
+
+    args = parser.parse_args()
+
+    if args.ingest:
+        if not args.force and is_ingested():
+            print("WDI store is up to date")
+        else:
+            ingest_wdi_data(args.force)
+
+    if args.stats:
+        stats = get_summary_stats(args.stats, args.year)
+        if stats is None:
+            print(f"No precomputed statistics for {args.stats} in {args.year} "
+                  f"(run with --ingest first)")
+            return
+        print(f"Summary for {args.stats} ({args.year}):")
+        for key in ('count', 'mean', 'median', 'std', 'min', 'q25', 'q75', 'max'):
+            print(f"  {key:<7} {stats[key]:,.2f}")
+        print("  Top 10:")
+        for i, row in enumerate(stats['top_10'], 1):
+            print(f"  {i:2d}. {row['CountryName']:<25} {row['IndicatorValue']:>12,.2f}")
+
+    if not args.ingest and not args.stats:
+        parser.print_help()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,371 @@
+"""
+Versioned store of WDI releases ("vintages") with deduplicated storage.
+
+Each ingested release is split into one block per indicator and decade
+(VINTAGE_BLOCK_YEARS), holding the (country, year, value) rows of those years.
+Blocks are content-addressed: a block is named by the hash of its rows and
+written only if no earlier release already stored the same rows, so a new
+release costs only the decades it revised and unchanged history is shared.
+A small JSON manifest per vintage maps every indicator to its blocks and
+carries a sequence number giving the ingest order; a LATEST file names the
+most recent vintage.
+
+An as-of query reads one manifest and the blocks of the years it needs, so
+its latency does not depend on how many vintages are stored:
+
+    process_indicator_for_year('NY.GDP.PCAP.CD', '2020', vintage='2024-03')
+
+Usage:
+    python wdi_vintages.py --ingest 2024-03 [--source releases/2024-03]
+    python wdi_vintages.py --list
+    python wdi_vintages.py --diff 2024-03 2024-07
+    python wdi_vintages.py --indicator NY.GDP.PCAP.CD --year 2020 --vintage 2024-03 [--country USA]
+"""
+
+from __future__ import annotations
+
+import argparse
+import hashlib
+import json
+import os
+import re
+import time
+from functools import lru_cache
+from typing import Dict, List, Optional, Tuple
+
+import config
+from startup import lazy_import, timed
+
+pd = lazy_import('pandas')
+np = lazy_import('numpy')
+pa = lazy_import('pyarrow')
+pq = lazy_import('pyarrow.parquet')
+
+BLOCK_COLUMNS = ['CountryCode', 'Year', 'IndicatorValue']
+
+VINTAGE_NAME_PATTERN = re.compile(r'^[A-Za-z0-9][A-Za-z0-9_.-]*$')
+
+_MANIFEST_CACHE: Dict[str, tuple] = {}
+
+def get_vintage_path(*parts: str) -> str:
+    """Path inside the vintage store."""
+    return os.path.join(config.DATA_DIR, config.VINTAGE_DIR, *parts)
+
+def _manifest_path(vintage: str) -> str:
+    return get_vintage_path('manifests', f"{vintage}.json")
+
+def _block_path(block_hash: str) -> str:
+    return get_vintage_path('blocks', block_hash[:2], f"{block_hash}.parquet")
+
+def _latest_path() -> str:
+    return get_vintage_path('LATEST')
+
+def hash_block(block: pd.DataFrame) -> str:
+    """Content hash of a block sorted by country and year."""
+    digest = hashlib.sha256()
+    digest.update('\x1f'.join(block['CountryCode']).encode('utf-8'))
+    digest.update(block['Year'].to_numpy(dtype='int16').tobytes())
+    digest.update(block['IndicatorValue'].to_numpy(dtype='float64').tobytes())
+    return digest.hexdigest()[:32]
+
+def _read_release(source_dir: str) -> pd.DataFrame:
+    """Stream a release's main data file into long rows sorted by indicator, block, country and year."""
+    from process_wb_data import get_year_columns
+
+    tables = []
+    for chunk in pd.read_csv(os.path.join(source_dir, config.WDI_MAIN_DATA_FILE),
+                             chunksize=config.CSV_CHUNK_SIZE):
+        long_df = chunk.melt(id_vars=['Indicator Code', 'Country Code'], value_vars=get_year_columns(chunk),
+                             var_name='Year', value_name='IndicatorValue').dropna(subset=['IndicatorValue'])
+        tables.append(pa.Table.from_pandas(pd.DataFrame({
+            'IndicatorCode': long_df['Indicator Code'],
+            'CountryCode': long_df['Country Code'],
+            'Year': long_df['Year'].astype('int16'),
+            'BlockStart': (long_df['Year'].astype('int16') // config.VINTAGE_BLOCK_YEARS) * config.VINTAGE_BLOCK_YEARS,
+            'IndicatorValue': long_df['IndicatorValue'].astype('float64')
+        }), preserve_index=False))
+        print(f"  ...{sum(len(table) for table in tables):,} values read")
+
+    table = pa.concat_tables(tables).sort_by([('IndicatorCode', 'ascending'),
+                                              ('BlockStart', 'ascending'),
+                                              ('CountryCode', 'ascending'),
+                                              ('Year', 'ascending')])
+    return table.to_pandas()
+
+def list_vintages() -> List[Dict]:
+    """Summaries of the stored vintages in ingest order, oldest first."""
+    manifest_dir = get_vintage_path('manifests')
+    if not os.path.isdir(manifest_dir):
+        return []
+    vintages = []
+    for filename in os.listdir(manifest_dir):
+        if filename.endswith('.json'):
+            manifest = load_manifest(filename[:-len('.json')])
+            vintages.append({key: value for key, value in manifest.items() if key != 'indicators'})
+    return sorted(vintages, key=lambda vintage: (vintage.get('sequence', 0), vintage['created_at']))
+
+def resolve_vintage(vintage: str) -> str:
+    """Vintage name, with ``'latest'`` meaning the most recently ingested one."""
+    if vintage != 'latest':
+        return vintage
+    try:
+        with open(_latest_path()) as f:
+            latest = f.read().strip()
+        if os.path.exists(_manifest_path(latest)):
+            return latest
+    except FileNotFoundError:
+        pass
+
+    # Stores written before the LATEST pointer existed
+    vintages = list_vintages()
+    if not vintages:
+        raise FileNotFoundError("No vintages have been ingested")
+    return vintages[-1]['vintage']
+
+def load_manifest(vintage: str) -> Dict:
+    """Manifest of a vintage, cached until its file changes."""
+    vintage = resolve_vintage(vintage)
+    path = _manifest_path(vintage)
+    try:
+        mtime = os.path.getmtime(path)
+    except OSError:
+        raise FileNotFoundError(f"Vintage '{vintage}' has not been ingested") from None
+    cached = _MANIFEST_CACHE.get(vintage)
+    if cached is None or cached[0] != mtime:
+        with open(path) as f:
+            cached = _MANIFEST_CACHE[vintage] = (mtime, json.load(f))
+    return cached[1]
+
+def get_indicator_blocks(manifest: Dict, indicator_code: str, first_year: Optional[int] = None,
+                         last_year: Optional[int] = None) -> List[str]:
+    """Hashes of an indicator's blocks in a manifest overlapping the given years."""
+    blocks = manifest['indicators'].get(indicator_code)
+    if blocks is None:
+        return []
+    # Vintages stored before blocks were split by decade hold one block per indicator
+    if isinstance(blocks, str):
+        return [blocks]
+
+    span = manifest['block_years']
+    return [block_hash for block_start, block_hash in sorted(blocks.items(), key=lambda item: int(item[0]))
+            if (last_year is None or int(block_start) <= last_year)
+            and (first_year is None or int(block_start) + span > first_year)]
+
+def ingest_vintage(vintage: str, source_dir: str = '.', force: bool = False) -> Optional[Dict]:
+    """Store a release as a vintage, writing only blocks no earlier vintage has.
+
+    Returns the manifest, or None if the release could not be read.
+    """
+    from process_wb_data import get_data_fingerprint
+
+    if not VINTAGE_NAME_PATTERN.match(vintage) or vintage == 'latest':
+        raise ValueError(f"Invalid vintage name: {vintage}")
+    if os.path.exists(_manifest_path(vintage)) and not force:
+        print(f"Vintage {vintage} already exists (use --force to replace it)")
+        return load_manifest(vintage)
+
+    previous = [entry for entry in list_vintages() if entry['vintage'] != vintage]
+    previous_blocks = load_manifest(previous[-1]['vintage'])['indicators'] if previous else {}
+
+    print(f"Ingesting {os.path.join(source_dir, config.WDI_MAIN_DATA_FILE)} as vintage {vintage}...")
+    start = time.perf_counter()
+    try:
+        with timed(f'read release {vintage}'):
+            long_df = _read_release(source_dir)
+    except FileNotFoundError as e:
+        print(f"Error: Could not find release file: {e}")
+        return None
+
+    # Rows are sorted by indicator and block, so each block is a contiguous run
+    codes = long_df['IndicatorCode'].to_numpy()
+    block_starts = long_df['BlockStart'].to_numpy()
+    boundary = np.r_[True, (codes[1:] != codes[:-1]) | (block_starts[1:] != block_starts[:-1])]
+    starts = np.flatnonzero(boundary)
+    ends = list(starts[1:]) + [len(long_df)]
+
+    blocks: Dict[str, Dict[str, str]] = {}
+    new_blocks = new_bytes = 0
+    block_df = long_df[BLOCK_COLUMNS]
+    for begin, end in zip(starts, ends):
+        block = block_df.iloc[begin:end]
+        block_hash = hash_block(block)
+        blocks.setdefault(codes[begin], {})[str(block_starts[begin])] = block_hash
+        path = _block_path(block_hash)
+        if os.path.exists(path):
+            continue
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.tmp"
+        pq.write_table(pa.Table.from_pandas(block, preserve_index=False), tmp_path, compression='zstd')
+        os.replace(tmp_path, path)
+        new_blocks += 1
+        new_bytes += os.path.getsize(path)
+
+    changes = {
+        'added': sum(code not in previous_blocks for code in blocks),
+        'removed': sum(code not in blocks for code in previous_blocks),
+        'changed': sum(code in previous_blocks and previous_blocks[code] != block_hash
+                       for code, block_hash in blocks.items())
+    }
+    manifest = {
+        'vintage': vintage,
+        'sequence': max((entry.get('sequence', 0) for entry in previous), default=0) + 1,
+        'created_at': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'source_fingerprint': get_data_fingerprint((os.path.join(source_dir, config.WDI_MAIN_DATA_FILE),)),
+        'previous': previous[-1]['vintage'] if previous else None,
+        'rows': len(long_df),
+        'new_blocks': new_blocks,
+        'new_bytes': new_bytes,
+        'changes': changes,
+        'block_years': config.VINTAGE_BLOCK_YEARS,
+        'indicators': blocks
+    }
+    os.makedirs(os.path.dirname(_manifest_path(vintage)), exist_ok=True)
+    tmp_path = _manifest_path(vintage) + '.tmp'
+    with open(tmp_path, 'w') as f:
+        json.dump(manifest, f, indent=1, sort_keys=True)
+    os.replace(tmp_path, _manifest_path(vintage))
+
+    # The pointer is moved only once the manifest it names is in place
+    with open(_latest_path() + '.tmp', 'w') as f:
+        f.write(vintage + '\n')
+    os.replace(_latest_path() + '.tmp', _latest_path())
+
+    print(f"Stored vintage {vintage}: {len(blocks):,} indicators, {new_blocks:,} new blocks "
+          f"({new_bytes / 1e6:,.1f} MB); {changes['added']} added, {changes['changed']} revised, "
+          f"{changes['removed']} removed in {time.perf_counter() - start:.1f}s")
+    return manifest
+
+@lru_cache(maxsize=512)
+def _load_block(block_hash: str) -> pd.DataFrame:
+    # Blocks never change once written, so the cache needs no invalidation
+    return pq.read_table(_block_path(block_hash)).to_pandas()
+
+def load_vintage_series(indicator_code: str, vintage: str,
+                        years: Optional[Tuple[int, int]] = None) -> Optional[pd.DataFrame]:
+    """An indicator as of a vintage, in the processed slice layout.
+
+    With ``years`` (first, last), only the blocks covering them are read, so
+    the result may include other years of those blocks.
+    """
+    from process_wb_data import get_country_iso3_mapping, get_country_name_from_iso3
+
+    block_hashes = get_indicator_blocks(load_manifest(vintage), indicator_code, *(years or ()))
+    if not block_hashes:
+        return None
+
+    block = pd.concat([_load_block(block_hash) for block_hash in block_hashes], ignore_index=True)
+    block = block[~block['CountryCode'].isin(config.REGIONAL_AGGREGATES)]
+    iso3 = block['CountryCode'].map(get_country_iso3_mapping())
+    block = block.assign(ISO3=iso3).dropna(subset=['ISO3'])
+    country_names = {code: get_country_name_from_iso3(code) for code in block['ISO3'].unique()}
+    return pd.DataFrame({
+        'CountryCode': block['CountryCode'],
+        'ISO3': block['ISO3'],
+        'CountryName': block['ISO3'].map(country_names),
+        'IndicatorValue': block['IndicatorValue'].astype(float),
+        'Year': block['Year'].astype(int)
+    }).reset_index(drop=True)
+
+def process_vintage_slice(indicator_code: str, year: str, vintage: str, gap_fill: Optional[str] = None,
+                          window: int = config.GAP_FILL_WINDOW) -> Optional[pd.DataFrame]:
+    """Slice of an indicator for a year as published in a vintage."""
+    from process_wb_data import fill_indicator_gaps
+
+    year_range = (int(year) - window, int(year) + window) if gap_fill else (int(year), int(year))
+    series = load_vintage_series(indicator_code, vintage, year_range)
+    if series is None or series.empty:
+        print(f"No data for {indicator_code} in vintage {vintage}")
+        return None
+
+    if gap_fill:
+        df = fill_indicator_gaps(series, year, gap_fill, window)
+    else:
+        df = series[series['Year'] == int(year)].sort_values('IndicatorValue', ascending=False)
+    if df.empty:
+        print(f"No valid data points found for {indicator_code} in {year} (vintage {vintage})")
+        return None
+    return df.reset_index(drop=True)
+
+def diff_vintages(old: str, new: str) -> Dict[str, List[str]]:
+    """Indicators added, removed and revised between two vintages."""
+    old_blocks = load_manifest(old)['indicators']
+    new_blocks = load_manifest(new)['indicators']
+    # Blocks of stores written before the decade split compare as changed
+    return {
+        'added': sorted(set(new_blocks) - set(old_blocks)),
+        'removed': sorted(set(old_blocks) - set(new_blocks)),
+        'revised': sorted(code for code in set(old_blocks) & set(new_blocks)
+                          if old_blocks[code] != new_blocks[code])
+    }
+
+def get_value_history(indicator_code: str, country_code: str, year: str) -> List[Dict]:
+    """The value of one cell in every stored vintage, oldest first."""
+    history = []
+    for vintage in list_vintages():
+        value = None
+        for block_hash in get_indicator_blocks(load_manifest(vintage['vintage']), indicator_code,
+                                               int(year), int(year)):
+            block = _load_block(block_hash)
+            match = block[(block['CountryCode'] == country_code) & (block['Year'] == int(year))]
+            if not match.empty:
+                value = float(match['IndicatorValue'].iloc[0])
+        history.append({'vintage': vintage['vintage'], 'value': value})
+    return history
+
+def main():
+    """Main function for command line usage."""
+    parser = argparse.ArgumentParser(description="Store WDI releases as deduplicated vintages and query them as of a release")
+    parser.add_argument("--ingest", type=str, metavar="VINTAGE",
+                       help="Store a release under this name (e.g. 2024-03)")
+    parser.add_argument("--source", type=str, default='.',
+                       help=f"Directory with the release's {config.WDI_MAIN_DATA_FILE} (default: current directory)")
+    parser.add_argument("--force", action="store_true",
+                       help="Replace an existing vintage of the same name")
+    parser.add_argument("--list", action="store_true",
+                       help="List the stored vintages")
+    parser.add_argument("--diff", type=str, nargs=2, metavar=("OLD", "NEW"),
+                       help="Indicators added, removed and revised between two vintages")
+    parser.add_argument("--indicator", type=str,
+                       help="World Bank indicator code (e.g., NY.GDP.PCAP.CD)")
+    parser.add_argument("--year", type=str, default=config.DEFAULT_YEAR,
+                       help="Year to query (default: 2023)")
+    parser.add_argument("--vintage", type=str, default='latest',
+                       help="Vintage to query (default: latest)")
+    parser.add_argument("--country", type=str,
+                       help="World Bank country code: print the cell's value in every vintage")
+
+    args = parser.parse_args()
+
+    if args.ingest:
+        ingest_vintage(args.ingest, args.source, args.force)
+
+    if args.list:
+        for vintage in list_vintages():
+            changes = vintage['changes']
+            print(f"{vintage.get('sequence', 0):>4} {vintage['vintage']:<16} {vintage['created_at']}  "
+                  f"{vintage['rows']:>12,} values  "
+                  f"{vintage['new_blocks']:>6,} new blocks ({vintage['new_bytes'] / 1e6:,.1f} MB)  "
+                  f"+{changes['added']} ~{changes['changed']} -{changes['removed']}")
+
+    if args.diff:
+        diff = diff_vintages(*args.diff)
+        for kind, codes in diff.items():
+            print(f"{kind}: {len(codes)}" + (f" ({', '.join(codes[:10])}{', ...' if len(codes) > 10 else ''})"
+                                             if codes else ""))
+
+    if args.indicator and args.country:
+        for entry in get_value_history(args.indicator, args.country.upper(), args.year):
+            value = '-' if entry['value'] is None else f"{entry['value']:,.4f}"
+            print(f"{entry['vintage']:<16} {value}")
+    elif args.indicator:
+        df = process_vintage_slice(args.indicator, args.year, args.vintage)
+        if df is not None:
+            print(f"\n{args.indicator} in {args.year} as of vintage {resolve_vintage(args.vintage)}: "
+                  f"{len(df)} countries")
+            print(df.head(10).to_string(index=False))
+
+    if not (args.ingest or args.list or args.diff or args.indicator):
+        parser.print_help()
+
+if __name__ == "__main__":
+    main()